@@ -0,0 +1,58 @@
+"""Add composite indexes for hot fact, metric, rating and version lookups
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-03-02
+
+"""
+from typing import Sequence, Union
+from alembic import op
+
+revision: str = "007"
+down_revision: Union[str, None] = "006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # run_financial_engine / generate_pack / run_mapping_for_review: WHERE company_id = ?
+    # INCLUDE lets the engine load (period_end, canonical_key, value_base) with an index-only scan.
+    op.create_index(
+        "ix_normalized_facts_company_period_key",
+        "normalized_facts",
+        ["company_id", "period_end", "canonical_key"],
+        postgresql_include=["value_base"],
+    )
+    # run_rating / get_credit_review: max(period_end) WHERE version = ?, then WHERE version = ? AND period_end = ?
+    op.create_index(
+        "ix_metric_facts_version_period",
+        "metric_facts",
+        ["credit_review_version_id", "period_end"],
+        postgresql_include=["metric_key", "value"],
+    )
+    # Latest rating per version: WHERE version = ? ORDER BY created_at DESC LIMIT 1
+    op.create_index(
+        "ix_rating_results_version_created",
+        "rating_results",
+        ["credit_review_version_id", "created_at"],
+    )
+    # Latest document version per document: WHERE document_id = ? ORDER BY created_at DESC
+    op.create_index(
+        "ix_document_versions_document_created",
+        "document_versions",
+        ["document_id", "created_at"],
+    )
+    # Latest review version per review: WHERE credit_review_id = ? ORDER BY created_at DESC
+    op.create_index(
+        "ix_credit_review_versions_review_created",
+        "credit_review_versions",
+        ["credit_review_id", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_credit_review_versions_review_created", table_name="credit_review_versions")
+    op.drop_index("ix_document_versions_document_created", table_name="document_versions")
+    op.drop_index("ix_rating_results_version_created", table_name="rating_results")
+    op.drop_index("ix_metric_facts_version_period", table_name="metric_facts")
+    op.drop_index("ix_normalized_facts_company_period_key", table_name="normalized_facts")
@@ -0,0 +1,27 @@
+"""Add HNSW index on note_chunks.embedding for semantic notes search
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-03-04
+
+"""
+from typing import Sequence, Union
+from alembic import op
+
+revision: str = "008"
+down_revision: Union[str, None] = "007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Cosine distance (<=>) is what search_notes_semantic orders by; m/ef_construction are pgvector defaults.
+    # Query-time recall/latency trade-off is hnsw.ef_search (Settings.notes_hnsw_ef_search).
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_note_chunks_embedding_hnsw ON note_chunks
+        USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_note_chunks_embedding_hnsw")
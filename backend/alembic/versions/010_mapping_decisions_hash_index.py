@@ -0,0 +1,28 @@
+"""Index mapping_decisions on (tenant_id, raw_label_hash) for batched decision lookups
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-03-08
+
+"""
+from typing import Sequence, Union
+from alembic import op
+
+revision: str = "010"
+down_revision: Union[str, None] = "009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # resolve_labels: WHERE tenant_id = ? AND raw_label_hash IN (...)
+    op.create_index(
+        "ix_mapping_decisions_tenant_hash",
+        "mapping_decisions",
+        ["tenant_id", "raw_label_hash"],
+        postgresql_include=["canonical_key", "method"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_mapping_decisions_tenant_hash", table_name="mapping_decisions")
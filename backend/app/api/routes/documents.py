@@ -606,17 +606,8 @@ async def search_notes_endpoint(
     if not version:
         raise HTTPException(status_code=404, detail="Version not found")
 
-    import asyncio
-    from app.worker.tasks import get_sync_session
-    from app.services.notes_retrieval import search_notes_hybrid, search_notes_keyword
-
-    def _search():
-        sess = get_sync_session()
-        try:
-            if hybrid:
-                return search_notes_hybrid(sess, str(version.id), q, scope, top_k)
-            return search_notes_keyword(sess, str(version.id), q, scope, top_k)
-        finally:
-            sess.close()
-
-    return await asyncio.to_thread(_search)
+    from app.services.notes_retrieval import search_notes_hybrid_async, search_notes_keyword_async
+
+    if hybrid:
+        return await search_notes_hybrid_async(db, str(version.id), q, scope, top_k)
+    return await search_notes_keyword_async(db, str(version.id), q, scope, top_k)
@@ -11,6 +11,7 @@ from app.api.deps import get_current_user
 from app.models.tenancy import User
 from app.models.company import CreditReview, CreditReviewVersion, Engagement
 from app.services.extraction_loader import load_extraction_from_s3, extraction_to_flat_rows
+from app.services.label_similarity import SOURCE_TENANT_RULE, get_suggestion_index_async, record_label
 from app.services.llm_mapping_suggestions import suggest_canonical_key, suggest_batch
 
 router = APIRouter(prefix="/mappings", tags=["mappings"])
@@ -22,25 +23,51 @@ class MappingSuggestionResponse(BaseModel):
     confidence: float
     rationale: str
     method: str
+    candidates: list[dict] = []
 
 
-@router.get("/suggest", response_model=MappingSuggestionResponse)
-async def get_mapping_suggestion(
-    raw_label: str = Query(..., min_length=1),
-    db=Depends(get_db),
-    user: User = Depends(get_current_user),
-):
-    """Get LLM/rule-based suggestion for mapping raw_label to canonical_key."""
-    result = suggest_canonical_key(raw_label)
+class MappingSuggestionBatchRequest(BaseModel):
+    raw_labels: list[str]
+    top_k: int = 5
+
+
+def _suggestion_response(raw_label: str, result: dict) -> MappingSuggestionResponse:
     return MappingSuggestionResponse(
         raw_label=raw_label,
         canonical_key=result.get("canonical_key"),
         confidence=result.get("confidence", 0),
         rationale=result.get("rationale", ""),
         method=result.get("method", "UNMAPPED"),
+        candidates=result.get("candidates", []),
     )
 
 
+@router.get("/suggest", response_model=MappingSuggestionResponse)
+async def get_mapping_suggestion(
+    raw_label: str = Query(..., min_length=1),
+    top_k: int = Query(5, ge=1, le=20),
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Get LLM/rule-based suggestion for mapping raw_label to canonical_key."""
+    index = await get_suggestion_index_async(db, user.tenant_id)
+    return _suggestion_response(raw_label, suggest_canonical_key(raw_label, index=index, top_k=top_k))
+
+
+@router.post("/suggest/batch", response_model=list[MappingSuggestionResponse])
+async def get_mapping_suggestions_batch(
+    data: MappingSuggestionBatchRequest,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Top-k suggestions for many raw labels (e.g. the whole unmapped queue) in one index query."""
+    if len(data.raw_labels) > 500:
+        raise HTTPException(status_code=400, detail="At most 500 labels per request")
+    index = await get_suggestion_index_async(db, user.tenant_id)
+    results = suggest_batch(data.raw_labels, index=index, top_k=max(1, min(data.top_k, 20)))
+    return [_suggestion_response(r, res) for r, res in zip(data.raw_labels, results)]
+
+
 @router.get("/unmapped")
 async def list_unmapped_labels(
     document_version_id: UUID | None = None,
@@ -83,12 +110,41 @@ async def list_unmapped_labels(
             extraction = load_extraction_from_s3(excel_key)
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Could not load extraction: {e}")
-        rows = get_unmapped_from_extraction(extraction, limit=top)
+        from app.services.tenant_mapping_rules import get_tenant_rules_async
+
+        tenant_rules = await get_tenant_rules_async(db, user.tenant_id)
+        rows = get_unmapped_from_extraction(
+            extraction, limit=top, tenant_rules=tenant_rules, document_version_id=str(dv.id)
+        )
         unmapped = [r["raw_label"] for r in rows]
         return {"unmapped": unmapped, "top_with_counts": rows}
     raise HTTPException(status_code=400, detail="Provide document_version_id or document_version_ids")
 
 
+class ResolveLinesRequest(BaseModel):
+    document_version_id: UUID
+    lines: list[dict]
+
+
+@router.post("/resolve")
+async def resolve_mapping_lines(
+    data: ResolveLinesRequest,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """
+    Resolve statement lines ({statement_type, section_path, raw_label}) via prior MappingDecisions,
+    asking the LLM only for labels never decided before. New LLM decisions are stored.
+    """
+    from app.services.mapping_decisions import resolve_labels_async
+
+    if len(data.lines) > 1000:
+        raise HTTPException(status_code=400, detail="At most 1000 lines per request")
+    results = await resolve_labels_async(db, user.tenant_id, data.lines, str(data.document_version_id))
+    await db.commit()
+    return {"resolved": results}
+
+
 class ManualOverrideRequest(BaseModel):
     raw_label: str
     canonical_key: str
@@ -124,8 +180,8 @@ async def create_manual_override(
     user: User = Depends(get_current_user),
 ):
     """Record manual mapping. document_version_id: override for this doc only; else tenant-wide."""
-    import hashlib
     from app.models.mapping import MappingDecision
+    from app.services.mapping_decisions import label_hash
     from app.models.mapping_rule import MappingRule
 
     if document_version_id:
@@ -141,12 +197,15 @@ async def create_manual_override(
         db.add(rule)
         await db.flush()
         await db.commit()
+        from app.services.tenant_mapping_rules import invalidate_tenant_rules
+
+        invalidate_tenant_rules(user.tenant_id)
+        record_label(user.tenant_id, rule.pattern, rule.canonical_key, source=SOURCE_TENANT_RULE)
         return {"id": str(rule.id), "raw_label": data.raw_label, "canonical_key": data.canonical_key, "scope": "per_document_version"}
 
-    raw_label_hash = hashlib.sha256(data.raw_label.encode("utf-8")).hexdigest()
     md = MappingDecision(
         tenant_id=user.tenant_id,
-        raw_label_hash=raw_label_hash,
+        raw_label_hash=label_hash(data.raw_label),
         raw_label=data.raw_label,
         statement_type="SCI",  # Generic; could be inferred
         canonical_key=data.canonical_key,
@@ -157,4 +216,5 @@ async def create_manual_override(
     db.add(md)
     await db.flush()
     await db.commit()
+    record_label(user.tenant_id, md.raw_label, md.canonical_key)
     return {"id": str(md.id), "raw_label": data.raw_label, "canonical_key": data.canonical_key}
@@ -1,5 +1,6 @@
+from datetime import date
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from pydantic import BaseModel
@@ -7,7 +8,11 @@ from pydantic import BaseModel
 from app.db.session import get_db
 from app.api.deps import get_current_user
 from app.models.tenancy import User, Portfolio, PortfolioCompany
-from app.models.company import Company
+from app.models.company import Company, Engagement, CreditReview, CreditReviewVersion
+from app.models.mapping import NormalizedFact
+from app.models.metrics import MetricFact, RatingResult
+from app.services.credit_risk_quant_engine import compute_credit_risk_quantification
+from app.services.portfolio_risk_engine import DEFAULT_CONFIDENCE, portfolio_risk
 
 router = APIRouter(prefix="/portfolios", tags=["portfolios"])
 
@@ -75,3 +80,79 @@ async def add_company_to_portfolio(
     db.add(pc)
     await db.flush()
     return {"message": "Company added to portfolio"}
+
+
+@router.get("/{portfolio_id}/risk")
+async def get_portfolio_risk(
+    portfolio_id: UUID,
+    confidence: float = Query(DEFAULT_CONFIDENCE, gt=0, lt=1),
+    top_n: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """
+    Portfolio EL / UL at `confidence` under a one-factor model with sector asset correlations.
+    Each company contributes its latest rated review version: PD from the rating result, LGD/EAD as in
+    the review's credit risk quantification. Companies without a rating (or PD) are listed as skipped.
+    """
+    result = await db.execute(
+        select(Portfolio).where(Portfolio.id == portfolio_id, Portfolio.tenant_id == user.tenant_id)
+    )
+    if not result.scalar_one_or_none():
+        raise HTTPException(status_code=404, detail="Portfolio not found")
+    result = await db.execute(
+        select(Company)
+        .join(PortfolioCompany, PortfolioCompany.company_id == Company.id)
+        .where(PortfolioCompany.portfolio_id == portfolio_id, Company.tenant_id == user.tenant_id)
+    )
+    companies = {c.id: c for c in result.scalars().all()}
+
+    # Latest rating result per company, across all its engagements / reviews / versions
+    result = await db.execute(
+        select(Engagement.company_id, RatingResult)
+        .join(CreditReview, CreditReview.engagement_id == Engagement.id)
+        .join(CreditReviewVersion, CreditReviewVersion.credit_review_id == CreditReview.id)
+        .join(RatingResult, RatingResult.credit_review_version_id == CreditReviewVersion.id)
+        .where(Engagement.company_id.in_(companies))
+        .order_by(RatingResult.created_at.desc())
+    )
+    rated: dict[UUID, RatingResult] = {}
+    for company_id, rr in result.all():
+        rated.setdefault(company_id, rr)
+
+    version_company = {rr.credit_review_version_id: cid for cid, rr in rated.items()}
+    metric_by_company: dict[UUID, dict[date, dict[str, float]]] = {cid: {} for cid in rated}
+    if version_company:
+        result = await db.execute(select(MetricFact).where(MetricFact.credit_review_version_id.in_(version_company)))
+        for m in result.scalars().all():
+            if m.period_end:
+                metric_by_company[version_company[m.credit_review_version_id]].setdefault(m.period_end, {})[m.metric_key] = float(m.value)
+    facts_by_company: dict[UUID, dict[date, dict[str, float]]] = {cid: {} for cid in rated}
+    if rated:
+        result = await db.execute(select(NormalizedFact).where(NormalizedFact.company_id.in_(rated)))
+        for f in result.scalars().all():
+            facts_by_company[f.company_id].setdefault(f.period_end, {})[f.canonical_key] = float(f.value_base)
+
+    ids, pds, lgds, eads, sectors, skipped = [], [], [], [], [], []
+    for cid, company in companies.items():
+        rr = rated.get(cid)
+        quant = compute_credit_risk_quantification(facts_by_company[cid], metric_by_company[cid], rr.rating_grade, rr.pd_band) if rr else None
+        if not quant or quant["pd"] is None:
+            skipped.append({"company_id": str(cid), "name": company.name, "reason": "no rating" if not rr else "no PD band"})
+            continue
+        ids.append(str(cid))
+        pds.append(quant["pd"])
+        lgds.append(quant["lgd"])
+        eads.append(quant["ead"])
+        sectors.append(company.sector)
+
+    try:
+        out = portfolio_risk(ids, pds, lgds, eads, sectors, confidence=confidence, top_n=top_n)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    names = {str(cid): c.name for cid, c in companies.items()}
+    for row in out["top_contributors"]:
+        row["name"] = names.get(row["obligor_id"])
+    out["portfolio_id"] = str(portfolio_id)
+    out["skipped"] = skipped
+    return out
@@ -61,6 +61,18 @@ class CreditReviewRunResponse(BaseModel):
     message: str | None = None
 
 
+class FactOverride(BaseModel):
+    canonical_key: str
+    period_end: date
+    value: float | None = None  # None removes the fact
+    statement_type: str | None = None
+
+
+class FactOverridesRequest(BaseModel):
+    overrides: list[FactOverride]
+    formats: list[str] = ["DOCX"]
+
+
 class EngagementDetailResponse(BaseModel):
     id: str
     company_id: str
@@ -215,6 +227,62 @@ async def run_credit_review_pipeline(
     )
 
 
+@router.post("/credit-reviews/{review_id}/overrides", response_model=CreditReviewRunResponse)
+async def apply_credit_review_overrides(
+    review_id: UUID,
+    data: FactOverridesRequest,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """
+    Override individual normalized facts on the latest version of a review and re-analyse incrementally
+    (no re-mapping; only the metrics, sections and memo sections the changed keys feed are recomputed).
+    """
+    from sqlalchemy import desc
+    from app.worker.tasks import apply_fact_overrides
+
+    if not data.overrides:
+        raise HTTPException(status_code=400, detail="No overrides given")
+    if len(data.overrides) > 200:
+        raise HTTPException(status_code=400, detail="At most 200 overrides per request")
+    result = await db.execute(
+        select(CreditReview, Engagement)
+        .join(Engagement, Engagement.id == CreditReview.engagement_id)
+        .where(
+            CreditReview.id == review_id,
+            Engagement.tenant_id == user.tenant_id,
+        )
+    )
+    row = result.one_or_none()
+    if not row:
+        raise HTTPException(status_code=404, detail="Credit review not found")
+    review, _ = row
+
+    v_result = await db.execute(
+        select(CreditReviewVersion)
+        .where(CreditReviewVersion.credit_review_id == review.id)
+        .order_by(desc(CreditReviewVersion.created_at))
+    )
+    version = v_result.scalars().first()
+    if not version:
+        raise HTTPException(status_code=400, detail="No versions found for review")
+    if version.locked_at:
+        raise HTTPException(status_code=409, detail="Review version is locked")
+
+    version_id_str = str(version.id)
+    apply_fact_overrides.delay(
+        version_id_str,
+        [o.model_dump(mode="json") for o in data.overrides],
+        data.formats,
+    )
+    return CreditReviewRunResponse(
+        review_id=str(review.id),
+        version_id=version_id_str,
+        status=review.status,
+        message=f"Applying {len(data.overrides)} fact override(s)",
+    )
+
+
 @router.get("/credit-reviews/{review_id}", response_model=CreditReviewDetailResponse)
 async def get_credit_review(
     review_id: UUID,
@@ -19,6 +19,67 @@ class Settings(BaseSettings):
         validation_alias=AliasChoices("REDIS_URL", "redis_url"),
     )
 
+    # Celery worker sync DB pool (per worker process; size defaults from worker concurrency)
+    celery_db_pool_size: int | None = Field(
+        default=None,
+        validation_alias=AliasChoices("CELERY_DB_POOL_SIZE", "celery_db_pool_size"),
+    )
+    celery_db_max_overflow: int = Field(
+        default=2,
+        validation_alias=AliasChoices("CELERY_DB_MAX_OVERFLOW", "celery_db_max_overflow"),
+    )
+    celery_db_pool_timeout: int = Field(
+        default=30,
+        validation_alias=AliasChoices("CELERY_DB_POOL_TIMEOUT", "celery_db_pool_timeout"),
+    )
+
+    # Semantic notes search (pgvector HNSW). ef_search trades recall for latency (pgvector default 40).
+    # Every search filters on document_version_id/scope, which HNSW applies after taking ef_search candidates
+    # from the whole table; iterative_scan ("relaxed_order"/"strict_order", pgvector >= 0.8) keeps scanning
+    # until top_k rows pass the filter. "" leaves the server default (off). Both are set once per pooled
+    # connection (app.db.hnsw).
+    notes_hnsw_ef_search: int = Field(
+        default=40,
+        validation_alias=AliasChoices("NOTES_HNSW_EF_SEARCH", "notes_hnsw_ef_search"),
+    )
+    notes_hnsw_iterative_scan: str = Field(
+        default="relaxed_order",
+        validation_alias=AliasChoices("NOTES_HNSW_ITERATIVE_SCAN", "notes_hnsw_iterative_scan"),
+    )
+
+    # Label -> canonical mapping cache (process LRU; optional shared Redis tier)
+    mapping_label_cache_size: int = Field(
+        default=50_000,
+        validation_alias=AliasChoices("MAPPING_LABEL_CACHE_SIZE", "mapping_label_cache_size"),
+    )
+    mapping_label_cache_redis: bool = Field(
+        default=False,
+        validation_alias=AliasChoices("MAPPING_LABEL_CACHE_REDIS", "mapping_label_cache_redis"),
+    )
+
+    # Financial engine: "scalar" (per-period) or "matrix" (vectorised keys x periods; wins from ~20 periods)
+    financial_engine_mode: str = Field(
+        default="scalar",
+        validation_alias=AliasChoices("FINANCIAL_ENGINE_MODE", "financial_engine_mode"),
+    )
+
+    # Monte Carlo covenant-breach simulation in the stress section: draws per company (0 = off)
+    stress_simulation_draws: int = Field(
+        default=0,
+        validation_alias=AliasChoices("STRESS_SIMULATION_DRAWS", "stress_simulation_draws"),
+    )
+
+    # Section engines: unset = run serially unless Monte Carlo stress draws give the pool NumPy work to
+    # overlap (the pure-Python engines are slower threaded); true / false force serial / concurrent
+    section_engines_serial: bool | None = Field(
+        default=None,
+        validation_alias=AliasChoices("SECTION_ENGINES_SERIAL", "section_engines_serial"),
+    )
+    section_engine_workers: int = Field(
+        default=4,
+        validation_alias=AliasChoices("SECTION_ENGINE_WORKERS", "section_engine_workers"),
+    )
+
     # Object storage — STORAGE_* (your .env) or OBJECT_STORAGE_*
     object_storage_url: str = Field(
         default="",
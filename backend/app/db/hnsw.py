@@ -0,0 +1,55 @@
+"""
+pgvector HNSW query settings (hnsw.ef_search, hnsw.iterative_scan) applied once per pooled connection.
+
+Set when the connection is opened rather than before each search, so a notes search stays one round
+trip. The API's async engine and the worker's sync engine both install the listener; non-Postgres
+engines (SQLite in tests) are left alone.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+ITERATIVE_SCAN_MODES = ("off", "relaxed_order", "strict_order")
+
+
+def hnsw_session_settings() -> dict[str, str]:
+    """Session-level values from settings; an empty or unknown iterative_scan leaves the server default."""
+    settings = get_settings()
+    out = {"hnsw.ef_search": str(int(settings.notes_hnsw_ef_search))}
+    mode = settings.notes_hnsw_iterative_scan
+    if mode in ITERATIVE_SCAN_MODES:
+        out["hnsw.iterative_scan"] = mode
+    elif mode:
+        logger.warning("hnsw_iterative_scan_unknown", extra={"event": "hnsw_iterative_scan_unknown", "mode": mode})
+    return out
+
+
+def _apply_hnsw_settings(dbapi_connection: Any, connection_record: Any) -> None:
+    # Autocommit so the SETs are not undone by the pool's rollback-on-return, and a rejected one
+    # (pgvector older than 0.8 has no iterative_scan) cannot abort a transaction
+    autocommit = dbapi_connection.autocommit
+    dbapi_connection.autocommit = True
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in hnsw_session_settings().items():
+            try:
+                cursor.execute(f"SET {name} = '{value}'")
+            except Exception as e:
+                logger.warning("hnsw_setting_rejected", extra={"event": "hnsw_setting_rejected", "setting": name, "error": str(e)})
+    finally:
+        cursor.close()
+        dbapi_connection.autocommit = autocommit
+
+
+def install_hnsw_session_settings(engine: Engine) -> None:
+    """Apply the HNSW settings on every new DBAPI connection of a Postgres engine (sync engine of an async one)."""
+    if engine.dialect.name == "postgresql":
+        event.listen(engine, "connect", _apply_hnsw_settings)
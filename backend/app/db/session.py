@@ -1,6 +1,7 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.config import get_settings
+from app.db.hnsw import install_hnsw_session_settings
 
 Base = declarative_base()
 _settings = get_settings()
@@ -12,6 +13,7 @@ engine = create_async_engine(
     connect_args=_connect_args,
     echo=_settings.environment == "development",
 )
+install_hnsw_session_settings(engine.sync_engine)
 async_session_maker = async_sessionmaker(
     engine,
     class_=AsyncSession,
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, Float
-from sqlalchemy.dialects.postgresql import UUID, JSONB
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Computed, String, Integer, ForeignKey, Float
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 
 from app.db.base_class import BaseModel
 from app.db.session import Base
@@ -84,6 +84,11 @@ class NoteChunk(Base, BaseModel):
     tables_json = Column(JSONB, default=list)
     tokens_approx = Column(Integer, nullable=True)
     keywords_json = Column(JSONB, default=list)
+    # Generated by Postgres (migration 009); never written by the app, deferred so chunk loads skip it
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed("to_tsvector('english', COALESCE(title, '') || ' ' || COALESCE(text, ''))", persisted=True),
+    ))
     document_version = relationship("DocumentVersion", back_populates="note_chunks")
 
 
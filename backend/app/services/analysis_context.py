@@ -0,0 +1,81 @@
+"""
+Shared per-run analysis context for the section engines.
+
+One AnalysisContext is built per analysis run and handed to every section engine, so the views the
+engines used to re-derive each (period ordering, facts grouped by period, the run_engine metric table,
+trend diagnostics) are derived once on first use and then shared. Metric values go through the
+context's memoised MetricEvaluator. `derivations` counts how often each view was actually built, which
+is what a profile of one run should show: one per view.
+"""
+from __future__ import annotations
+
+from collections import Counter
+from datetime import date
+from functools import cached_property
+from typing import Any
+
+from app.services.metric_graph import Facts, MetricEvaluator
+
+
+class AnalysisContext:
+    def __init__(self, facts: Facts, periods: list[date], metrics: MetricEvaluator | None = None) -> None:
+        self.facts = facts
+        self.periods = list(periods)
+        self.metrics = metrics or MetricEvaluator(facts)
+        self.derivations: Counter[str] = Counter()
+        # Per-engine wall time of the last section run over this context (engine_graph.run_engine_graph)
+        self.engine_timings_ms: dict[str, float] = {}
+
+    @classmethod
+    def ensure(
+        cls,
+        facts: Facts,
+        periods: list[date],
+        context: "AnalysisContext | None" = None,
+        metrics: MetricEvaluator | None = None,
+    ) -> "AnalysisContext":
+        """The caller's context, or a fresh one for an engine run on its own (optionally over `metrics`)."""
+        return context if context is not None else cls(facts, periods, metrics)
+
+    @cached_property
+    def periods_sorted(self) -> list[date]:
+        """Periods, latest first."""
+        return sorted(self.periods, reverse=True)
+
+    @property
+    def latest(self) -> date | None:
+        return self.periods_sorted[0] if self.periods_sorted else None
+
+    @cached_property
+    def by_period(self) -> dict[date, dict[str, float]]:
+        """canonical_key -> value per period, built in one pass over the facts."""
+        self.derivations["by_period"] += 1
+        out: dict[date, dict[str, float]] = {p: {} for p in self.periods}
+        for (key, pe), v in self.facts.items():
+            bucket = out.get(pe)
+            if bucket is not None:
+                bucket[key] = v
+        return out
+
+    @cached_property
+    def facts_by_period_iso(self) -> dict[str, dict[str, float]]:
+        return {p.isoformat(): self.by_period[p] for p in self.periods}
+
+    @cached_property
+    def financial(self) -> dict[str, Any]:
+        """run_engine metric table (metric_key -> {period_iso: value}) over the shared evaluator."""
+        from app.services.financial_engine import run_engine
+
+        self.derivations["financial"] += 1
+        return run_engine(self.facts, self.periods, metrics=self.metrics)
+
+    @cached_property
+    def trend(self) -> dict[str, Any]:
+        """run_trend_engine diagnostics (latest vs prior period), shared by business risk and performance."""
+        from app.services.trend_engine import run_trend_engine
+
+        self.derivations["trend"] += 1
+        return run_trend_engine(self.facts, self.periods, self.metrics)
+
+    def fact(self, key: str, period_end: date) -> float | None:
+        return self.facts.get((key, period_end))
@@ -16,12 +16,16 @@ def run_full_analysis(
     mapping_version: str = "",
     company_name: str = "",
     rating_grade_override: str | None = None,
+    metrics: Any = None,
+    serial: bool | None = None,
 ) -> dict[str, Any]:
     """
     Run section-based analysis (8 engines, weighted rating). Outputs section_blocks + aggregation.
 
     rating_grade_override: When set (e.g. from legacy run_rating), overrides the section-based
     aggregate rating. Used when the memo should display the model-driven rating.
+    metrics: optional pre-primed MetricEvaluator over the same facts (portfolio batch runs).
+    serial: run the section engines one by one or concurrently (default: section_orchestrator.section_engines_serial).
     """
     from app.services.section_orchestrator import run_section_based_analysis
 
@@ -32,6 +36,8 @@ def run_full_analysis(
         committed_facilities=committed_facilities,
         company_name=company_name,
         rating_grade_override=rating_grade_override,
+        metrics=metrics,
+        serial=serial,
     )
     out["audit"]["fs_version"] = fs_version
     out["audit"]["mapping_version"] = mapping_version
@@ -3,8 +3,9 @@ from __future__ import annotations
 import re
 from datetime import date
 from typing import Any
-from app.services.financial_engine import get_fact, compute_ebitda
-from app.services.trend_engine import run_trend_engine
+from app.services.analysis_context import AnalysisContext
+from app.services.financial_engine import get_fact
+from app.services.metric_graph import MetricEvaluator
 from app.core.section_schema import score_to_rating
 
 def _extract_segment_info(notes: dict) -> list[str]:
@@ -36,17 +37,17 @@ def _extract_geographic_exposure(notes: dict) -> list[str]:
                     regions.append(r)
     return regions[:8]
 
-def run_business_risk_engine(facts: dict[tuple[str, date], float], periods: list[date], notes_json: dict | None = None) -> dict[str, Any]:
+def run_business_risk_engine(facts: dict[tuple[str, date], float], periods: list[date], notes_json: dict | None = None, metrics: MetricEvaluator | None = None, context: AnalysisContext | None = None) -> dict[str, Any]:
     block: dict[str, Any] = {"section_name": "Business Risk Assessment", "key_metrics": {}, "score": 50.0, "section_rating": "Adequate", "risk_flags": [], "evidence_notes": [], "llm_commentary": ""}
     notes = notes_json or {}
-    trend = run_trend_engine(facts, periods)
-    growth = trend.get("growth_diagnostics") or {}
-    periods_sorted = sorted(periods, reverse=True)
-    latest = periods_sorted[0] if periods_sorted else None
+    ctx = AnalysisContext.ensure(facts, periods, context, metrics)
+    metrics = ctx.metrics
+    growth = ctx.trend.get("growth_diagnostics") or {}
+    latest = ctx.latest
     if not latest:
         return block
     rev = get_fact(facts, "revenue", latest) or 0
-    ebitda = compute_ebitda(facts, latest) or 0
+    ebitda = metrics.value("ebitda", latest) or 0
     margin = 100.0 * ebitda / rev if rev and rev > 0 else None
     rev_growth = growth.get("revenue_growth_pct")
     ebitda_growth = growth.get("ebitda_growth_pct")
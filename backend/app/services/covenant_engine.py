@@ -63,6 +63,7 @@ def run_covenant_engine(
     interest_cover: float | None,
     undrawn_facilities: float | None,
     stress_scenarios: dict | None = None,
+    breakevens: dict | None = None,
 ) -> dict[str, Any]:
     block: dict[str, Any] = {"section_name": "Covenants & Headroom", "key_metrics": {}, "score": 70.0, "section_rating": "Adequate", "risk_flags": [], "evidence_notes": ["Note 48: Going concern", "Note 43.4.3: Covenant terms"], "llm_commentary": ""}
     parsed = _parse_covenants(notes_json or {})
@@ -117,6 +118,10 @@ def run_covenant_engine(
             if stress_breach:
                 break
 
+    # Reverse stress (reverse_stress.reverse_stress): shock at which each covenant breaches
+    if breakevens:
+        block["key_metrics"]["breakevens"] = breakevens
+
     headroom_score = _covenant_risk_score(
         current_breach, stress_breach, lev_headroom_pct, cov_headroom_pct
     )
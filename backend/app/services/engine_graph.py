@@ -0,0 +1,124 @@
+"""
+Small dependency graph runner for the section engines.
+
+Each EngineNode names the nodes it depends on and is called with the results gathered so far
+(name -> result), so a node only sees its dependencies once they have finished. Ready nodes run on a
+shared thread pool; results come back in declaration order whatever order they finish in, so the
+output is deterministic. serial=True runs the nodes one by one in declaration order on the calling
+thread (debugging, profiling, and small batch runs where pool hand-off costs more than it saves).
+
+Threads rather than processes: the engines share one AnalysisContext (facts, memoised metrics) that
+would otherwise be pickled per task, and the heavy parts (stress grid, Monte Carlo draws) are NumPy
+kernels that release the GIL.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from graphlib import TopologicalSorter
+from typing import Any, Callable, Mapping
+
+
+@dataclass(frozen=True)
+class EngineNode:
+    name: str
+    fn: Callable[[Mapping[str, Any]], Any]
+    deps: tuple[str, ...] = ()
+
+
+_executors: dict[int, ThreadPoolExecutor] = {}
+_executor_lock = threading.Lock()
+
+
+def _shared_executor(max_workers: int) -> ThreadPoolExecutor:
+    """
+    Process-wide pool per worker count, created on first use (a pool per analysis run would cost more than
+    the engines). Pools are never shut down: another thread may be mid-graph on any of them.
+    """
+    with _executor_lock:
+        executor = _executors.get(max_workers)
+        if executor is None:
+            executor = _executors[max_workers] = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="section-engine")
+        return executor
+
+
+def _validate(nodes: list[EngineNode]) -> TopologicalSorter:
+    names = [n.name for n in nodes]
+    if len(set(names)) != len(names):
+        raise ValueError("duplicate engine node names")
+    known = set(names)
+    for n in nodes:
+        missing = [d for d in n.deps if d not in known]
+        if missing:
+            raise ValueError(f"engine node {n.name!r} depends on unknown node(s) {missing}")
+    sorter = TopologicalSorter({n.name: n.deps for n in nodes})
+    sorter.prepare()  # raises graphlib.CycleError on cycles
+    return sorter
+
+
+def _serial_order(nodes: list[EngineNode]) -> list[str]:
+    """Declaration order when it already respects dependencies, else a topological order."""
+    seen: set[str] = set()
+    for n in nodes:
+        if not seen.issuperset(n.deps):
+            return list(TopologicalSorter({m.name: m.deps for m in nodes}).static_order())
+        seen.add(n.name)
+    return [n.name for n in nodes]
+
+
+def _timed(node: EngineNode, results: Mapping[str, Any]) -> tuple[Any, float]:
+    t0 = time.perf_counter()
+    out = node.fn(results)
+    return out, (time.perf_counter() - t0) * 1000
+
+
+def run_engine_graph(
+    nodes: list[EngineNode],
+    serial: bool = False,
+    max_workers: int = 4,
+) -> tuple[dict[str, Any], dict[str, float]]:
+    """
+    Run every node once its dependencies are done. Returns (results, timings_ms), both keyed in
+    declaration order. An exception from a node propagates after in-flight nodes finish.
+    """
+    sorter = _validate(nodes)
+    by_name = {n.name: n for n in nodes}
+    results: dict[str, Any] = {}
+    timings: dict[str, float] = {}
+
+    if serial or max_workers <= 1:
+        for name in _serial_order(nodes):
+            results[name], timings[name] = _timed(by_name[name], results)
+        return _ordered(nodes, results, timings)
+
+    executor = _shared_executor(max_workers)
+    pending: dict[Future, str] = {}
+    error: BaseException | None = None
+    while sorter.is_active():
+        if error is None:
+            for name in sorter.get_ready():
+                # Dependencies are complete, so the snapshot holds everything this node may read
+                pending[executor.submit(_timed, by_name[name], dict(results))] = name
+        if not pending:
+            break
+        finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for fut in finished:
+            name = pending.pop(fut)
+            try:
+                results[name], timings[name] = fut.result()
+            except BaseException as e:  # noqa: BLE001 - re-raised once in-flight nodes settle
+                error = error or e
+                continue
+            sorter.done(name)
+    if error is not None:
+        raise error
+    return _ordered(nodes, results, timings)
+
+
+def _ordered(nodes: list[EngineNode], results: dict[str, Any], timings: dict[str, float]) -> tuple[dict[str, Any], dict[str, float]]:
+    return (
+        {n.name: results[n.name] for n in nodes if n.name in results},
+        {n.name: round(timings[n.name], 3) for n in nodes if n.name in timings},
+    )
@@ -0,0 +1,257 @@
+"""
+Incremental re-analysis after a fact or mapping override.
+
+Dependencies are declared the way metric_graph declares metric inputs: canonical fact keys -> metrics
+(metric_graph.fact_inputs), fact keys and metrics -> section engines (SECTION_INPUTS), engines ->
+covenants (engine graph deps), section blocks -> rating aggregation, and section blocks / aggregation /
+facts -> memo sections (MEMO_SECTION_INPUTS). reanalyse takes the previous run_full_analysis output and
+the facts after the override, then re-evaluates only the affected metrics (the rest are primed from the
+previous metric table), re-runs only the engines that read a changed key, and re-aggregates only when a
+block actually changed. The report lists what was recomputed and what changed, down to the memo sections
+to refresh. A change to the period set falls back to a full run.
+"""
+from __future__ import annotations
+
+import time
+from datetime import date
+from typing import Any, Iterable
+
+from app.services.analysis_context import AnalysisContext
+from app.services.metric_graph import REGISTRY, Facts, fact_inputs
+
+# Fact keys and metrics each engine reads (directly or through leverage/liquidity/stress helpers)
+_TREND_INPUTS = (
+    "revenue", "profit_after_tax", "net_cfo", "capex", "depreciation_amortisation", "trade_receivables",
+    "inventories", "trade_payables", "other_receivables", "other_payables", "total_assets", "total_equity",
+    "ebitda", "net_debt_ex_leases", "net_debt_incl_leases",
+)
+_BORROWINGS = ("short_term_borrowings", "current_portion_long_term_debt", "long_term_borrowings")
+SECTION_INPUTS: dict[str, tuple[str, ...]] = {
+    "business_risk": _TREND_INPUTS + ("revenue", "ebitda"),
+    "financial_performance": _TREND_INPUTS + ("revenue", "operating_profit", "profit_after_tax", "net_cfo", "capex", "ebitda"),
+    "liquidity": (
+        "cash_and_cash_equivalents", "trade_receivables", "other_receivables", "inventories", "trade_payables",
+        "short_term_borrowings", "current_portion_long_term_debt", "lease_liabilities_current", "net_cfo",
+        "capex", "revenue",
+    ),
+    "leverage": _BORROWINGS + (
+        "lease_liabilities_current", "lease_liabilities_non_current", "cash_and_cash_equivalents", "total_equity",
+        "total_liabilities", "finance_costs", "interest_paid", "ebitda", "net_debt_ex_leases", "net_debt_incl_leases",
+    ),
+    # _score_accounting_deterministic reads these from every period; the EBITDA argument is unused in scoring
+    "accounting_quality": ("total_assets", "total_equity", "deferred_tax_assets", "goodwill", "ebitda"),
+    "stress": _BORROWINGS + (
+        "revenue", "operating_profit", "depreciation_amortisation", "finance_costs", "cash_and_cash_equivalents",
+        "ebitda", "net_debt_incl_leases",
+    ),
+    "breakevens": _BORROWINGS + ("revenue", "cost_of_sales", "finance_costs", "interest_paid", "ebitda", "net_debt_incl_leases"),
+    "covenants": (),  # reads only other blocks (engine graph deps)
+}
+
+# Commentary of a block that also quotes other blocks (section_commentary._build_leverage_commentary)
+COMMENTARY_INPUTS: dict[str, tuple[str, ...]] = {"leverage": ("leverage", "covenants", "stress")}
+
+# Memo section -> artifacts it is built from (memo_composer.build_sections_from_blocks).
+# Artifacts: section block names, "aggregation", "facts" and "metrics" (the 3-year tables).
+MEMO_SECTION_INPUTS: dict[str, tuple[str, ...]] = {
+    # The recommendation (recommendation_conditions.compute_recommendation) reads metrics, covenants and stress
+    "executive_summary": ("aggregation", "business_risk", "leverage", "metrics", "covenants", "stress"),
+    "business_description": ("business_risk",),
+    "industry_overview": ("business_risk",),
+    "competitive_position": ("business_risk",),
+    "financial_performance": ("financial_performance", "facts", "metrics"),
+    "financial_risk": ("stress",),
+    "cash_flow_liquidity": ("liquidity", "facts", "metrics"),
+    "balance_sheet_leverage": ("leverage", "facts", "metrics"),
+    "liquidity_leverage": ("liquidity", "leverage"),
+    "stress_testing_results": ("stress",),
+    "accounting_disclosure_quality": ("accounting_quality",),
+    "key_risks": ("business_risk", "accounting_quality", "stress"),
+    "covenants_headroom": ("covenants",),
+    "internal_rating_rationale": ("aggregation",),
+    "credit_risk_quantification": ("aggregation", "facts", "metrics"),
+    "recommendation_conditions": ("metrics", "covenants", "stress"),
+    "monitoring_plan": ("covenants", "leverage", "liquidity"),
+}
+
+
+def _fact_keys(inputs: Iterable[str]) -> frozenset[str]:
+    out: set[str] = set()
+    for key in inputs:
+        if key in REGISTRY:
+            out.update(fact_inputs(key))
+        else:
+            out.add(key)
+    return frozenset(out)
+
+
+SECTION_FACT_KEYS: dict[str, frozenset[str]] = {name: _fact_keys(inputs) for name, inputs in SECTION_INPUTS.items()}
+METRICS_BY_FACT: dict[str, tuple[str, ...]] = {
+    key: tuple(m for m in REGISTRY if key in fact_inputs(m))
+    for key in {k for m in REGISTRY for k in fact_inputs(m)}
+}
+
+
+def diff_facts(previous_by_period: dict[str, dict[str, float]], facts: Facts, periods: list[date]) -> set[tuple[str, date]]:
+    """(key, period) pairs whose value differs between a previous facts_by_period and new facts, over periods."""
+    changed: set[tuple[str, date]] = set()
+    wanted = set(periods)
+    new_by_period: dict[date, dict[str, float]] = {p: {} for p in periods}
+    for (key, pe), v in facts.items():
+        if pe in wanted:
+            new_by_period[pe][key] = v
+    for pe in periods:
+        old = previous_by_period.get(pe.isoformat()) or {}
+        new = new_by_period[pe]
+        changed.update((k, pe) for k in old.keys() | new.keys() if old.get(k) != new.get(k))
+    return changed
+
+
+def affected_metrics(changed: Iterable[tuple[str, date]]) -> set[tuple[str, date]]:
+    return {(m, pe) for key, pe in changed for m in METRICS_BY_FACT.get(key, ())}
+
+
+def affected_sections(changed_keys: Iterable[str]) -> set[str]:
+    """Engines that read a changed key, plus covenants when any of its input blocks is re-run."""
+    keys = set(changed_keys)
+    sections = {name for name, inputs in SECTION_FACT_KEYS.items() if inputs & keys}
+    if sections & {"leverage", "liquidity", "stress", "breakevens"}:
+        sections.add("covenants")
+    return sections
+
+
+def affected_memo_sections(changed_artifacts: Iterable[str]) -> list[str]:
+    artifacts = set(changed_artifacts)
+    return [name for name, inputs in MEMO_SECTION_INPUTS.items() if artifacts.intersection(inputs)]
+
+
+def reanalyse(
+    previous: dict[str, Any],
+    facts: Facts,
+    periods: list[date],
+    notes_json: dict | None = None,
+    committed_facilities: dict[str, float] | None = None,
+    company_name: str = "",
+    rating_grade_override: str | None = None,
+    changed: set[tuple[str, date]] | None = None,
+    serial: bool | None = None,
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    """
+    Re-run the analysis for facts that differ from those behind `previous` (a run_full_analysis output).
+    changed: (key, period) pairs known to differ; diffed from previous["facts_by_period"] when omitted.
+    Returns (analysis_output, report); analysis_output equals a full run_full_analysis over the new facts.
+    """
+    from app.config import get_settings
+    from app.services.analysis_orchestrator import run_full_analysis
+    from app.services.engine_graph import EngineNode, run_engine_graph
+    from app.services.section_commentary import add_section_commentary
+    from app.services.section_orchestrator import aggregate_sections, section_engine_nodes, section_engines_serial
+
+    t0 = time.perf_counter()
+    audit = previous.get("audit") or {}
+    grade_before = (previous.get("aggregation") or {}).get("rating_grade")
+    if audit.get("periods") != [p.isoformat() for p in periods]:
+        out = run_full_analysis(
+            facts, periods, notes_json, committed_facilities, audit.get("fs_version", ""),
+            audit.get("mapping_version", ""), company_name, rating_grade_override, serial=serial,
+        )
+        report = {"full": True, "reason": "period set changed", "rating_grade": {"before": grade_before, "after": out["aggregation"].get("rating_grade")}}
+        report["elapsed_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        return out, report
+
+    if changed is None:
+        changed = diff_facts(previous.get("facts_by_period") or {}, facts, periods)
+    changed_keys = {k for k, _ in changed}
+    stale = affected_metrics(changed)
+
+    # Prime every unaffected (metric, period) from the previous metric table; absent entries were None
+    ctx = AnalysisContext(facts, periods)
+    prev_financial = previous.get("financial") or {}
+    ctx.metrics.prime({
+        (m, pe): (prev_financial.get(m) or {}).get(pe.isoformat())
+        for m in REGISTRY for pe in periods if (m, pe) not in stale
+    })
+    financial = ctx.financial
+    metrics_changed = sorted(
+        f"{m}@{pe.isoformat()}" for m, pe in stale
+        if (financial.get(m) or {}).get(pe.isoformat()) != (prev_financial.get(m) or {}).get(pe.isoformat())
+    )
+
+    prev_blocks = previous.get("section_blocks") or {}
+    rerun = affected_sections(changed_keys)
+    prior: dict[str, Any] = dict(prev_blocks)
+    prior["breakevens"] = (prev_blocks.get("covenants", {}).get("key_metrics") or {}).get("breakevens") or {}
+    nodes = [
+        EngineNode(n.name, lambda done, fn=n.fn: fn({**prior, **done}), tuple(d for d in n.deps if d in rerun))
+        for n in section_engine_nodes(ctx, notes_json, committed_facilities)
+        if n.name in rerun
+    ]
+    settings = get_settings()
+    results, timings = run_engine_graph(
+        nodes,
+        serial=section_engines_serial(serial),
+        max_workers=settings.section_engine_workers,
+    )
+    ctx.engine_timings_ms = timings
+    results.pop("breakevens", None)
+
+    # Shallow copies: commentary writes llm_commentary in place and `previous` must stay untouched
+    section_blocks = {name: results[name] if name in results else dict(block) for name, block in prev_blocks.items()}
+    needs_commentary = {name for name in section_blocks if rerun.intersection(COMMENTARY_INPUTS.get(name, (name,)))}
+    if needs_commentary:
+        touched = needs_commentary | ({"stress", "covenants"} & section_blocks.keys())
+        add_section_commentary({name: section_blocks[name] for name in touched}, {}, company_name)
+    sections_changed = [name for name in section_blocks if section_blocks[name] != prev_blocks.get(name)]
+
+    prev_agg = previous.get("aggregation") or {}
+    if sections_changed:
+        aggregation = aggregate_sections(section_blocks, notes_json, rating_grade_override)
+    else:
+        aggregation = dict(prev_agg, section_blocks=section_blocks)
+        if rating_grade_override:
+            aggregation["rating_grade"] = rating_grade_override
+    aggregation_changed = any(aggregation.get(k) != prev_agg.get(k) for k in aggregation.keys() - {"section_blocks"})
+
+    artifacts = set(sections_changed)
+    if aggregation_changed:
+        artifacts.add("aggregation")
+    if changed:
+        artifacts.add("facts")
+    if metrics_changed:
+        artifacts.add("metrics")
+    out = {
+        "audit": {**audit, "periods": [p.isoformat() for p in periods]},
+        "section_blocks": section_blocks,
+        "aggregation": aggregation,
+        "financial": financial,
+        "facts_by_period": ctx.facts_by_period_iso,
+        "rating": {"rating_grade": aggregation.get("rating_grade")},
+    }
+    report = {
+        "full": False,
+        "changed_facts": sorted(f"{k}@{pe.isoformat()}" for k, pe in changed),
+        "metrics_recomputed": ctx.metrics.evaluations,
+        "metrics_changed": metrics_changed,
+        "sections_recomputed": [name for name in (*prev_blocks, "breakevens") if name in rerun],
+        "sections_changed": sections_changed,
+        "aggregation_changed": aggregation_changed,
+        "rating_grade": {"before": grade_before, "after": aggregation.get("rating_grade")},
+        "memo_sections": affected_memo_sections(artifacts),
+        "engine_timings_ms": timings,
+        "elapsed_ms": round((time.perf_counter() - t0) * 1000, 1),
+    }
+    return out, report
+
+
+def refresh_memo_sections(previous_sections: dict[str, str], memo_sections: Iterable[str], **build_kwargs: Any) -> dict[str, str]:
+    """
+    Rebuild only the listed memo sections (memo_composer.build_all_sections kwargs); every other section keeps
+    its previous text, including any LLM-polished narrative, and the LLM is asked only for the listed ones.
+    """
+    from app.services.memo_composer import build_all_sections
+
+    wanted = list(memo_sections)
+    if not wanted:
+        return dict(previous_sections)
+    fresh = build_all_sections(**build_kwargs, target_sections=wanted)
+    return {**previous_sections, **{k: fresh[k] for k in wanted if k in fresh}}
@@ -0,0 +1,166 @@
+"""
+Memoised raw-label -> canonical mapping shared across runs.
+
+Labels such as "Revenue" or "Trade and other payables" recur in every period column of every sheet
+of every document. Results of the compiled matcher are kept in a bounded process-wide LRU keyed by the
+normalised label, with an optional Redis tier (MAPPING_LABEL_CACHE_REDIS) so other workers share them.
+Keys are namespaced by MAPPING_RULES_VERSION: bumping the version orphans old entries.
+
+map_labels_cached resolves a batch (one Redis MGET for local misses) and returns per-call hit stats.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable
+
+from app.config import get_settings
+from app.core.versions import MAPPING_RULES_VERSION
+from app.services.label_matcher import normalize_label
+
+MappingResult = tuple[str | None, str, bool]
+
+CACHE_PREFIX = "label_map:"
+TTL_SECONDS = 86400 * 30
+
+
+class LabelMappingCache:
+    """Thread-safe LRU of (namespace, normalised label) -> (canonical_key, method, is_expense)."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._data: "OrderedDict[tuple[str, str], MappingResult]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, normalized: str) -> MappingResult | None:
+        key = (namespace, normalized)
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, namespace: str, normalized: str, value: MappingResult) -> None:
+        key = (namespace, normalized)
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_cache: LabelMappingCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_label_cache() -> LabelMappingCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LabelMappingCache(get_settings().mapping_label_cache_size)
+    return _cache
+
+
+def _redis_key(namespace: str, normalized: str) -> str:
+    digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+    return f"{CACHE_PREFIX}{namespace}:{digest}"
+
+
+def _redis_mget(namespace: str, labels: list[str]) -> dict[str, MappingResult]:
+    if not labels or not get_settings().mapping_label_cache_redis:
+        return {}
+    try:
+        import redis
+        r = redis.from_url(get_settings().redis_url)
+        raw = r.mget([_redis_key(namespace, n) for n in labels])
+        out: dict[str, MappingResult] = {}
+        for normalized, value in zip(labels, raw):
+            if value is not None:
+                key, method, is_exp = json.loads(value)
+                out[normalized] = (key, method, bool(is_exp))
+        return out
+    except Exception:
+        return {}
+
+
+def _redis_mset(namespace: str, results: dict[str, MappingResult]) -> None:
+    if not results or not get_settings().mapping_label_cache_redis:
+        return
+    try:
+        import redis
+        r = redis.from_url(get_settings().redis_url)
+        pipe = r.pipeline(transaction=False)
+        for normalized, value in results.items():
+            pipe.setex(_redis_key(namespace, normalized), TTL_SECONDS, json.dumps(list(value)))
+        pipe.execute()
+    except Exception:
+        pass
+
+
+def map_labels_cached(
+    raw_labels: Iterable[str],
+    match: Callable[[str], MappingResult] | None = None,
+    namespace: str | None = None,
+) -> tuple[dict[str, MappingResult], dict[str, float]]:
+    """
+    Map a batch of raw labels through LRU -> Redis -> matcher.
+    Returns ({raw_label: (canonical_key, method, is_expense)}, stats) where stats counts lookups (rows),
+    unique normalised labels, lru_hits, redis_hits, computed and hit_rate over unique labels.
+    """
+    if match is None:
+        from app.services.mapping_rules import map_raw_label as match
+    namespace = namespace or MAPPING_RULES_VERSION
+    cache = get_label_cache()
+
+    lookups = 0
+    raw_to_norm: dict[str, str] = {}
+    for raw in raw_labels:
+        lookups += 1
+        if raw not in raw_to_norm:
+            raw_to_norm[raw] = normalize_label(raw)
+
+    resolved: dict[str, MappingResult] = {}
+    misses: list[str] = []
+    for normalized in dict.fromkeys(raw_to_norm.values()):
+        hit = cache.get(namespace, normalized)
+        if hit is not None:
+            resolved[normalized] = hit
+        else:
+            misses.append(normalized)
+    lru_hits = len(resolved)
+
+    shared = _redis_mget(namespace, misses)
+    for normalized, value in shared.items():
+        cache.put(namespace, normalized, value)
+    resolved.update(shared)
+
+    computed: dict[str, MappingResult] = {}
+    for normalized in misses:
+        if normalized in shared:
+            continue
+        value = match(normalized)
+        computed[normalized] = value
+        cache.put(namespace, normalized, value)
+    resolved.update(computed)
+    _redis_mset(namespace, computed)
+
+    unique = len(resolved)
+    stats = {
+        "lookups": lookups,
+        "unique_labels": unique,
+        "lru_hits": lru_hits,
+        "redis_hits": len(shared),
+        "computed": len(computed),
+        "hit_rate": round((lru_hits + len(shared)) / unique, 4) if unique else 0.0,
+    }
+    return {raw: resolved[norm] for raw, norm in raw_to_norm.items()}, stats
@@ -0,0 +1,113 @@
+"""
+Compiled label matcher for mapping Pass A (synonyms) and Pass B (regex patterns).
+
+Built once from the ordered rule lists; matching semantics are identical to the original loops:
+- Pass A: the first synonym in list order (rule order, then synonym order) that equals the label,
+  starts it (syn + " ") or ends it (" " + syn) wins. Every synonym carries its list position as a
+  priority; word-level tries over the label's tokens (forward for exact/prefix, reversed for suffix)
+  collect all matching synonyms in O(tokens) and the lowest priority wins.
+- Pass B: the first pattern in list order that re.search-matches anywhere wins. Patterns are compiled
+  once and tried in order. (A single named-group alternation was measured ~1.7x slower than the
+  individual searches under CPython's backtracking engine, which loses the per-pattern literal-prefix
+  scan, and it reports the leftmost match rather than the highest-priority one.)
+"""
+from __future__ import annotations
+
+import re
+from typing import Sequence
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_label(label: str) -> str:
+    return _WS_RE.sub(" ", (label or "").lower().strip())
+
+
+class _TrieNode:
+    __slots__ = ("children", "priority")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _TrieNode] = {}
+        self.priority: int | None = None
+
+
+def _trie_insert(root: _TrieNode, tokens: list[str], priority: int) -> None:
+    node = root
+    for tok in tokens:
+        node = node.children.setdefault(tok, _TrieNode())
+    if node.priority is None or priority < node.priority:
+        node.priority = priority
+
+
+def _trie_best(root: _TrieNode, tokens: Sequence[str]) -> int | None:
+    """Lowest priority among synonyms that are a token-prefix of ``tokens`` (including all of it)."""
+    best: int | None = None
+    node = root
+    for tok in tokens:
+        node = node.children.get(tok)
+        if node is None:
+            break
+        if node.priority is not None and (best is None or node.priority < best):
+            best = node.priority
+    return best
+
+
+class CompiledLabelMatcher:
+    """
+    Immutable matcher over (synonyms, canonical_key, is_expense) rules and (pattern, canonical_key,
+    is_expense) regexes. ``match`` returns (canonical_key, method, is_expense) like map_raw_label.
+    """
+
+    def __init__(
+        self,
+        synonym_rules: Sequence[tuple[Sequence[str], str, bool]],
+        regex_rules: Sequence[tuple[str, str, bool]],
+    ) -> None:
+        self._targets: list[tuple[str, bool]] = []
+        self._exact: dict[str, int] = {}
+        self._forward = _TrieNode()
+        self._backward = _TrieNode()
+        for synonyms, canonical_key, is_expense in synonym_rules:
+            for syn in synonyms:
+                priority = len(self._targets)
+                self._targets.append((canonical_key, is_expense))
+                self._exact.setdefault(syn, priority)
+                # Label "a b c" starts with syn + " " iff syn's tokens are a proper token-prefix
+                # (labels are normalised: single spaces, stripped); likewise for suffixes.
+                tokens = syn.split(" ")
+                _trie_insert(self._forward, tokens, priority)
+                _trie_insert(self._backward, tokens[::-1], priority)
+
+        self._regexes: list[tuple[re.Pattern, str, bool]] = [
+            (re.compile(pattern), canonical_key, is_expense) for pattern, canonical_key, is_expense in regex_rules
+        ]
+
+    def pass_a(self, normalized: str) -> tuple[str | None, bool]:
+        best = self._exact.get(normalized)
+        tokens = normalized.split(" ")
+        fwd = _trie_best(self._forward, tokens)
+        if fwd is not None and (best is None or fwd < best):
+            best = fwd
+        bwd = _trie_best(self._backward, tokens[::-1])
+        if bwd is not None and (best is None or bwd < best):
+            best = bwd
+        if best is None:
+            return None, False
+        return self._targets[best]
+
+    def pass_b(self, normalized: str) -> tuple[str | None, bool]:
+        for regex, canonical_key, is_expense in self._regexes:
+            if regex.search(normalized):
+                return canonical_key, is_expense
+        return None, False
+
+    def match(self, raw_label: str) -> tuple[str | None, str, bool]:
+        normalized = normalize_label(raw_label)
+        key, is_exp = self.pass_a(normalized)
+        if key:
+            return key, "RULE", is_exp
+        key, is_exp = self.pass_b(normalized)
+        if key:
+            return key, "REGEX", is_exp
+        return None, "UNMAPPED", False
+
@@ -0,0 +1,396 @@
+"""
+Character n-gram TF-IDF similarity index for unmapped-label suggestions.
+
+Entries are (label, canonical_key, source) drawn from the built-in synonyms, canonical key names,
+historical MappingDecision rows and tenant MappingRule patterns. Labels are normalised and split into
+padded character 3- and 4-grams; documents are TF-IDF weighted (sublinear tf, smooth idf) and L2
+normalised, so a query scores each entry by cosine similarity in [0, 1].
+
+The index is append-only: add() only records n-gram counts; term-major postings are compiled lazily
+(vectorised) on the next query, and new entries only recompile a small delta segment. Queries gather
+postings for the query's n-grams and accumulate with np.bincount; candidates are collapsed to the best
+entry per canonical key.
+
+Per-tenant indexes are cached with a fingerprint of the tenant's decisions and rules (count +
+max(updated_at)); rows written since the last refresh are appended, anything else rebuilds.
+"""
+from __future__ import annotations
+
+import math
+import threading
+from datetime import datetime
+from typing import Any, Iterable, Sequence
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.mapping import MappingDecision
+from app.models.mapping_rule import MappingRule
+from app.services.label_matcher import normalize_label
+
+NGRAM_SIZES = (3, 4)
+SOURCE_SYNONYM = "synonym"
+SOURCE_CANONICAL = "canonical"
+SOURCE_DECISION = "decision"
+SOURCE_TENANT_RULE = "tenant_rule"
+
+IndexEntry = tuple[str, str, str]
+
+
+def char_ngrams(label: str) -> dict[str, int]:
+    """Counts of padded character n-grams of the normalised label."""
+    text = f" {normalize_label(label)} "
+    counts: dict[str, int] = {}
+    for n in NGRAM_SIZES:
+        for i in range(len(text) - n + 1):
+            gram = text[i:i + n]
+            counts[gram] = counts.get(gram, 0) + 1
+    return counts
+
+
+class _Postings:
+    """Term-major CSR postings for a contiguous range of entries."""
+
+    __slots__ = ("term_ptr", "doc_ids", "weights", "first_doc", "n_docs")
+
+    def __init__(self, docs: np.ndarray, terms: np.ndarray, tf: np.ndarray, idf: np.ndarray, first_doc: int, n_docs: int):
+        weights = (1.0 + np.log(tf)) * idf[terms]
+        local = docs - first_doc
+        norms = np.sqrt(np.bincount(local, weights=weights * weights, minlength=n_docs))
+        weights = weights / norms[local]
+        order = np.argsort(terms, kind="stable")
+        self.term_ptr = np.zeros(len(idf) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=len(idf)), out=self.term_ptr[1:])
+        self.doc_ids = local[order]
+        self.weights = weights[order]
+        self.first_doc = first_doc
+        self.n_docs = n_docs
+
+    def scores(self, terms: np.ndarray, q: np.ndarray) -> np.ndarray:
+        known = terms < len(self.term_ptr) - 1
+        terms, q = terms[known], q[known]
+        # Concatenate the postings ranges of the query's terms and accumulate per entry
+        starts = self.term_ptr[terms]
+        lengths = self.term_ptr[terms + 1] - starts
+        idx = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        return np.bincount(self.doc_ids[idx], weights=self.weights[idx] * np.repeat(q, lengths), minlength=self.n_docs)
+
+
+class LabelSimilarityIndex:
+    """
+    Append-only TF-IDF index over (label, canonical_key, source) entries.
+
+    Postings live in a main segment (idf fixed when it was compiled) plus a delta segment holding entries
+    added since, weighted with the main segment's idf (n-grams it has never seen get the df=0 idf). Adding
+    entries only recompiles the delta; the main segment is rebuilt once the delta outgrows
+    REBUILD_FRACTION of it, which refreshes idf.
+    """
+
+    REBUILD_FRACTION = 0.1
+    REBUILD_MIN = 64
+
+    def __init__(self, entries: Iterable[IndexEntry] = ()) -> None:
+        self._vocab: dict[str, int] = {}
+        self._df: list[int] = []
+        self._labels: list[str] = []
+        self._keys: list[str] = []
+        self._sources: list[str] = []
+        self._seen: set[tuple[str, str]] = set()
+        # COO triplets of raw n-gram counts, appended in entry order
+        self._coo_doc: list[int] = []
+        self._coo_term: list[int] = []
+        self._coo_tf: list[int] = []
+        self._main: _Postings | None = None
+        self._main_idf = np.zeros(0)
+        self._main_coo = 0
+        self._delta: _Postings | None = None
+        self._lock = threading.Lock()
+        self.add(entries)
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def add(self, entries: Iterable[IndexEntry]) -> int:
+        """Append entries; duplicates of (normalised label, canonical_key) are skipped. Returns count added."""
+        added = 0
+        with self._lock:
+            for label, canonical_key, source in entries:
+                normalized = normalize_label(label)
+                if not normalized or not canonical_key or (normalized, canonical_key) in self._seen:
+                    continue
+                self._seen.add((normalized, canonical_key))
+                doc = len(self._labels)
+                self._labels.append(label)
+                self._keys.append(canonical_key)
+                self._sources.append(source)
+                for gram, tf in char_ngrams(normalized).items():
+                    term = self._vocab.get(gram)
+                    if term is None:
+                        term = self._vocab[gram] = len(self._df)
+                        self._df.append(0)
+                    self._df[term] += 1
+                    self._coo_doc.append(doc)
+                    self._coo_term.append(term)
+                    self._coo_tf.append(tf)
+                added += 1
+            if added:
+                self._delta = None
+        return added
+
+    def _coo(self, lo: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return (
+            np.asarray(self._coo_doc[lo:], dtype=np.int64),
+            np.asarray(self._coo_term[lo:], dtype=np.int64),
+            np.asarray(self._coo_tf[lo:], dtype=np.float64),
+        )
+
+    def _term_idf(self, n_terms: int) -> np.ndarray:
+        """Main-segment idf, extended with the unseen-term idf for n-grams first seen after it."""
+        n_main = self._main.n_docs if self._main is not None else 0
+        unseen = math.log(1.0 + n_main) + 1.0
+        return np.concatenate([self._main_idf, np.full(n_terms - len(self._main_idf), unseen)])
+
+    def _segments(self) -> tuple[_Postings, _Postings | None, np.ndarray]:
+        with self._lock:
+            n_docs, n_terms = len(self._labels), len(self._df)
+            n_main = self._main.n_docs if self._main is not None else 0
+            if self._main is None or n_docs - n_main > max(self.REBUILD_MIN, self.REBUILD_FRACTION * n_main):
+                self._main_idf = np.log((1.0 + n_docs) / (1.0 + np.asarray(self._df, dtype=np.float64))) + 1.0
+                self._main = _Postings(*self._coo(0), self._main_idf, 0, n_docs)
+                self._main_coo = len(self._coo_doc)
+                self._delta = None
+            elif self._delta is None and n_docs > n_main:
+                self._delta = _Postings(*self._coo(self._main_coo), self._term_idf(n_terms), n_main, n_docs - n_main)
+            idf = self._term_idf(n_terms)
+            return self._main, self._delta, idf
+
+    def _query_vector(self, label: str, idf: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Known term ids and their weights, L2-normalised over all query n-grams (unseen ones included)."""
+        unseen_idf = math.log(1.0 + (self._main.n_docs if self._main is not None else 0)) + 1.0
+        terms: list[int] = []
+        weights: list[float] = []
+        norm_sq = 0.0
+        for gram, tf in char_ngrams(label).items():
+            term = self._vocab.get(gram)
+            if term is not None and term < len(idf):
+                w = (1.0 + math.log(tf)) * float(idf[term])
+                terms.append(term)
+                weights.append(w)
+            else:
+                w = (1.0 + math.log(tf)) * unseen_idf
+            norm_sq += w * w
+        norm = math.sqrt(norm_sq) or 1.0
+        return np.asarray(terms, dtype=np.int64), np.asarray(weights, dtype=np.float64) / norm
+
+    def search_many(self, labels: Sequence[str], k: int = 5) -> list[list[dict[str, Any]]]:
+        """
+        Top-k canonical keys per label: [{canonical_key, score, matched_label, source}, ...], best first.
+        Each key is scored by its most similar entry; ties break by entry insertion order.
+        """
+        if not self._labels:
+            return [[] for _ in labels]
+        main, delta, idf = self._segments()
+        results: list[list[dict[str, Any]]] = []
+        for label in labels:
+            terms, q = self._query_vector(label, idf)
+            if not len(terms):
+                results.append([])
+                continue
+            scores = main.scores(terms, q)
+            if delta is not None:
+                scores = np.concatenate([scores, delta.scores(terms, q)])
+            results.append(self._top_keys(scores, k))
+        return results
+
+    def _top_keys(self, scores: np.ndarray, k: int) -> list[dict[str, Any]]:
+        keys, entry_labels, sources = self._keys, self._labels, self._sources
+        hits = np.flatnonzero(scores > 0)
+        # Rank a small head first (argpartition); widen to every hit only if it holds < k distinct keys
+        head = min(len(hits), max(k * 8, 32))
+        while True:
+            if head < len(hits):
+                part = hits[np.argpartition(-scores[hits], head - 1)[:head]]
+                cutoff = scores[part].min()
+                part = hits[scores[hits] >= cutoff]
+            else:
+                part = hits
+            ranked = part[np.lexsort((part, -scores[part]))]
+            out: list[dict[str, Any]] = []
+            taken: set[str] = set()
+            for doc in ranked:
+                key = keys[doc]
+                if key in taken:
+                    continue
+                taken.add(key)
+                out.append({
+                    "canonical_key": key,
+                    "score": round(min(float(scores[doc]), 1.0), 4),
+                    "matched_label": entry_labels[doc],
+                    "source": sources[doc],
+                })
+                if len(out) >= k:
+                    break
+            if len(out) >= k or len(part) == len(hits):
+                return out
+            head = len(hits)
+
+    def search(self, label: str, k: int = 5) -> list[dict[str, Any]]:
+        return self.search_many([label], k)[0]
+
+
+def base_entries() -> list[IndexEntry]:
+    """Built-in synonyms plus the canonical key names themselves."""
+    from app.core.canonical_keys import CANONICAL_KEYS
+    from app.services.mapping_rules import RAW_TO_CANONICAL
+
+    entries: list[IndexEntry] = [(k.replace("_", " "), k, SOURCE_CANONICAL) for k in CANONICAL_KEYS]
+    for synonyms, canonical_key, _ in RAW_TO_CANONICAL:
+        entries.extend((syn, canonical_key, SOURCE_SYNONYM) for syn in synonyms)
+    return entries
+
+
+_default_index: LabelSimilarityIndex | None = None
+
+
+def get_default_index() -> LabelSimilarityIndex:
+    """Process-wide index over base_entries() only (no tenant data)."""
+    global _default_index
+    if _default_index is None:
+        _default_index = LabelSimilarityIndex(base_entries())
+    return _default_index
+
+
+# --- per-tenant indexes -------------------------------------------------------------------------
+
+class _TenantIndex:
+    __slots__ = ("index", "fingerprint", "watermark")
+
+    def __init__(self, index: LabelSimilarityIndex, fingerprint: tuple, watermark: datetime | None) -> None:
+        self.index = index
+        self.fingerprint = fingerprint
+        self.watermark = watermark
+
+
+_lock = threading.Lock()
+_tenant_indexes: dict[str, _TenantIndex] = {}
+
+
+def _fingerprint_stmts(tenant_id: str):
+    return (
+        select(func.count(MappingDecision.id), func.max(MappingDecision.updated_at)).where(
+            MappingDecision.tenant_id == tenant_id
+        ),
+        select(func.count(MappingRule.id), func.max(MappingRule.updated_at)).where(MappingRule.tenant_id == tenant_id),
+    )
+
+
+def _rows_stmts(tenant_id: str, since: datetime | None):
+    decisions = select(
+        MappingDecision.raw_label, MappingDecision.canonical_key, MappingDecision.created_at, MappingDecision.updated_at
+    ).where(MappingDecision.tenant_id == tenant_id)
+    rules = select(MappingRule.pattern, MappingRule.canonical_key, MappingRule.created_at, MappingRule.updated_at).where(
+        MappingRule.tenant_id == tenant_id
+    )
+    if since is not None:
+        decisions = decisions.where(MappingDecision.updated_at > since)
+        rules = rules.where(MappingRule.updated_at > since)
+    return decisions.order_by(MappingDecision.created_at), rules.order_by(MappingRule.created_at)
+
+
+def _watermark(fingerprint: tuple) -> datetime | None:
+    stamps = [fingerprint[1], fingerprint[3]]
+    stamps = [s for s in stamps if s is not None]
+    return max(stamps) if stamps else None
+
+
+def _refresh(
+    tenant_id: str, fingerprint: tuple, decisions: list | None, rules: list | None, full: bool
+) -> LabelSimilarityIndex:
+    entries = [(r[0], r[1], SOURCE_DECISION) for r in decisions or []]
+    entries += [(r[0], r[1], SOURCE_TENANT_RULE) for r in rules or []]
+    with _lock:
+        cached = _tenant_indexes.get(tenant_id)
+        if full or cached is None:
+            index = LabelSimilarityIndex(base_entries())
+        else:
+            index = cached.index
+        index.add(entries)
+        _tenant_indexes[tenant_id] = _TenantIndex(index, fingerprint, _watermark(fingerprint))
+    return index
+
+
+def _plan(tenant_id: str, fingerprint: tuple) -> tuple[LabelSimilarityIndex | None, datetime | None]:
+    """(index, None) when current; (None, since) for an incremental fetch; (None, None) to rebuild."""
+    with _lock:
+        cached = _tenant_indexes.get(tenant_id)
+    if cached is None:
+        return None, None
+    if cached.fingerprint == fingerprint:
+        return cached.index, None
+    grew = fingerprint[0] >= cached.fingerprint[0] and fingerprint[2] >= cached.fingerprint[2]
+    return None, (cached.watermark if grew and cached.watermark is not None else None)
+
+
+def _is_append_only(tenant_id: str, fingerprint: tuple, since: datetime, decisions: list, rules: list) -> bool:
+    """Rows newer than the watermark must all be inserts that account exactly for the count growth."""
+    with _lock:
+        cached = _tenant_indexes[tenant_id]
+    new_d = [r for r in decisions if r[2] is not None and r[2] > since]
+    new_r = [r for r in rules if r[2] is not None and r[2] > since]
+    return (
+        len(new_d) == len(decisions) and len(new_r) == len(rules)
+        and fingerprint[0] - cached.fingerprint[0] == len(new_d)
+        and fingerprint[2] - cached.fingerprint[2] == len(new_r)
+    )
+
+
+def get_suggestion_index(db: Session, tenant_id: str) -> LabelSimilarityIndex:
+    """Tenant index (base entries + decisions + rules), appended to or rebuilt when the tenant's rows change."""
+    tenant_id = str(tenant_id)
+    d_stmt, r_stmt = _fingerprint_stmts(tenant_id)
+    fingerprint = (*db.execute(d_stmt).one(), *db.execute(r_stmt).one())
+    index, since = _plan(tenant_id, fingerprint)
+    if index is not None:
+        return index
+    d_rows, r_rows = _rows_stmts(tenant_id, since)
+    decisions = db.execute(d_rows).all()
+    rules = db.execute(r_rows).all()
+    if since is not None and not _is_append_only(tenant_id, fingerprint, since, decisions, rules):
+        d_rows, r_rows = _rows_stmts(tenant_id, None)
+        decisions, rules, since = db.execute(d_rows).all(), db.execute(r_rows).all(), None
+    return _refresh(tenant_id, fingerprint, decisions, rules, full=since is None)
+
+
+async def get_suggestion_index_async(db: AsyncSession, tenant_id: str) -> LabelSimilarityIndex:
+    """Async twin of get_suggestion_index."""
+    tenant_id = str(tenant_id)
+    d_stmt, r_stmt = _fingerprint_stmts(tenant_id)
+    fingerprint = (*(await db.execute(d_stmt)).one(), *(await db.execute(r_stmt)).one())
+    index, since = _plan(tenant_id, fingerprint)
+    if index is not None:
+        return index
+    d_rows, r_rows = _rows_stmts(tenant_id, since)
+    decisions = (await db.execute(d_rows)).all()
+    rules = (await db.execute(r_rows)).all()
+    if since is not None and not _is_append_only(tenant_id, fingerprint, since, decisions, rules):
+        d_rows, r_rows = _rows_stmts(tenant_id, None)
+        decisions, rules, since = (await db.execute(d_rows)).all(), (await db.execute(r_rows)).all(), None
+    return _refresh(tenant_id, fingerprint, decisions, rules, full=since is None)
+
+
+def record_label(tenant_id: str, raw_label: str, canonical_key: str, source: str = SOURCE_DECISION) -> None:
+    """
+    Append an approved label to this process's cached tenant index right away. The cached fingerprint is
+    left as is, so the next get_suggestion_index still sees the new row (re-adding it is a no-op).
+    """
+    with _lock:
+        cached = _tenant_indexes.get(str(tenant_id))
+    if cached is not None:
+        cached.index.add([(raw_label, canonical_key, source)])
+
+
+def clear_suggestion_indexes() -> None:
+    with _lock:
+        _tenant_indexes.clear()
@@ -7,26 +7,29 @@ from __future__ import annotations
 from datetime import date
 from typing import Any
 
-from app.services.financial_engine import (
-    get_fact,
-    compute_ebitda,
-    compute_net_debt_ex_leases,
-    compute_net_debt_incl_leases,
-)
+from app.services.financial_engine import get_fact
+from app.services.metric_graph import MetricEvaluator
+
+
+def cash_interest_expense(facts: dict[tuple[str, date], float], pe: date) -> float:
+    """Positive interest expense for covenant cover: interest paid, else finance costs; 0 for net income."""
+    finance_costs = get_fact(facts, "finance_costs", pe)
+    interest_paid = get_fact(facts, "interest_paid", pe) or finance_costs
+    return abs(interest_paid) if interest_paid and interest_paid < 0 else (abs(finance_costs) if finance_costs and finance_costs < 0 else 0)
 
 
 def run_leverage_engine(
     facts: dict[tuple[str, date], float],
     periods: list[date],
+    metrics: MetricEvaluator | None = None,
 ) -> dict[str, Any]:
     """Compute leverage metrics including lease-adjusted ratios."""
+    metrics = metrics or MetricEvaluator(facts)
     results: dict[str, Any] = {"by_period": {}}
 
     for pe in sorted(periods, reverse=True):
         pe_iso = pe.isoformat()
-        ebitda = compute_ebitda(facts, pe)
-        finance_costs = get_fact(facts, "finance_costs", pe)
-        interest_paid = get_fact(facts, "interest_paid", pe) or finance_costs
+        ebitda = metrics.value("ebitda", pe)
         lease_curr = get_fact(facts, "lease_liabilities_current", pe) or 0
         lease_nc = get_fact(facts, "lease_liabilities_non_current", pe) or 0
         st_borr = get_fact(facts, "short_term_borrowings", pe) or 0
@@ -37,15 +40,15 @@ def run_leverage_engine(
         total_liab = get_fact(facts, "total_liabilities", pe) or 0
 
         gross_debt = st_borr + curr_port + lt_borr + lease_curr + lease_nc
-        net_debt_ex = compute_net_debt_ex_leases(facts, pe)
-        net_debt_incl = compute_net_debt_incl_leases(facts, pe)
+        net_debt_ex = metrics.value("net_debt_ex_leases", pe)
+        net_debt_incl = metrics.value("net_debt_incl_leases", pe)
 
         # Debt / Capital (gross debt / (equity + gross debt))
         capital = total_equity + gross_debt
         debt_to_capital = (gross_debt / capital) if capital and capital > 0 else None
 
         # EBITDA / Interest (cash interest)
-        interest_exp = abs(interest_paid) if interest_paid and interest_paid < 0 else (abs(finance_costs) if finance_costs and finance_costs < 0 else 0)
+        interest_exp = cash_interest_expense(facts, pe)
         ebitda_interest = (ebitda / interest_exp) if interest_exp and interest_exp > 0 else None
 
         # Fixed charge cover: (EBITDA + lease interest) / (interest + lease payments)
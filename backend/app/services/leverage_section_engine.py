@@ -6,13 +6,17 @@ from __future__ import annotations
 from datetime import date
 from typing import Any
 
+from app.services.analysis_context import AnalysisContext
 from app.services.leverage_engine import run_leverage_engine
+from app.services.metric_graph import MetricEvaluator
 from app.core.section_schema import SectionBlock, score_to_rating
 
 
 def run_leverage_section_engine(
     facts: dict[tuple[str, date], float],
     periods: list[date],
+    metrics: MetricEvaluator | None = None,
+    context: AnalysisContext | None = None,
 ) -> SectionBlock:
     """
     Leverage & capital structure assessment. Output: section block.
@@ -27,9 +31,9 @@ def run_leverage_section_engine(
         "evidence_notes": ["Note 21: Borrowings", "Note 20: Lease liabilities", "Note 39: Contingent liabilities"],
         "llm_commentary": "",
     }
-    leverage = run_leverage_engine(facts, periods)
-    periods_sorted = sorted(periods, reverse=True)
-    latest = periods_sorted[0] if periods_sorted else None
+    ctx = AnalysisContext.ensure(facts, periods, context, metrics)
+    leverage = run_leverage_engine(facts, periods, ctx.metrics)
+    latest = ctx.latest
     if not latest:
         return block
 
@@ -5,6 +5,7 @@ from __future__ import annotations
 from datetime import date
 from typing import Any
 
+from app.services.analysis_context import AnalysisContext
 from app.services.liquidity_engine import run_liquidity_engine
 from app.services.financial_engine import get_fact
 from app.core.section_schema import score_to_rating
@@ -14,6 +15,7 @@ def run_liquidity_section_engine(
     facts: dict[tuple[str, date], float],
     periods: list[date],
     committed_facilities: dict[str, float] | None = None,
+    context: AnalysisContext | None = None,
 ) -> dict[str, Any]:
     block: dict[str, Any] = {
         "section_name": "Cash Flow & Liquidity",
@@ -24,9 +26,9 @@ def run_liquidity_section_engine(
         "evidence_notes": ["Note 38: Cash flows", "Note 21: Borrowings", "Note 20: Lease liabilities", "Note 48: Going concern"],
         "llm_commentary": "",
     }
+    ctx = AnalysisContext.ensure(facts, periods, context)
     liquidity = run_liquidity_engine(facts, periods, committed_facilities)
-    periods_sorted = sorted(periods, reverse=True)
-    latest = periods_sorted[0] if periods_sorted else None
+    latest = ctx.latest
     if not latest:
         return block
 
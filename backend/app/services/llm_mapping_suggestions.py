@@ -1,38 +1,75 @@
 """
 Phase 3: LLM-assisted mapping suggestions.
 Proposals only — human review required before persistence.
+Candidates come from the n-gram similarity index (label_similarity) over synonyms, decisions and rules.
 """
 from __future__ import annotations
 
 from typing import Any
 
-from app.core.canonical_keys import CANONICAL_KEYS
+from app.services.label_similarity import LabelSimilarityIndex, get_default_index
 
+# Below this cosine similarity the nearest label is listed as a candidate but not proposed
+SIMILARITY_MIN_SCORE = 0.5
+DEFAULT_TOP_K = 5
 
-def suggest_canonical_key(raw_label: str, context: str | None = None) -> dict[str, Any]:
-    """
-    Propose a canonical_key for raw_label. Returns {canonical_key, confidence, rationale}.
-    Stub: returns best rule-based match; extend with LLM when configured.
-    """
-    from app.services.mapping_rules import map_raw_label
 
-    canonical_key, method, _ = map_raw_label(raw_label)
+def _suggestion(
+    mapped: tuple[str | None, str, bool], candidates: list[dict[str, Any]]
+) -> dict[str, Any]:
+    canonical_key, method, _ = mapped
     if canonical_key:
         return {
             "canonical_key": canonical_key,
             "confidence": 0.95 if method == "RULE" else 0.75,
             "rationale": f"Matched via {method}",
             "method": method,
+            "candidates": candidates,
+        }
+    if candidates and candidates[0]["score"] >= SIMILARITY_MIN_SCORE:
+        best = candidates[0]
+        return {
+            "canonical_key": best["canonical_key"],
+            # Kept below REGEX confidence: a look-alike label is weaker evidence than a pattern
+            "confidence": round(0.7 * best["score"], 4),
+            "rationale": f"Similar to '{best['matched_label']}' ({best['source']}, score {best['score']})",
+            "method": "SIMILARITY",
+            "candidates": candidates,
+            "suggested_candidates": [c["canonical_key"] for c in candidates],
         }
     return {
         "canonical_key": None,
         "confidence": 0.0,
         "rationale": "No match. Consider manual mapping.",
         "method": "UNMAPPED",
-        "suggested_candidates": list(CANONICAL_KEYS)[:10],
+        "candidates": candidates,
+        "suggested_candidates": [c["canonical_key"] for c in candidates],
     }
 
 
-def suggest_batch(raw_labels: list[str]) -> list[dict[str, Any]]:
-    """Batch suggestion for multiple raw labels."""
-    return [suggest_canonical_key(r) for r in raw_labels]
+def suggest_canonical_key(
+    raw_label: str,
+    context: str | None = None,
+    index: LabelSimilarityIndex | None = None,
+    top_k: int = DEFAULT_TOP_K,
+) -> dict[str, Any]:
+    """
+    Propose a canonical_key for raw_label. Returns {canonical_key, confidence, rationale, method, candidates}.
+    Rule match first; otherwise the nearest indexed label if similar enough. candidates lists the top_k
+    canonical keys with similarity scores. index: tenant index (get_suggestion_index); default built-ins only.
+    """
+    return suggest_batch([raw_label], index=index, top_k=top_k)[0]
+
+
+def suggest_batch(
+    raw_labels: list[str],
+    index: LabelSimilarityIndex | None = None,
+    top_k: int = DEFAULT_TOP_K,
+) -> list[dict[str, Any]]:
+    """Batch suggestion for multiple raw labels: one cached rule lookup and one index query for the batch."""
+    from app.services.label_cache import map_labels_cached
+
+    index = index or get_default_index()
+    mapped, _ = map_labels_cached(raw_labels)
+    candidates = index.search_many(raw_labels, top_k)
+    return [_suggestion(mapped[r], c) for r, c in zip(raw_labels, candidates)]
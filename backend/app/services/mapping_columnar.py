@@ -0,0 +1,256 @@
+"""
+Columnar mapping path: ExtractedFacts for a whole engagement -> NormalizedFact rows in one call.
+
+Equivalent to calling mapping_pipeline.run_mapping per document and concatenating the results, but:
+- each sheet's wide period columns are melted to long form once (no per-cell dicts),
+- only the distinct labels go through the matcher (label cache / tenant rules), then broadcast back,
+- dedup, expense sign flip, scaling and the SFP-preference coalesce run as vectorised sort /
+  drop_duplicates over all documents at once.
+Row order ("first occurrence wins") is preserved with explicit (doc, sheet, row, column) ordinals.
+NaN cells are treated like None (the extraction loaders already normalise NaN to None).
+"""
+from __future__ import annotations
+
+import logging
+from typing import Any, Sequence
+
+import numpy as np
+import pandas as pd
+
+from app.services.extraction_loader import parse_year_from_column
+from app.services.label_cache import map_labels_cached
+from app.services.mapping_pipeline import METHOD_CONFIDENCE, SFP_PREFERRED_KEYS, year_to_period_end
+from app.services.tenant_mapping_rules import TenantRuleSet
+
+logger = logging.getLogger(__name__)
+
+_META_COLS = ("page", "line_no", "raw_label", "note", "section", "sheet", "statement_type")
+_ORDER = ["_doc", "_sheet", "_row", "_col"]
+
+
+def _to_float(val: Any) -> float:
+    if val is None:
+        return np.nan
+    try:
+        return float(val)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _none_if_na(v: Any) -> Any:
+    return None if (isinstance(v, float) and np.isnan(v)) else v
+
+
+def _long_frame(documents: Sequence[tuple[str, dict]]) -> pd.DataFrame:
+    """Melt every sheet of every document to one long frame: one row per (label row, period column)."""
+    rows: list[dict] = []
+    doc_ord: list[np.ndarray] = []
+    sheet_ord: list[np.ndarray] = []
+    row_ord: list[np.ndarray] = []
+    sheet_names: list[str] = []
+    for doc_idx, (_, extraction) in enumerate(documents):
+        # Prefer GROUP (consolidated) sheets when a document has any, as run_mapping does
+        group_sheets = {s for s in extraction.keys() if "_GROUP" in s.upper()}
+        for sheet, sheet_rows in extraction.items():
+            if not sheet_rows or (group_sheets and sheet not in group_sheets):
+                continue
+            n = len(sheet_rows)
+            rows.extend(sheet_rows)
+            doc_ord.append(np.full(n, doc_idx))
+            sheet_ord.append(np.full(n, len(sheet_names)))
+            row_ord.append(np.arange(n))
+            sheet_names.append(sheet)
+
+    empty = pd.DataFrame(columns=[*_ORDER, "raw_label", "page", "line_no", "value", "year", "sheet", "statement_type"])
+    if not rows:
+        return empty
+    wide = pd.DataFrame(rows, dtype=object)
+    year_cols = {
+        c: y for c in wide.columns if str(c).lower() not in _META_COLS and (y := parse_year_from_column(c))
+    }
+    if "raw_label" not in wide.columns or not year_cols:
+        return empty
+    for c in ("page", "line_no"):
+        if c not in wide.columns:
+            wide[c] = None
+    wide = wide[["raw_label", "page", "line_no", *year_cols]]
+    wide.insert(0, "_row", np.concatenate(row_ord))
+    wide.insert(0, "_sheet", np.concatenate(sheet_ord))
+    wide.insert(0, "_doc", np.concatenate(doc_ord))
+    wide = wide[wide["raw_label"].map(bool, na_action="ignore").fillna(False).astype(bool)]
+
+    long = wide.melt(
+        id_vars=["_doc", "_sheet", "_row", "raw_label", "page", "line_no"],
+        value_vars=list(year_cols), var_name="_colname", value_name="value",
+    )
+    try:
+        long["value"] = long["value"].astype(float)
+    except (TypeError, ValueError):
+        # Non-numeric text somewhere (e.g. "n/a"): fall back to per-cell float() semantics
+        long["value"] = long["value"].map(_to_float).astype(float)
+    long = long[long["value"].notna()].copy()
+    long["_col"] = long["_colname"].map({c: i for i, c in enumerate(year_cols)})
+    long["year"] = long["_colname"].map(year_cols)
+    sheets = np.array(sheet_names, dtype=object)
+    long["sheet"] = sheets[long["_sheet"].to_numpy()]
+    long["statement_type"] = np.array([s.split("_")[0] for s in sheet_names], dtype=object)[long["_sheet"].to_numpy()]
+    return long.drop(columns=["_colname"]).sort_values(_ORDER, kind="stable", ignore_index=True)
+
+
+def _map_labels(
+    frame: pd.DataFrame,
+    documents: Sequence[tuple[str, dict]],
+    tenant_rules: TenantRuleSet | None,
+) -> tuple[pd.Series, pd.Series, pd.Series, dict[str, float]]:
+    """Map distinct labels once and broadcast (canonical_key, method, is_expense) back to rows."""
+    codes, uniques = pd.factorize(frame["raw_label"])
+    mapped, stats = map_labels_cached(uniques.tolist())
+    results = [mapped[raw] for raw in uniques]
+    keys = pd.Series(np.array([r[0] for r in results], dtype=object)[codes], index=frame.index)
+    methods = pd.Series(np.array([r[1] for r in results], dtype=object)[codes], index=frame.index)
+    is_exp = pd.Series(np.array([r[2] for r in results], dtype=bool)[codes], index=frame.index)
+    stats["tenant_rule_hits"] = 0
+    if tenant_rules:
+        doc_ids = [str(d[0]) for d in documents]
+        pairs = frame[["_doc", "raw_label"]].drop_duplicates()
+        overrides = {}
+        for doc_idx, raw in zip(pairs["_doc"], pairs["raw_label"]):
+            hit = tenant_rules.match(raw, doc_ids[doc_idx])
+            if hit is not None:
+                overrides[(doc_idx, raw)] = hit
+        if overrides:
+            idx = pd.MultiIndex.from_arrays([frame["_doc"], frame["raw_label"]])
+            hit_mask = np.fromiter((k in overrides for k in idx), dtype=bool, count=len(frame))
+            hit_keys = [overrides[k] for k, m in zip(idx, hit_mask) if m]
+            keys = keys.copy()
+            methods = methods.copy()
+            is_exp = is_exp.copy()
+            keys[hit_mask] = [h[0] for h in hit_keys]
+            methods[hit_mask] = [h[1] for h in hit_keys]
+            is_exp[hit_mask] = [h[2] for h in hit_keys]
+        stats["tenant_rule_hits"] = len({raw for _, raw in overrides})
+    return keys, methods, is_exp.astype(bool), stats
+
+
+def _unmapped(frame: pd.DataFrame, unmapped_mask: pd.Series, documents: Sequence[tuple[str, dict]]) -> dict[str, list[dict]]:
+    um = frame.loc[unmapped_mask, ["_doc", "raw_label", "sheet"]].copy()
+    um["raw_label"] = um["raw_label"].str.strip().str[:500]
+    out: dict[str, list[dict]] = {str(doc_id): [] for doc_id, _ in documents}
+    if um.empty:
+        return out
+    counts = um.groupby(["_doc", "raw_label", "sheet"], sort=False).size().reset_index(name="count")
+    counts["_first"] = np.arange(len(counts))
+    counts = counts.sort_values(["_doc", "count", "_first"], ascending=[True, False, True], kind="stable")
+    for doc_idx, rl, sh, cnt in zip(counts["_doc"], counts["raw_label"], counts["sheet"], counts["count"]):
+        out[str(documents[doc_idx][0])].append({"raw_label": rl, "sheet": sh, "count": int(cnt)})
+    return out
+
+
+def run_mapping_frame(
+    documents: Sequence[tuple[str, dict]],
+    company_id: str,
+    scale_factor: float = 1.0,
+    tenant_rules: TenantRuleSet | None = None,
+    return_unmapped: bool = False,
+) -> list[dict[str, Any]] | tuple[list[dict[str, Any]], dict[str, list[dict[str, Any]]]]:
+    """
+    Map all documents of an engagement in one vectorised pass.
+    documents: [(document_version_id, extraction), ...] (extraction as from load_extraction_from_*).
+    Returns NormalizedFact-ready dicts in the same order as concatenating run_mapping per document.
+    If return_unmapped=True, also returns {document_version_id: [{raw_label, sheet, count}, ...]}.
+    """
+    frame = _long_frame(documents)
+    keys, methods, is_exp, stats = _map_labels(frame, documents, tenant_rules)
+    frame["canonical_key"] = keys
+    frame["method"] = methods
+    frame["is_expense"] = is_exp
+    logger.info(
+        "mapping_label_cache",
+        extra={"event": "mapping_label_cache", "company_id": str(company_id), "documents": len(documents), **stats},
+    )
+
+    mapped_mask = frame["canonical_key"].notna()
+    unmapped = _unmapped(frame, ~mapped_mask, documents) if return_unmapped else None
+    facts_df = frame[mapped_mask].copy()
+
+    years = facts_df["year"].unique().tolist()
+    facts_df["period_end"] = facts_df["year"].map({y: year_to_period_end(y) for y in years})
+    # Dedup (key, period_end, sheet) per document: first occurrence in flat row order wins
+    facts_df = facts_df.drop_duplicates(["_doc", "canonical_key", "period_end", "sheet"], keep="first")
+
+    flip = facts_df["is_expense"].to_numpy() & (facts_df["value"].to_numpy() > 0)
+    facts_df["value"] = np.where(flip, -facts_df["value"].to_numpy(), facts_df["value"].to_numpy())
+    facts_df["value_base"] = facts_df["value"] * scale_factor
+
+    # Coalesce (key, period_end): SFP sheet first for SFP_PREFERRED_KEYS, else first occurrence
+    sfp_first = facts_df["canonical_key"].isin(SFP_PREFERRED_KEYS) & facts_df["sheet"].str.upper().str.contains("SFP")
+    facts_df["_pref"] = np.where(sfp_first, 0, 1)
+    facts_df = facts_df.sort_values(["_doc", "canonical_key", "period_end", "_pref", "_sheet", "_row", "_col"], kind="stable")
+    facts_df = facts_df.drop_duplicates(["_doc", "canonical_key", "period_end"], keep="first")
+    # run_mapping orders by (key, str(period_end)); ISO dates sort the same as date objects
+    facts_df = facts_df.sort_values(["_doc", "canonical_key", "period_end"], kind="stable")
+
+    facts = _to_fact_dicts(facts_df, company_id, scale_factor)
+    if return_unmapped:
+        return facts, unmapped
+    return facts
+
+
+def run_mapping_frame_isolated(
+    documents: Sequence[tuple[str, dict]],
+    company_id: str,
+    scale_factor: float = 1.0,
+    tenant_rules: TenantRuleSet | None = None,
+) -> tuple[list[dict[str, Any]], dict[str, str]]:
+    """
+    run_mapping_frame that a malformed extraction cannot take down for the whole engagement: when the
+    combined pass raises, each document is mapped on its own and the failing ones are skipped.
+    Returns (facts, {document_version_id: error}); facts keep per-document concatenation order.
+    """
+    try:
+        return run_mapping_frame(documents, company_id, scale_factor, tenant_rules), {}
+    except Exception as e:
+        logger.warning("Engagement mapping pass failed (%s); mapping %d documents one by one", e, len(documents))
+    facts: list[dict[str, Any]] = []
+    failed: dict[str, str] = {}
+    for dv_id, extraction in documents:
+        try:
+            facts.extend(run_mapping_frame([(dv_id, extraction)], company_id, scale_factor, tenant_rules))
+        except Exception as e:
+            failed[dv_id] = str(e)
+    return facts, failed
+
+
+def _to_fact_dicts(df: pd.DataFrame, company_id: str, scale_factor: float) -> list[dict[str, Any]]:
+    scale_source = "Rm" if scale_factor == 1.0 else f"scale_{scale_factor}"
+    facts: list[dict[str, Any]] = []
+    cols = ("raw_label", "sheet", "statement_type", "canonical_key", "method", "period_end", "value", "value_base", "page", "line_no")
+    for raw_label, sheet, stype, key, method, pe, value, value_base, page, line_no in zip(
+        *(df[c].tolist() for c in cols)
+    ):
+        page = _none_if_na(page)
+        line_no = _none_if_na(line_no)
+        extraction_cell_ref = f"{sheet or 'unknown'}!row_{line_no or 'n'}" if sheet else None
+        source_ref = {
+            "page": page,
+            "line_no": line_no,
+            "raw_label": raw_label[:200],
+            "source_label": raw_label[:200],
+            "source_sheet": sheet,
+            "mapping_method": method,
+            "mapping_confidence": METHOD_CONFIDENCE.get(method, 0.0),
+            "entity_scope": "GROUP" if "GROUP" in (sheet or "").upper() else "COMPANY",
+            "scale_source": scale_source,
+            "extraction_cell_ref": extraction_cell_ref,
+        }
+        facts.append({
+            "company_id": company_id,
+            "period_end": pe,
+            "statement_type": stype,
+            "canonical_key": key,
+            "value_base": value_base,
+            "value_original": value,
+            "unit_meta_json": {"scale_factor": scale_factor},
+            "source_refs_json": [source_ref],
+        })
+    return facts
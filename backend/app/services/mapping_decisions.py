@@ -0,0 +1,201 @@
+"""
+Batched MappingDecision resolver: prior decisions short-circuit the LLM canonical mapper.
+
+resolve_labels hashes every label (sha256 of the normalised label), fetches the tenant's existing
+decisions for all hashes in one IN query, sends only the misses to llm_canonical_mapper in one call,
+and bulk-inserts the new confident LLM decisions so the next document never asks again.
+When several decisions share a hash, MANUAL beats RULE beats LLM, then the most recent wins.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+from typing import Any, Callable, Iterable
+from uuid import UUID
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.mapping import MappingDecision
+from app.services.label_matcher import normalize_label
+
+logger = logging.getLogger(__name__)
+
+UNMAPPED = "UNMAPPED"
+_METHOD_RANK = {"MANUAL": 0, "RULE": 1, "LLM": 2}
+
+LlmMapper = Callable[[list[dict], str], Any]
+
+
+def label_hash(raw_label: str) -> str:
+    """Decision key for a label: sha256 of the normalised label."""
+    return hashlib.sha256(normalize_label(raw_label).encode("utf-8")).hexdigest()
+
+
+def _lookup_hashes(raw_label: str) -> tuple[str, str]:
+    # Decisions written before hashes were normalised used sha256 of the raw label
+    return label_hash(raw_label), hashlib.sha256(raw_label.encode("utf-8")).hexdigest()
+
+
+def _decisions_stmt(tenant_id: str, hashes: Iterable[str]):
+    return select(
+        MappingDecision.raw_label_hash,
+        MappingDecision.canonical_key,
+        MappingDecision.confidence,
+        MappingDecision.method,
+        MappingDecision.updated_at,
+    ).where(MappingDecision.tenant_id == tenant_id, MappingDecision.raw_label_hash.in_(sorted(set(hashes))))
+
+
+def _best_by_hash(rows: Iterable[Any]) -> dict[str, Any]:
+    best: dict[str, Any] = {}
+    for row in sorted(rows, key=lambda r: str(r.updated_at or ""), reverse=True):
+        current = best.get(row.raw_label_hash)
+        if current is None or _METHOD_RANK.get(row.method, 3) < _METHOD_RANK.get(current.method, 3):
+            best[row.raw_label_hash] = row
+    return best
+
+
+def _unique_lines(lines: list[dict]) -> dict[str, dict]:
+    """First line per normalised-label hash, in input order."""
+    unique: dict[str, dict] = {}
+    for line in lines:
+        h = label_hash(line.get("raw_label") or "")
+        if normalize_label(line.get("raw_label") or "") and h not in unique:
+            unique[h] = line
+    return unique
+
+
+def _apply_decisions(unique: dict[str, dict], best: dict[str, Any]) -> tuple[dict[str, dict], list[dict]]:
+    resolved: dict[str, dict] = {}
+    misses: list[dict] = []
+    for h, line in unique.items():
+        norm_hash, raw_hash = _lookup_hashes(line["raw_label"])
+        row = best.get(norm_hash) or best.get(raw_hash)
+        if row is None:
+            misses.append(line)
+            continue
+        resolved[h] = {
+            "canonical_key": row.canonical_key,
+            "confidence": row.confidence,
+            "method": row.method,
+            "source": "decision",
+        }
+    return resolved, misses
+
+
+def _llm_results(misses: list[dict], output: Any) -> tuple[dict[str, dict], list[dict]]:
+    """Map LLM output back to label hashes; returns (resolved, decision rows to insert)."""
+    resolved: dict[str, dict] = {}
+    new_rows: list[dict] = []
+    if output is None:
+        return resolved, new_rows
+    wanted = {label_hash(line["raw_label"]): line for line in misses}
+    for item in output.mappings:
+        h = label_hash(item.raw_label)
+        line = wanted.get(h)
+        if line is None or h in resolved:
+            continue
+        if item.canonical_key == UNMAPPED:
+            resolved[h] = {"canonical_key": None, "confidence": item.confidence, "method": "LLM", "source": "llm"}
+            continue
+        resolved[h] = {"canonical_key": item.canonical_key, "confidence": item.confidence, "method": "LLM", "source": "llm"}
+        new_rows.append({
+            "raw_label_hash": h,
+            "raw_label": line["raw_label"][:500],
+            "statement_type": (line.get("statement_type") or item.statement_type)[:20],
+            "canonical_key": item.canonical_key,
+            "confidence": item.confidence,
+            "method": "LLM",
+            "rationale": (item.reason or "")[:500],
+            "evidence_json": {"section_path": item.section_path},
+        })
+    return resolved, new_rows
+
+
+def _results(lines: list[dict], resolved: dict[str, dict]) -> list[dict]:
+    unresolved = {"canonical_key": None, "confidence": None, "method": UNMAPPED, "source": "unresolved"}
+    return [
+        {"raw_label": line.get("raw_label"), **resolved.get(label_hash(line.get("raw_label") or ""), unresolved)}
+        for line in lines
+    ]
+
+
+def _default_mapper() -> LlmMapper:
+    from app.services.llm.tasks import llm_canonical_mapper
+
+    return llm_canonical_mapper
+
+
+def _log(tenant_id: str, lines: list[dict], unique: dict, misses: list[dict], new_rows: list[dict]) -> None:
+    logger.info(
+        "mapping_decisions_resolved",
+        extra={
+            "event": "mapping_decisions_resolved",
+            "tenant_id": tenant_id,
+            "lines": len(lines),
+            "unique_labels": len(unique),
+            "decision_hits": len(unique) - len(misses),
+            "llm_requested": len(misses),
+            "decisions_written": len(new_rows),
+        },
+    )
+
+
+def resolve_labels(
+    db: Session,
+    tenant_id: str | UUID,
+    lines: list[dict],
+    document_version_id: str,
+    llm_mapper: LlmMapper | None = None,
+    write_back: bool = True,
+) -> list[dict]:
+    """
+    lines: [{"statement_type", "section_path", "raw_label"}, ...] (llm_canonical_mapper input shape).
+    Returns one {raw_label, canonical_key, confidence, method, source} per line, in order; source is
+    "decision", "llm" or "unresolved" (canonical_key None when nothing confident was found).
+    New LLM decisions are added to the session (flushed, not committed) when write_back is set.
+    """
+    tenant_id = str(tenant_id)
+    unique = _unique_lines(lines)
+    hashes = [h for line in unique.values() for h in _lookup_hashes(line["raw_label"])]
+    best = _best_by_hash(db.execute(_decisions_stmt(tenant_id, hashes)).all()) if hashes else {}
+    resolved, misses = _apply_decisions(unique, best)
+    new_rows: list[dict] = []
+    if misses:
+        output = (llm_mapper or _default_mapper())(misses, document_version_id)
+        llm_resolved, new_rows = _llm_results(misses, output)
+        resolved.update(llm_resolved)
+        if write_back and new_rows:
+            db.execute(insert(MappingDecision), [{"tenant_id": tenant_id, **r} for r in new_rows])
+            db.flush()
+    _log(tenant_id, lines, unique, misses, new_rows)
+    return _results(lines, resolved)
+
+
+async def resolve_labels_async(
+    db: AsyncSession,
+    tenant_id: str | UUID,
+    lines: list[dict],
+    document_version_id: str,
+    llm_mapper: LlmMapper | None = None,
+    write_back: bool = True,
+) -> list[dict]:
+    """Async twin of resolve_labels; the (blocking) LLM call runs in a worker thread."""
+    tenant_id = str(tenant_id)
+    unique = _unique_lines(lines)
+    hashes = [h for line in unique.values() for h in _lookup_hashes(line["raw_label"])]
+    best = _best_by_hash((await db.execute(_decisions_stmt(tenant_id, hashes))).all()) if hashes else {}
+    resolved, misses = _apply_decisions(unique, best)
+    new_rows: list[dict] = []
+    if misses:
+        output = await asyncio.to_thread(llm_mapper or _default_mapper(), misses, document_version_id)
+        llm_resolved, new_rows = _llm_results(misses, output)
+        resolved.update(llm_resolved)
+        if write_back and new_rows:
+            await db.execute(insert(MappingDecision), [{"tenant_id": tenant_id, **r} for r in new_rows])
+            await db.flush()
+    _log(tenant_id, lines, unique, misses, new_rows)
+    return _results(lines, resolved)
@@ -3,13 +3,24 @@ Mapping pipeline: ExtractedFacts -> (Pass A + B) -> NormalizedFact.
 """
 from __future__ import annotations
 
+import logging
 from datetime import date
 from typing import Any
 
-from app.services.mapping_rules import map_raw_label
+from app.services.label_cache import map_labels_cached
+from app.services.tenant_mapping_rules import TENANT_RULE_METHOD, TenantRuleSet
 from app.services.extraction_loader import load_extraction_from_s3, load_extraction_from_file, extraction_to_flat_rows
 
 
+logger = logging.getLogger(__name__)
+
+# Tenant rules are analyst-curated overrides; built-in synonyms beat regex patterns
+METHOD_CONFIDENCE = {TENANT_RULE_METHOD: 1.0, "RULE": 0.95, "REGEX": 0.85}
+
+# Keys where we prefer SFP (balance sheet) over CF - CF may have different structure
+SFP_PREFERRED_KEYS = frozenset({"cash_and_cash_equivalents", "total_equity", "total_assets", "total_liabilities"})
+
+
 def year_to_period_end(year: str) -> date:
     """Assume June year-end for SA AFS. year='2025' -> 2025-06-30."""
     return date(int(year), 6, 30)
@@ -21,12 +32,16 @@ def run_mapping(
     scale_factor: float = 1.0,
     extraction_override: dict | None = None,
     return_unmapped: bool = False,
+    tenant_rules: TenantRuleSet | None = None,
+    document_version_id: str | None = None,
 ) -> list[dict[str, Any]] | tuple[list[dict[str, Any]], list[dict[str, Any]]]:
     """
     Load extraction from S3 (or use extraction_override), map to canonical keys, return NormalizedFact rows.
     Returns list of dicts ready for NormalizedFact insertion.
     If return_unmapped=True, returns (facts, unmapped) where unmapped = [{raw_label, count, sheet}, ...].
     extraction_override: if provided, skip S3 load (for gold tests, deterministic runs).
+    tenant_rules: compiled tenant MappingRules (get_tenant_rules); checked before the built-in rules,
+    with per_document_version overrides applied when document_version_id is given.
     """
     if extraction_override is not None:
         extraction = extraction_override
@@ -41,18 +56,34 @@ def run_mapping(
         flat = [r for r in flat if r.get("sheet") in group_sheets]
     # else: use all sheets (COMPANY-only or other layouts)
 
-    # Keys where we prefer SFP (balance sheet) over CF - CF may have different structure
-    SFP_PREFERRED_KEYS = frozenset({"cash_and_cash_equivalents", "total_equity", "total_assets", "total_liabilities"})
-
     facts_by_key: dict[tuple[str, date], list[tuple[dict, str]]] = {}
     seen: set[tuple[str, date, str]] = set()
     unmapped_counts: dict[tuple[str, str], int] = {}
 
+    # Resolve each distinct label once (process LRU / Redis / matcher) instead of once per row
+    mapped_labels, cache_stats = map_labels_cached(row["raw_label"] for row in flat)
+    tenant_hits = 0
+    if tenant_rules:
+        for raw_label in mapped_labels:
+            override = tenant_rules.match(raw_label, document_version_id)
+            if override is not None:
+                mapped_labels[raw_label] = override
+                tenant_hits += 1
+    logger.info(
+        "mapping_label_cache",
+        extra={
+            "event": "mapping_label_cache",
+            "company_id": str(company_id),
+            "tenant_rule_hits": tenant_hits,
+            **cache_stats,
+        },
+    )
+
     for row in flat:
         raw_label = row["raw_label"]
         year = row["year"]
         value = row["value"]
-        canonical_key, method, is_expense = map_raw_label(raw_label)
+        canonical_key, method, is_expense = mapped_labels[raw_label]
         if not canonical_key:
             if return_unmapped and raw_label:
                 k = (raw_label.strip()[:500], row.get("sheet", "") or "")
@@ -72,7 +103,7 @@ def run_mapping(
 
         entity_scope = "GROUP" if "GROUP" in (sheet or "").upper() else "COMPANY"
         scale_source = "Rm" if scale_factor == 1.0 else f"scale_{scale_factor}"
-        confidence = 0.95 if method == "RULE" else (0.85 if method == "REGEX" else 0.0)
+        confidence = METHOD_CONFIDENCE.get(method, 0.0)
         extraction_cell_ref = f"{sheet or 'unknown'}!row_{row.get('line_no') or 'n'}" if sheet else None
         source_ref = {
             "page": row.get("page"),
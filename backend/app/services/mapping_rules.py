@@ -4,7 +4,10 @@ Highest precision. Sign conventions: expenses as negative where applicable.
 """
 from __future__ import annotations
 
-import re
+from functools import lru_cache
+
+from app.services.label_matcher import CompiledLabelMatcher, normalize_label
+
 # raw_label (normalized: lower, strip) -> (canonical_key, is_expense_negative)
 # Expenses: cost_of_sales, operating_expenses, finance_costs, etc. stored as negative in our convention
 RAW_TO_CANONICAL: list[tuple[list[str], str, bool]] = [
@@ -57,7 +60,13 @@ RAW_TO_CANONICAL: list[tuple[list[str], str, bool]] = [
 
 
 def _normalize_label(label: str) -> str:
-    return re.sub(r"\s+", " ", (label or "").lower().strip())
+    return normalize_label(label)
+
+
+@lru_cache(maxsize=1)
+def get_compiled_matcher() -> CompiledLabelMatcher:
+    """Pass A + Pass B rules compiled once per process (hash map + word tries; Pass B patterns pre-compiled, tried in list order)."""
+    return CompiledLabelMatcher(RAW_TO_CANONICAL, pass_b_patterns())
 
 
 def pass_a_match(raw_label: str) -> tuple[str | None, bool]:
@@ -65,14 +74,7 @@ def pass_a_match(raw_label: str) -> tuple[str | None, bool]:
     Pass A: exact/synonym match.
     Returns (canonical_key, is_expense_negative) or (None, False) if no match.
     """
-    normalized = _normalize_label(raw_label)
-    for synonyms, canonical_key, is_expense in RAW_TO_CANONICAL:
-        for syn in synonyms:
-            if syn == normalized or normalized == syn:
-                return canonical_key, is_expense
-            if normalized.startswith(syn + " ") or normalized.endswith(" " + syn):
-                return canonical_key, is_expense
-    return None, False
+    return get_compiled_matcher().pass_a(_normalize_label(raw_label))
 
 
 def pass_b_patterns() -> list[tuple[str, str, bool]]:
@@ -116,11 +118,7 @@ def pass_b_match(raw_label: str) -> tuple[str | None, bool]:
     """
     Pass B: pattern match. Only used when Pass A fails.
     """
-    normalized = _normalize_label(raw_label)
-    for pattern, canonical_key, is_expense in pass_b_patterns():
-        if re.search(pattern, normalized):
-            return canonical_key, is_expense
-    return None, False
+    return get_compiled_matcher().pass_b(_normalize_label(raw_label))
 
 
 def map_raw_label(raw_label: str) -> tuple[str | None, str, bool]:
@@ -128,10 +126,4 @@ def map_raw_label(raw_label: str) -> tuple[str | None, str, bool]:
     Map raw_label to canonical_key using Pass A then Pass B.
     Returns (canonical_key, method, is_expense) or (None, "UNMAPPED", False).
     """
-    key, is_exp = pass_a_match(raw_label)
-    if key:
-        return key, "RULE", is_exp
-    key, is_exp = pass_b_match(raw_label)
-    if key:
-        return key, "REGEX", is_exp
-    return None, "UNMAPPED", False
+    return get_compiled_matcher().match(raw_label)
@@ -170,8 +170,12 @@ def build_all_sections(
     notes_json: dict | None = None,
     analysis_output: dict[str, Any] | None = None,
     recommendation_conditions: list[str] | None = None,
+    target_sections: list[str] | None = None,
 ) -> dict[str, str]:
-    """Build all memo section texts. Uses section-based structure when analysis_output has section_blocks."""
+    """
+    Build all memo section texts. Uses section-based structure when analysis_output has section_blocks.
+    target_sections: limit the optional LLM rewrite to these sections (incremental refresh).
+    """
     from app.services.notes_indexer import format_risks_for_memo
 
     section_blocks = (analysis_output or {}).get("section_blocks")
@@ -189,6 +193,7 @@ def build_all_sections(
             notes_json=notes_json,
             analysis_output=analysis_output,
             recommendation_conditions=recommendation_conditions,
+            target_sections=target_sections,
         )
 
     base = {
@@ -268,12 +273,37 @@ def _build_rating_rationale_with_drivers(grade: str, agg: dict, breakdown: dict)
     return " ".join(lines)
 
 
+# Reverse-stress EBITDA decline below which covenant headroom is flagged for monitoring
+BREAKEVEN_TRIGGER_DECLINE = 0.20
+
+
+def _breakeven_trigger(be: dict) -> str | None:
+    tightest = be.get("tightest_ebitda_decline")
+    name = be.get("tightest_covenant")
+    if tightest is None or tightest >= BREAKEVEN_TRIGGER_DECLINE or not name:
+        return None
+    label = "ND/EBITDA" if name == "leverage" else "interest cover"
+    parts = [f"Covenant headroom: a {tightest:.0%} EBITDA decline breaches {label}"]
+    rev = (be.get(name) or {}).get("revenue_decline")
+    if rev is not None:
+        parts.append(f"(revenue -{rev:.0%})")
+    text = " ".join(parts)
+    bps = (be.get("interest_cover") or {}).get("rate_rise_bps")
+    if bps is not None:
+        text += f"; interest cover breaches on a {bps:.0f} bps rate rise"
+    return text + "; monitor EBITDA against these thresholds."
+
+
 def _build_monitoring_triggers(blocks: dict, agg: dict) -> str:
     """Build monitoring triggers from covenant/leverage/liquidity."""
     lines = []
     cov = blocks.get("covenants", {}).get("key_metrics") or {}
     if cov.get("leverage_breach") or cov.get("interest_cover_breach"):
         lines.append("Covenant breach: Monitor quarterly covenant compliance; early engagement with lenders.")
+    else:
+        trigger = _breakeven_trigger(cov.get("breakevens") or {})
+        if trigger:
+            lines.append(trigger)
     lev = blocks.get("leverage", {}).get("key_metrics") or {}
     nd = lev.get("net_debt_to_ebitda_incl_leases")
     if nd is not None and nd > 4:
@@ -432,6 +462,7 @@ def build_sections_from_blocks(
     notes_json: dict[str, Any] | None = None,
     analysis_output: dict[str, Any] | None = None,
     recommendation_conditions: list[str] | None = None,
+    target_sections: list[str] | None = None,
 ) -> dict[str, str]:
     """
     Build memo section texts from section blocks (institutional structure).
@@ -566,6 +597,7 @@ def build_sections_from_blocks(
             notes_json=notes_json,
             baseline_sections=sections,
             recommendation_conditions=recommendation_conditions,
+            target_sections=target_sections,
         )
         for key, value in (llm_sections or {}).items():
             if key in sections and isinstance(value, str) and value.strip():
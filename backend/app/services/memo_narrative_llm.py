@@ -165,10 +165,14 @@ def generate_junior_analyst_sections(
     notes_json: dict[str, Any] | None,
     baseline_sections: dict[str, str],
     recommendation_conditions: list[str] | None = None,
+    target_sections: list[str] | None = None,
 ) -> dict[str, str]:
     settings = get_settings()
     if not settings.openai_api_key:
         return {}
+    targets = [s for s in TARGET_SECTIONS if target_sections is None or s in target_sections]
+    if not targets:
+        return {}
 
     try:
         section_payload: dict[str, Any] = {}
@@ -188,7 +192,7 @@ def generate_junior_analyst_sections(
             "rating_grade": rating_grade,
             "recommendation": recommendation,
             "recommendation_conditions": recommendation_conditions or [],
-            "target_sections": TARGET_SECTIONS,
+            "target_sections": targets,
             "aggregation": aggregation or {},
             "section_blocks": section_payload,
             "period_snapshot": _period_snapshot(facts_by_period, metric_by_period),
@@ -208,7 +212,7 @@ def generate_junior_analyst_sections(
             return {}
         out: dict[str, str] = {}
         for k, v in sections.items():
-            if k in TARGET_SECTIONS and isinstance(v, str) and v.strip():
+            if k in targets and isinstance(v, str) and v.strip():
                 out[k] = v.strip()
         if out:
             log.info("LLM memo narrative generated for %d sections", len(out))
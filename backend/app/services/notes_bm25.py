@@ -0,0 +1,275 @@
+"""
+In-memory BM25 index over note chunks, one per (document_version_id, scope).
+
+Used by the keyword fallback in notes_retrieval when tsvector finds nothing. The index is built lazily
+from the version's chunks (title + text + keywords) over plural-stripped terms, held in a process-wide
+LRU and, when Redis is reachable, serialised there so other API workers skip the rebuild. The async
+path talks to Redis through redis.asyncio so a cache lookup never blocks the event loop.
+
+Invalidation: every cache entry carries a fingerprint of the chunk set (row count + max(updated_at)).
+The fingerprint is re-checked at most every REVALIDATE_SECONDS; a changed fingerprint means a rebuild
+(and a new Redis key), so rewritten chunks are picked up without any call from the writer.
+"""
+from __future__ import annotations
+
+import json
+import math
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Iterable
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models.extraction import NoteChunk
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+LRU_MAX_ENTRIES = 256
+REVALIDATE_SECONDS = 60.0
+# Bump the version when index terms change (tokenizer/stemmer) so stale serialised indexes are ignored
+CACHE_PREFIX = "notes_bm25:v2:"
+TTL_SECONDS = 86400 * 7
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase alphanumeric tokens longer than 2 chars (same length floor as the old keyword scorer)."""
+    return [t for t in _TOKEN_RE.findall((text or "").lower()) if len(t) > 2]
+
+
+def stem(token: str) -> str:
+    """
+    Plural stripping (Harman's S-stemmer): -ies -> -y, -es -> -e, -s -> "" with the usual exceptions.
+    Enough for "covenants"/"covenant" or "liabilities"/"liability" to share a term, which the old
+    substring scorer matched; the fallback only runs when the stemmed tsvector search found nothing.
+    """
+    if len(token) > 4 and token.endswith("ies") and not token.endswith(("eies", "aies")):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("es") and not token.endswith(("aes", "ees", "oes")):
+        return token[:-1]
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("us", "ss")):
+        return token[:-1]
+    return token
+
+
+def terms(text: str) -> list[str]:
+    """Index/query terms: tokenize, then stem. Index and query must go through the same function."""
+    return [stem(t) for t in tokenize(text)]
+
+
+class Bm25Index:
+    """Inverted index: term -> [(doc_idx, tf)], plus per-doc lengths. Immutable once built."""
+
+    __slots__ = ("chunk_ids", "doc_len", "avgdl", "postings", "idf")
+
+    def __init__(self, chunk_ids: list[str], postings: dict[str, list[tuple[int, int]]], doc_len: list[int]):
+        self.chunk_ids = chunk_ids
+        self.postings = postings
+        self.doc_len = doc_len
+        n = len(chunk_ids)
+        self.avgdl = (sum(doc_len) / n) if n else 0.0
+        # BM25+ style non-negative idf
+        self.idf = {t: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5)) for t, p in postings.items()}
+
+    @classmethod
+    def build(cls, docs: Iterable[tuple[str, str]]) -> "Bm25Index":
+        """docs: (chunk_id, text). Chunks are indexed in chunk_id order for deterministic tie-breaks."""
+        chunk_ids: list[str] = []
+        doc_len: list[int] = []
+        postings: dict[str, list[tuple[int, int]]] = {}
+        for idx, (chunk_id, text) in enumerate(sorted(docs, key=lambda d: d[0])):
+            tokens = terms(text)
+            chunk_ids.append(chunk_id)
+            doc_len.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                postings.setdefault(term, []).append((idx, tf))
+        return cls(chunk_ids, postings, doc_len)
+
+    def search(self, query: str, top_k: int = 5) -> list[tuple[str, float]]:
+        """Return [(chunk_id, bm25_score), ...] best first; ties by chunk_id."""
+        scores: dict[int, float] = {}
+        avgdl = self.avgdl or 1.0
+        for term in set(terms(query)):
+            plist = self.postings.get(term)
+            if not plist:
+                continue
+            idf = self.idf[term]
+            for idx, tf in plist:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_len[idx] / avgdl)
+                scores[idx] = scores.get(idx, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda x: (-x[1], self.chunk_ids[x[0]]))
+        return [(self.chunk_ids[i], s) for i, s in ranked[:top_k]]
+
+    def to_json(self) -> str:
+        return json.dumps({"chunk_ids": self.chunk_ids, "doc_len": self.doc_len, "postings": self.postings})
+
+    @classmethod
+    def from_json(cls, raw: str | bytes) -> "Bm25Index":
+        data = json.loads(raw)
+        postings = {t: [(int(i), int(tf)) for i, tf in plist] for t, plist in data["postings"].items()}
+        return cls(data["chunk_ids"], postings, data["doc_len"])
+
+
+def _chunk_text(title: str | None, text: str | None, keywords: list | None) -> str:
+    return " ".join([title or "", text or "", " ".join(str(k) for k in (keywords or []))])
+
+
+# --- Process-wide LRU ------------------------------------------------------------------------------
+
+_lock = threading.Lock()
+# (document_version_id, scope) -> (fingerprint, checked_at, index)
+_lru: "OrderedDict[tuple[str, str], tuple[str, float, Bm25Index]]" = OrderedDict()
+
+
+def _lru_get(key: tuple[str, str]) -> tuple[str, float, Bm25Index] | None:
+    with _lock:
+        entry = _lru.get(key)
+        if entry is not None:
+            _lru.move_to_end(key)
+        return entry
+
+
+def _lru_put(key: tuple[str, str], fingerprint: str, index: Bm25Index) -> None:
+    with _lock:
+        _lru[key] = (fingerprint, time.monotonic(), index)
+        _lru.move_to_end(key)
+        while len(_lru) > LRU_MAX_ENTRIES:
+            _lru.popitem(last=False)
+
+
+def clear_bm25_cache() -> None:
+    with _lock:
+        _lru.clear()
+
+
+# --- Optional Redis tier ---------------------------------------------------------------------------
+
+def _redis_key(key: tuple[str, str], fingerprint: str) -> str:
+    return f"{CACHE_PREFIX}{key[0]}:{key[1]}:{fingerprint}"
+
+
+def _redis_get(key: tuple[str, str], fingerprint: str) -> Bm25Index | None:
+    try:
+        import redis
+        r = redis.from_url(get_settings().redis_url)
+        raw = r.get(_redis_key(key, fingerprint))
+        return Bm25Index.from_json(raw) if raw is not None else None
+    except Exception:
+        return None
+
+
+def _redis_set(key: tuple[str, str], fingerprint: str, index: Bm25Index) -> None:
+    try:
+        import redis
+        r = redis.from_url(get_settings().redis_url)
+        r.setex(_redis_key(key, fingerprint), TTL_SECONDS, index.to_json())
+    except Exception:
+        pass
+
+
+async def _redis_get_async(key: tuple[str, str], fingerprint: str) -> Bm25Index | None:
+    try:
+        import redis.asyncio as aioredis
+        async with aioredis.from_url(get_settings().redis_url) as r:
+            raw = await r.get(_redis_key(key, fingerprint))
+        return Bm25Index.from_json(raw) if raw is not None else None
+    except Exception:
+        return None
+
+
+async def _redis_set_async(key: tuple[str, str], fingerprint: str, index: Bm25Index) -> None:
+    try:
+        import redis.asyncio as aioredis
+        async with aioredis.from_url(get_settings().redis_url) as r:
+            await r.setex(_redis_key(key, fingerprint), TTL_SECONDS, index.to_json())
+    except Exception:
+        pass
+
+
+# --- Loading (sync + async) ------------------------------------------------------------------------
+
+def _fingerprint_stmt(document_version_id: str, scope: str):
+    return select(func.count(NoteChunk.id), func.max(NoteChunk.updated_at)).where(
+        NoteChunk.document_version_id == document_version_id,
+        NoteChunk.scope == scope,
+    )
+
+
+def _chunks_stmt(document_version_id: str, scope: str):
+    return select(NoteChunk.chunk_id, NoteChunk.title, NoteChunk.text, NoteChunk.keywords_json).where(
+        NoteChunk.document_version_id == document_version_id,
+        NoteChunk.scope == scope,
+    )
+
+
+def _fingerprint(row: Any) -> str:
+    count, max_updated = row
+    return f"{int(count or 0)}-{max_updated.isoformat() if max_updated else 'none'}"
+
+
+def _fresh(entry: tuple[str, float, Bm25Index] | None) -> Bm25Index | None:
+    if entry is not None and time.monotonic() - entry[1] < REVALIDATE_SECONDS:
+        return entry[2]
+    return None
+
+
+def _reuse_local(key: tuple[str, str], fingerprint: str, entry: tuple[str, float, Bm25Index] | None) -> Bm25Index | None:
+    """The local entry, re-stamped, if its fingerprint still matches."""
+    if entry is not None and entry[0] == fingerprint:
+        _lru_put(key, fingerprint, entry[2])
+        return entry[2]
+    return None
+
+
+def _adopt_shared(key: tuple[str, str], fingerprint: str, shared: Bm25Index | None) -> Bm25Index | None:
+    if shared is not None:
+        _lru_put(key, fingerprint, shared)
+    return shared
+
+
+def _build(key: tuple[str, str], fingerprint: str, rows: list[Any]) -> Bm25Index:
+    index = Bm25Index.build((r[0], _chunk_text(r[1], r[2], r[3])) for r in rows)
+    _lru_put(key, fingerprint, index)
+    return index
+
+
+def get_bm25_index(db: Session, document_version_id: str, scope: str = "GROUP") -> Bm25Index:
+    """Cached BM25 index for a document version's chunks (built on first use)."""
+    key = (str(document_version_id), scope)
+    entry = _lru_get(key)
+    index = _fresh(entry)
+    if index is not None:
+        return index
+    fingerprint = _fingerprint(db.execute(_fingerprint_stmt(key[0], scope)).one())
+    index = _reuse_local(key, fingerprint, entry)
+    if index is None:
+        index = _adopt_shared(key, fingerprint, _redis_get(key, fingerprint))
+    if index is not None:
+        return index
+    index = _build(key, fingerprint, db.execute(_chunks_stmt(key[0], scope)).all())
+    _redis_set(key, fingerprint, index)
+    return index
+
+
+async def get_bm25_index_async(db: AsyncSession, document_version_id: str, scope: str = "GROUP") -> Bm25Index:
+    """Async twin of get_bm25_index (Redis via redis.asyncio)."""
+    key = (str(document_version_id), scope)
+    entry = _lru_get(key)
+    index = _fresh(entry)
+    if index is not None:
+        return index
+    fingerprint = _fingerprint((await db.execute(_fingerprint_stmt(key[0], scope))).one())
+    index = _reuse_local(key, fingerprint, entry)
+    if index is None:
+        index = _adopt_shared(key, fingerprint, await _redis_get_async(key, fingerprint))
+    if index is not None:
+        return index
+    index = _build(key, fingerprint, (await db.execute(_chunks_stmt(key[0], scope))).all())
+    await _redis_set_async(key, fingerprint, index)
+    return index
@@ -1,16 +1,25 @@
 """
 Notes retrieval: manifest, fetch chunks, search. On-demand only – never dump raw notes.
-Hybrid search: tsvector (BM25-style) + vector (semantic).
+Hybrid search: tsvector (BM25-style) + vector (semantic), fused by reciprocal rank in a single SQL statement.
+
+Each function has an ``*_async`` twin running on the API's AsyncSession (asyncpg pool) so the API
+never opens the worker's sync psycopg2 pool. HNSW ef_search/iterative_scan are set once per pooled
+connection (app.db.hnsw), so each search is a single statement. Both variants share SQL and scoring helpers, so they
+return identical results.
 """
 from __future__ import annotations
 
+import asyncio
 from typing import Any
-from sqlalchemy import text
+from sqlalchemy import Float, bindparam, select, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.models.extraction import NoteChunk, NotesIndex, PresentationContext
 from app.services.note_router import route_to_notes
-from app.services.notes_embedding import get_embedding
+from app.services.notes_bm25 import get_bm25_index, get_bm25_index_async, tokenize
+from app.services.notes_embedding import EMBEDDING_DIM, get_embedding
 
 
 def get_notes_manifest(
@@ -32,6 +41,25 @@ def get_notes_manifest(
     return None
 
 
+async def get_notes_manifest_async(
+    db: AsyncSession,
+    document_version_id: str,
+    scope: str = "GROUP",
+) -> dict[str, Any] | None:
+    """Async twin of get_notes_manifest."""
+    result = await db.execute(
+        select(PresentationContext).where(
+            PresentationContext.document_version_id == document_version_id,
+            PresentationContext.scope == "DOC",
+            PresentationContext.scope_key == f"notes_manifest_{scope}",
+        ).limit(1)
+    )
+    ctx = result.scalars().first()
+    if ctx and ctx.evidence_json:
+        return ctx.evidence_json
+    return None
+
+
 def fetch_note_chunks(
     db: Session,
     document_version_id: str,
@@ -51,10 +79,33 @@ def fetch_note_chunks(
         NoteChunk.scope == scope,
         NoteChunk.note_id.in_(note_ids),
     ).order_by(NoteChunk.note_id, NoteChunk.chunk_id)
+    return _cap_chunks(query.all(), max_tokens)
+
+
+async def fetch_note_chunks_async(
+    db: AsyncSession,
+    document_version_id: str,
+    note_ids: list[str],
+    scope: str = "GROUP",
+    max_tokens: int | None = 15000,
+) -> list[dict[str, Any]]:
+    """Async twin of fetch_note_chunks."""
+    if not note_ids:
+        return []
+    result = await db.execute(
+        select(NoteChunk).where(
+            NoteChunk.document_version_id == document_version_id,
+            NoteChunk.scope == scope,
+            NoteChunk.note_id.in_(note_ids),
+        ).order_by(NoteChunk.note_id, NoteChunk.chunk_id)
+    )
+    return _cap_chunks(result.scalars().all(), max_tokens)
 
+
+def _cap_chunks(rows: list[NoteChunk], max_tokens: int | None) -> list[dict[str, Any]]:
     chunks: list[dict[str, Any]] = []
     total_tokens = 0
-    for nc in query.all():
+    for nc in rows:
         tok = nc.tokens_approx or (len((nc.text or "")) // 4)
         if max_tokens and total_tokens + tok > max_tokens:
             break
@@ -73,6 +124,112 @@ def fetch_note_chunks(
     return chunks
 
 
+_TSVECTOR_SQL = text("""
+    SELECT nc.id, nc.chunk_id, ts_rank(nc.search_vector, plainto_tsquery('english', :q)) AS rank
+    FROM note_chunks nc
+    WHERE nc.document_version_id = :dv_id AND nc.scope = :scope
+      AND nc.search_vector @@ plainto_tsquery('english', :q)
+    ORDER BY rank DESC
+    LIMIT :top_k
+""")
+
+# Reciprocal-rank fusion constant (Cormack et al.; 60 is the usual default).
+RRF_K = 60
+
+# One round trip: keyword and vector candidate lists ranked in CTEs, fused by weighted RRF
+# (w / (RRF_K + rank)), ties broken by chunk_id so output is deterministic.
+_HYBRID_RRF_SQL = text("""
+    WITH kw AS (
+        SELECT chunk_id, ROW_NUMBER() OVER (ORDER BY rank DESC, chunk_id) AS rnk
+        FROM (
+            SELECT chunk_id, ts_rank(search_vector, plainto_tsquery('english', :q)) AS rank
+            FROM note_chunks
+            WHERE document_version_id = :dv_id AND scope = :scope
+              AND search_vector @@ plainto_tsquery('english', :q)
+            ORDER BY rank DESC
+            LIMIT :pool
+        ) k
+    ),
+    sem AS (
+        SELECT chunk_id, ROW_NUMBER() OVER (ORDER BY dist, chunk_id) AS rnk
+        FROM (
+            SELECT chunk_id, embedding <=> CAST(:emb AS vector) AS dist
+            FROM note_chunks
+            WHERE document_version_id = :dv_id AND scope = :scope AND embedding IS NOT NULL
+            ORDER BY embedding <=> CAST(:emb AS vector)
+            LIMIT :pool
+        ) s
+    )
+    SELECT COALESCE(kw.chunk_id, sem.chunk_id) AS chunk_id,
+           COALESCE(:kw_w / (:rrf_k + kw.rnk), 0) + COALESCE(:sem_w / (:rrf_k + sem.rnk), 0) AS score
+    FROM kw FULL OUTER JOIN sem ON kw.chunk_id = sem.chunk_id
+    ORDER BY score DESC, chunk_id
+    LIMIT :top_k
+""").bindparams(
+    bindparam("emb", type_=ARRAY(Float)),
+    bindparam("kw_w", type_=Float),
+    bindparam("sem_w", type_=Float),
+    bindparam("rrf_k", type_=Float),
+)
+
+# Query vector is bound as a float8[] array (binary under asyncpg), not a joined string. The cast
+# stays inline so "embedding <=> $1" is a param-vs-column ordering the HNSW index (migration 008)
+# can serve for ORDER BY ... LIMIT. The outer sort restores exact distance order, which
+# hnsw.iterative_scan = relaxed_order does not guarantee.
+_SEMANTIC_SQL = text("""
+    WITH s AS MATERIALIZED (
+        SELECT chunk_id, embedding <=> CAST(:emb AS vector) AS dist
+        FROM note_chunks
+        WHERE document_version_id = :dv_id AND scope = :scope AND embedding IS NOT NULL
+        ORDER BY embedding <=> CAST(:emb AS vector)
+        LIMIT :top_k
+    )
+    SELECT chunk_id, 1 - dist AS similarity FROM s ORDER BY dist, chunk_id
+""").bindparams(bindparam("emb", type_=ARRAY(Float)))
+
+def _tsvector_params(document_version_id: str, query: str, scope: str, top_k: int) -> dict[str, Any] | None:
+    if not query or len(query.strip()) < 2:
+        return None
+    q = query.strip().replace("'", "''")
+    return {"q": q, "dv_id": str(document_version_id), "scope": scope, "top_k": top_k}
+
+
+def _semantic_params(emb: list[float] | None, document_version_id: str, scope: str, top_k: int) -> dict[str, Any] | None:
+    if not emb or len(emb) != EMBEDDING_DIM:
+        return None
+    return {"emb": [float(x) for x in emb], "dv_id": str(document_version_id), "scope": scope, "top_k": top_k}
+
+
+def _hybrid_params(
+    emb: list[float] | None,
+    document_version_id: str,
+    query: str,
+    scope: str,
+    top_k: int,
+    keyword_weight: float,
+) -> dict[str, Any] | None:
+    ts_params = _tsvector_params(document_version_id, query, scope, top_k)
+    sem_params = _semantic_params(emb, document_version_id, scope, top_k)
+    if ts_params is None or sem_params is None:
+        return None
+    return {
+        **ts_params,
+        "emb": sem_params["emb"],
+        "pool": top_k * 2,
+        "kw_w": float(keyword_weight),
+        "sem_w": float(1 - keyword_weight),
+        "rrf_k": float(RRF_K),
+    }
+
+
+def _rrf_single_list(ranked: list[tuple[str, float]], top_k: int, weight: float) -> list[tuple[str, float]]:
+    """
+    Fusion score when only one candidate list can run: keyword ranks without a query embedding (no API
+    key), semantic ranks when the query is too short for tsvector.
+    """
+    return [(cid, weight / (RRF_K + i)) for i, (cid, _) in enumerate(ranked[:top_k], start=1)]
+
+
 def search_notes_tsvector(
     db: Session,
     document_version_id: str,
@@ -83,21 +240,25 @@ def search_notes_tsvector(
     """
     Full-text search using Postgres tsvector. Returns [(chunk_id, rank_score), ...].
     """
-    if not query or len(query.strip()) < 2:
+    params = _tsvector_params(document_version_id, query, scope, top_k)
+    if params is None:
         return []
-    q = query.strip().replace("'", "''")
-    stmt = text("""
-        SELECT nc.id, nc.chunk_id,
-               ts_rank(to_tsvector('english', COALESCE(nc.title, '') || ' ' || COALESCE(nc.text, '')),
-                       plainto_tsquery('english', :q)) AS rank
-        FROM note_chunks nc
-        WHERE nc.document_version_id = :dv_id AND nc.scope = :scope
-          AND to_tsvector('english', COALESCE(nc.title, '') || ' ' || COALESCE(nc.text, ''))
-              @@ plainto_tsquery('english', :q)
-        ORDER BY rank DESC
-        LIMIT :top_k
-    """)
-    rows = db.execute(stmt, {"q": q, "dv_id": str(document_version_id), "scope": scope, "top_k": top_k}).fetchall()
+    rows = db.execute(_TSVECTOR_SQL, params).fetchall()
+    return [(r[1], float(r[2] or 0)) for r in rows]
+
+
+async def search_notes_tsvector_async(
+    db: AsyncSession,
+    document_version_id: str,
+    query: str,
+    scope: str = "GROUP",
+    top_k: int = 5,
+) -> list[tuple[str, float]]:
+    """Async twin of search_notes_tsvector."""
+    params = _tsvector_params(document_version_id, query, scope, top_k)
+    if params is None:
+        return []
+    rows = (await db.execute(_TSVECTOR_SQL, params)).fetchall()
     return [(r[1], float(r[2] or 0)) for r in rows]
 
 
@@ -116,21 +277,83 @@ def search_notes_semantic(
         emb = get_embedding(query)
     except Exception:
         return []
-    if not emb or len(emb) != 1536:
+    params = _semantic_params(emb, document_version_id, scope, top_k)
+    if params is None:
         return []
+    rows = db.execute(_SEMANTIC_SQL, params).fetchall()
+    return [(r[0], float(r[1] or 0)) for r in rows]
 
-    stmt = text("""
-        SELECT chunk_id, 1 - (embedding <=> :emb::vector) AS similarity
-        FROM note_chunks
-        WHERE document_version_id = :dv_id AND scope = :scope AND embedding IS NOT NULL
-        ORDER BY embedding <=> :emb2::vector
-        LIMIT :top_k
-    """)
-    emb_str = "[" + ",".join(str(x) for x in emb) + "]"
-    rows = db.execute(stmt, {
-        "emb": emb_str, "emb2": emb_str,
-        "dv_id": str(document_version_id), "scope": scope, "top_k": top_k
-    }).fetchall()
+
+async def search_notes_semantic_async(
+    db: AsyncSession,
+    document_version_id: str,
+    query: str,
+    scope: str = "GROUP",
+    top_k: int = 5,
+) -> list[tuple[str, float]]:
+    """Async twin of search_notes_semantic. The embedding HTTP call runs off the event loop."""
+    try:
+        emb = await asyncio.to_thread(get_embedding, query)
+    except Exception:
+        return []
+    params = _semantic_params(emb, document_version_id, scope, top_k)
+    if params is None:
+        return []
+    rows = (await db.execute(_SEMANTIC_SQL, params)).fetchall()
+    return [(r[0], float(r[1] or 0)) for r in rows]
+
+
+def search_notes_hybrid_scored(
+    db: Session,
+    document_version_id: str,
+    query: str,
+    scope: str = "GROUP",
+    top_k: int = 5,
+    keyword_weight: float = 0.5,
+) -> list[tuple[str, float]]:
+    """
+    Hybrid search in one SQL statement (tsvector + vector, reciprocal-rank fusion).
+    Returns [(chunk_id, fused_score), ...]. Falls back to semantic ranks when the query is too short
+    for tsvector, and to keyword ranks without an embedding.
+    """
+    try:
+        emb = get_embedding(query)
+    except Exception:
+        emb = None
+    params = _hybrid_params(emb, document_version_id, query, scope, top_k, keyword_weight)
+    if params is None:
+        sem_params = _semantic_params(emb, document_version_id, scope, top_k)
+        if sem_params is not None:
+            rows = db.execute(_SEMANTIC_SQL, sem_params).fetchall()
+            return _rrf_single_list([(r[0], float(r[1] or 0)) for r in rows], top_k, 1 - keyword_weight)
+        ts = search_notes_tsvector(db, document_version_id, query, scope, top_k)
+        return _rrf_single_list(ts, top_k, keyword_weight)
+    rows = db.execute(_HYBRID_RRF_SQL, params).fetchall()
+    return [(r[0], float(r[1] or 0)) for r in rows]
+
+
+async def search_notes_hybrid_scored_async(
+    db: AsyncSession,
+    document_version_id: str,
+    query: str,
+    scope: str = "GROUP",
+    top_k: int = 5,
+    keyword_weight: float = 0.5,
+) -> list[tuple[str, float]]:
+    """Async twin of search_notes_hybrid_scored."""
+    try:
+        emb = await asyncio.to_thread(get_embedding, query)
+    except Exception:
+        emb = None
+    params = _hybrid_params(emb, document_version_id, query, scope, top_k, keyword_weight)
+    if params is None:
+        sem_params = _semantic_params(emb, document_version_id, scope, top_k)
+        if sem_params is not None:
+            rows = (await db.execute(_SEMANTIC_SQL, sem_params)).fetchall()
+            return _rrf_single_list([(r[0], float(r[1] or 0)) for r in rows], top_k, 1 - keyword_weight)
+        ts = await search_notes_tsvector_async(db, document_version_id, query, scope, top_k)
+        return _rrf_single_list(ts, top_k, keyword_weight)
+    rows = (await db.execute(_HYBRID_RRF_SQL, params)).fetchall()
     return [(r[0], float(r[1] or 0)) for r in rows]
 
 
@@ -145,26 +368,20 @@ def search_notes_hybrid(
     """
     Hybrid search: combine tsvector and semantic. Returns chunk_ids.
     """
-    results: dict[str, float] = {}
-    ts = search_notes_tsvector(db, document_version_id, query, scope, top_k * 2)
-    sem = search_notes_semantic(db, document_version_id, query, scope, top_k * 2)
+    return [cid for cid, _ in search_notes_hybrid_scored(db, document_version_id, query, scope, top_k, keyword_weight)]
 
-    # Normalize and combine (ts_rank and similarity have different scales)
-    def _norm(rows: list[tuple[str, float]]) -> dict[str, float]:
-        if not rows:
-            return {}
-        max_v = max(r[1] for r in rows)
-        return {r[0]: (r[1] / max_v if max_v else 0) for r in rows}
 
-    ts_scores = _norm(ts)
-    sem_scores = _norm(sem)
-    for cid, s in ts_scores.items():
-        results[cid] = results.get(cid, 0) + keyword_weight * s
-    for cid, s in sem_scores.items():
-        results[cid] = results.get(cid, 0) + (1 - keyword_weight) * s
-
-    sorted_ids = sorted(results.keys(), key=lambda x: -results[x])
-    return sorted_ids[:top_k]
+async def search_notes_hybrid_async(
+    db: AsyncSession,
+    document_version_id: str,
+    query: str,
+    scope: str = "GROUP",
+    top_k: int = 5,
+    keyword_weight: float = 0.5,
+) -> list[str]:
+    """Async twin of search_notes_hybrid."""
+    scored = await search_notes_hybrid_scored_async(db, document_version_id, query, scope, top_k, keyword_weight)
+    return [cid for cid, _ in scored]
 
 
 def search_notes_keyword(
@@ -176,26 +393,29 @@ def search_notes_keyword(
 ) -> list[str]:
     """
     Keyword search. Prefer search_notes_tsvector when available; this is fallback.
+    When tsvector finds nothing, ranks with the cached per-version BM25 index (notes_bm25).
     """
     ts = search_notes_tsvector(db, document_version_id, query, scope, top_k)
     if ts:
         return [r[0] for r in ts]
-    words = [w.lower() for w in query.split() if len(w) > 2]
-    if not words:
+    if not tokenize(query):
         return []
+    index = get_bm25_index(db, document_version_id, scope)
+    return [cid for cid, _ in index.search(query, top_k)]
 
-    all_chunks = db.query(NoteChunk).filter(
-        NoteChunk.document_version_id == document_version_id,
-        NoteChunk.scope == scope,
-    ).all()
-
-    scored: list[tuple[int, str]] = []
-    for nc in all_chunks:
-        txt = (nc.text or "").lower()
-        keywords = [str(k).lower() for k in (nc.keywords_json or [])]
-        score = sum(1 for w in words if w in txt or w in " ".join(keywords))
-        if score > 0:
-            scored.append((score, nc.chunk_id))
-
-    scored.sort(key=lambda x: -x[0])
-    return [c for _, c in scored[:top_k]]
+
+async def search_notes_keyword_async(
+    db: AsyncSession,
+    document_version_id: str,
+    query: str,
+    scope: str = "GROUP",
+    top_k: int = 5,
+) -> list[str]:
+    """Async twin of search_notes_keyword."""
+    ts = await search_notes_tsvector_async(db, document_version_id, query, scope, top_k)
+    if ts:
+        return [r[0] for r in ts]
+    if not tokenize(query):
+        return []
+    index = await get_bm25_index_async(db, document_version_id, scope)
+    return [cid for cid, _ in index.search(query, top_k)]
@@ -2,17 +2,19 @@
 from __future__ import annotations
 from datetime import date
 from typing import Any
-from app.services.financial_engine import get_fact, compute_ebitda
-from app.services.trend_engine import run_trend_engine
+from app.services.analysis_context import AnalysisContext
+from app.services.financial_engine import get_fact
+from app.services.metric_graph import MetricEvaluator
 from app.core.section_schema import score_to_rating
 
-def run_performance_engine(facts: dict[tuple[str, date], float], periods: list[date]) -> dict[str, Any]:
+def run_performance_engine(facts: dict[tuple[str, date], float], periods: list[date], metrics: MetricEvaluator | None = None, context: AnalysisContext | None = None) -> dict[str, Any]:
     block: dict[str, Any] = {"section_name": "Financial Performance Analysis", "key_metrics": {}, "score": 50.0, "section_rating": "Adequate", "risk_flags": [], "evidence_notes": ["Note 27: Depreciation", "Note 30: Operating expenses", "Note 33: Finance costs", "Note 34: Tax"], "llm_commentary": ""}
-    trend = run_trend_engine(facts, periods)
-    growth = trend.get("growth_diagnostics") or {}
-    quality = trend.get("quality_diagnostics") or {}
-    periods_sorted = sorted(periods, reverse=True)
-    latest = periods_sorted[0] if periods_sorted else None
+    ctx = AnalysisContext.ensure(facts, periods, context, metrics)
+    metrics = ctx.metrics
+    growth = ctx.trend.get("growth_diagnostics") or {}
+    quality = ctx.trend.get("quality_diagnostics") or {}
+    periods_sorted = ctx.periods_sorted
+    latest = ctx.latest
     if not latest:
         return block
     rev = get_fact(facts, "revenue", latest) or 0
@@ -20,7 +22,7 @@ def run_performance_engine(facts: dict[tuple[str, date], float], periods: list[d
     pat = get_fact(facts, "profit_after_tax", latest)
     cfo = get_fact(facts, "net_cfo", latest)
     capex = get_fact(facts, "capex", latest)
-    ebitda = compute_ebitda(facts, latest) or 0
+    ebitda = metrics.value("ebitda", latest) or 0
     margin = 100.0 * ebitda / rev if rev and rev > 0 else None
     rev_growth = growth.get("revenue_growth_pct")
     ebitda_growth = growth.get("ebitda_growth_pct")
@@ -30,7 +32,7 @@ def run_performance_engine(facts: dict[tuple[str, date], float], periods: list[d
     fcf = (cfo or 0) - (capex or 0)
     fcf_conversion = fcf / ebitda if ebitda and ebitda != 0 else None
     block["key_metrics"] = {"revenue": round(rev, 2), "revenue_growth_pct": round(rev_growth, 1) if rev_growth is not None else None, "ebitda_growth_pct": round(ebitda_growth, 1) if ebitda_growth is not None else None, "pat_growth_pct": round(pat_growth, 1) if pat_growth is not None else None, "ebitda_margin_pct": round(margin, 1) if margin is not None else None, "operating_profit": round(op, 2) if op is not None else None, "profit_after_tax": round(pat, 2) if pat is not None else None, "cfo_to_ebitda": round(cfo_to_ebitda, 2) if cfo_to_ebitda is not None else None, "fcf_conversion": round(fcf_conversion, 2) if fcf_conversion is not None else None}
-    block["by_period"] = {pe.isoformat(): {"revenue": get_fact(facts, "revenue", pe), "ebitda": compute_ebitda(facts, pe)} for pe in periods_sorted[:3]}
+    block["by_period"] = {pe.isoformat(): {"revenue": get_fact(facts, "revenue", pe), "ebitda": metrics.value("ebitda", pe)} for pe in periods_sorted[:3]}
     block["period"] = latest.isoformat()
     profit_score = 65.0 if margin and margin >= 5 else (55.0 if margin and margin >= 2 else 50.0)
     if op is not None and rev and op < 0:
@@ -0,0 +1,175 @@
+"""
+Portfolio-scale batch analysis: N companies' facts as one long-format table.
+
+The table (company_id, canonical_key, period_end, value) is pivoted once into a dense
+company x key x period cube (period axis = each company's own periods, latest first), and the
+financial engine metrics are computed for every company in one array pass (financial_matrix
+formulas broadcast over the company axis). Each company's MetricEvaluator is primed from those
+arrays, so the section engines, covenant and rating aggregation that follow read memoised values
+instead of recomputing them. Output per company is the run_full_analysis analysis_output shape.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from datetime import date
+from typing import Any, Iterable
+
+import numpy as np
+import pandas as pd
+
+from app.services.financial_matrix import compute_metric_arrays
+from app.services.metric_graph import MetricEvaluator
+
+logger = logging.getLogger(__name__)
+
+FACT_COLUMNS = ("company_id", "canonical_key", "period_end", "value")
+# Same window as the worker's full analysis (latest five periods)
+MAX_PERIODS = 5
+
+
+def _as_dates(col: pd.Series) -> pd.Series:
+    if pd.api.types.is_datetime64_any_dtype(col):
+        return col.dt.date
+    return col
+
+
+def _period_slots(company_codes: np.ndarray, period_end: pd.Series) -> np.ndarray:
+    """Dense rank of period_end within each company, latest first (slot 0 = latest period)."""
+    pe_codes, uniques = pd.factorize(period_end, sort=True)
+    n_pe = max(len(uniques), 1)
+    # One code per (company, period) pair, ordered by company then latest period first
+    pair = company_codes.astype(np.int64) * n_pe + (n_pe - 1 - pe_codes)
+    pairs, inverse = np.unique(pair, return_inverse=True)
+    pair_company = pairs // n_pe
+    first = np.searchsorted(pair_company, pair_company, side="left")
+    return (np.arange(len(pairs)) - first)[inverse]
+
+
+class PortfolioFacts:
+    """Dense float64 cube of fact values: companies x canonical keys x period slots (NaN = missing)."""
+
+    def __init__(self, table: pd.DataFrame, max_periods: int = MAX_PERIODS) -> None:
+        missing = [c for c in FACT_COLUMNS if c not in table.columns]
+        if missing:
+            raise ValueError(f"facts table missing columns: {missing}")
+        df = table.loc[:, list(FACT_COLUMNS)].dropna(subset=["value"])
+        df = df.assign(period_end=_as_dates(df["period_end"]), value=df["value"].astype(float))
+        df = df.drop_duplicates(subset=["company_id", "canonical_key", "period_end"], keep="last")
+
+        company_codes, self.company_ids = pd.factorize(df["company_id"])
+        key_codes, self.keys = pd.factorize(df["canonical_key"])
+        slot = _period_slots(company_codes, df["period_end"])
+        keep = slot < max_periods
+        company_codes, key_codes, slot = company_codes[keep], key_codes[keep], slot[keep]
+        df = df.loc[keep]
+
+        n_companies = len(self.company_ids)
+        self.key_index = {k: i for i, k in enumerate(self.keys)}
+        self.values = np.full((n_companies, len(self.keys), max_periods), np.nan)
+        self.values[company_codes, key_codes, slot] = df["value"].to_numpy()
+        self.period_ends = np.full((n_companies, max_periods), None, dtype=object)
+        self.period_ends[company_codes, slot] = df["period_end"].to_numpy()
+        self.n_periods = np.zeros(n_companies, dtype=np.int64)
+        np.maximum.at(self.n_periods, company_codes, slot + 1)
+        self._missing = np.full((n_companies, max_periods), np.nan)
+
+        # Per-company fact dicts in input row order (stable sort keeps it within each company)
+        order = np.argsort(company_codes, kind="stable")
+        bounds = np.searchsorted(company_codes[order], np.arange(n_companies + 1))
+        keys = df["canonical_key"].to_numpy()[order].tolist()
+        pes = df["period_end"].to_numpy()[order].tolist()
+        vals = df["value"].to_numpy()[order].tolist()
+        self._fact_slices = [(int(bounds[c]), int(bounds[c + 1])) for c in range(n_companies)]
+        self._facts_cols = (keys, pes, vals)
+
+    def __len__(self) -> int:
+        return len(self.company_ids)
+
+    def row(self, key: str) -> np.ndarray:
+        """(companies, periods) array for one canonical key; FactMatrix-compatible for compute_metric_arrays."""
+        i = self.key_index.get(key)
+        return self._missing if i is None else self.values[:, i, :]
+
+    def periods(self, c: int) -> list[date]:
+        return self.period_ends[c, : self.n_periods[c]].tolist()
+
+    def facts(self, c: int) -> dict[tuple[str, date], float]:
+        lo, hi = self._fact_slices[c]
+        keys, pes, vals = self._facts_cols
+        return dict(zip(zip(keys[lo:hi], pes[lo:hi]), vals[lo:hi]))
+
+
+def _primed_memos(cube: PortfolioFacts, arrays: dict[str, np.ndarray]) -> list[dict[tuple[str, date], float | None]]:
+    """Per-company memo dicts {(metric, period_end): value | None} from the portfolio metric arrays."""
+    lists = {k: v.tolist() for k, v in arrays.items()}
+    memos = []
+    for c in range(len(cube)):
+        memo: dict[tuple[str, date], float | None] = {}
+        for j, pe in enumerate(cube.periods(c)):
+            for key, rows in lists.items():
+                v = rows[c][j]
+                memo[(key, pe)] = v if v == v else None
+        memos.append(memo)
+    return memos
+
+
+def run_portfolio_analysis(
+    table: pd.DataFrame,
+    notes_by_company: dict[Any, dict] | None = None,
+    committed_facilities_by_company: dict[Any, dict[str, float]] | None = None,
+    company_names: dict[Any, str] | None = None,
+    max_periods: int = MAX_PERIODS,
+) -> dict[Any, dict[str, Any]]:
+    """
+    Full section-based analysis for every company in a long-format facts table.
+    table: columns company_id, canonical_key, period_end (date or datetime64), value.
+    Returns company_id -> analysis_output (same shape as analysis_orchestrator.run_full_analysis).
+    """
+    from app.services.analysis_orchestrator import run_full_analysis
+
+    t0 = time.perf_counter()
+    cube = PortfolioFacts(table, max_periods=max_periods)
+    arrays = compute_metric_arrays(cube)
+    memos = _primed_memos(cube, arrays)
+    t1 = time.perf_counter()
+
+    notes_by_company = notes_by_company or {}
+    committed_facilities_by_company = committed_facilities_by_company or {}
+    company_names = company_names or {}
+    results: dict[Any, dict[str, Any]] = {}
+    for c, company_id in enumerate(cube.company_ids):
+        facts = cube.facts(c)
+        metrics = MetricEvaluator(facts)
+        metrics.prime(memos[c])
+        results[company_id] = run_full_analysis(
+            facts=facts,
+            periods=cube.periods(c),
+            notes_json=notes_by_company.get(company_id),
+            committed_facilities=committed_facilities_by_company.get(company_id),
+            company_name=company_names.get(company_id, ""),
+            metrics=metrics,
+            # Per-company engines are too small for a pool hand-off to pay off; the batch is the unit of work
+            serial=True,
+        )
+    logger.info(
+        "portfolio_batch_analysis",
+        extra={
+            "event": "portfolio_batch_analysis",
+            "companies": len(cube),
+            "facts": int(np.count_nonzero(~np.isnan(cube.values))),
+            "metrics_ms": round((t1 - t0) * 1000, 1),
+            "sections_ms": round((time.perf_counter() - t1) * 1000, 1),
+        },
+    )
+    return results
+
+
+def facts_table_from_dicts(facts_by_company: dict[Any, dict[tuple[str, date], float]]) -> pd.DataFrame:
+    """Long-format table from per-company facts dicts (the shape run_full_analysis takes)."""
+    rows: Iterable[tuple] = (
+        (company_id, key, pe, value)
+        for company_id, facts in facts_by_company.items()
+        for (key, pe), value in facts.items()
+    )
+    return pd.DataFrame.from_records(list(rows), columns=list(FACT_COLUMNS))
@@ -2,11 +2,24 @@
 Rating & scorecard engine — config-driven, deterministic.
 Uses rating_config.json: quantitative bands + qualitative factors + overrides.
 Outputs: internal grade, PD band, rationale, rating drivers.
+run_rating and score_many use a CompiledScorecard (bands pre-sorted into edge arrays, bisect /
+searchsorted lookups), cached per process and recompiled when the config file's mtime or size
+changes (the reload logs old and new model version). The score_* functions below are the
+uncompiled reference over a raw config dict.
 """
+import bisect
 import json
+import logging
+import os
+import threading
 from pathlib import Path
 from typing import Any
 
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
 CONFIG_PATH = Path(__file__).resolve().parent.parent / "core" / "rating_config.json"
 
 
@@ -96,31 +109,226 @@ def apply_overrides(config: dict, grade: str, overrides_context: dict) -> str:
     return grade
 
 
+class _CompiledMetric:
+    """One quantitative metric's bands as ascending edges; score lookup matches score_quantitative."""
+
+    def __init__(self, m: dict) -> None:
+        self.key = m["key"]
+        self.weight = m["weight"]
+        self.lower_is_better = m.get("direction", "higher_is_better") == "lower_is_better"
+        bands = m.get("bands", [])
+        if self.lower_is_better:
+            # First band (stable order) with value <= max
+            ordered = sorted(bands, key=lambda b: b.get("max", 0))
+            self.edges = [b["max"] for b in ordered]
+            self.scores = [b["score"] for b in ordered]
+            self.fallback = self.scores[-1] if ordered else 50
+        else:
+            # First band (descending min, stable) with value >= min == last such band once reversed to ascending
+            ordered = sorted(bands, key=lambda b: b.get("min", 0), reverse=True)
+            self.fallback = ordered[-1]["score"] if ordered else 50
+            ordered = ordered[::-1]
+            self.edges = [b["min"] for b in ordered]
+            self.scores = [b["score"] for b in ordered]
+        self.edges_arr = np.asarray(self.edges, dtype=float)
+        # Slot len(edges) (or -1) is "no band matched"
+        self.scores_arr = np.asarray(self.scores + [self.fallback], dtype=float)
+
+    def score(self, value: float) -> Any:
+        if value != value:  # NaN matches no band
+            return self.fallback
+        if self.lower_is_better:
+            i = bisect.bisect_left(self.edges, value)
+            return self.scores[i] if i < len(self.scores) else self.fallback
+        i = bisect.bisect_right(self.edges, value) - 1
+        return self.scores[i] if i >= 0 else self.fallback
+
+    def score_array(self, values: np.ndarray) -> np.ndarray:
+        if self.lower_is_better:
+            idx = np.searchsorted(self.edges_arr, values, side="left")
+        else:
+            idx = np.searchsorted(self.edges_arr, values, side="right") - 1
+            idx = np.where(idx < 0, len(self.edges), idx)
+        idx = np.where(np.isnan(values), len(self.edges), idx)
+        return self.scores_arr[idx]
+
+
+class CompiledScorecard:
+    """rating_config parsed once: quantitative bands compiled, grade ranges and PD mapping resolved."""
+
+    def __init__(self, config: dict, fingerprint: tuple | None = None) -> None:
+        self.config = config
+        self.fingerprint = fingerprint
+        self.version = config.get("version")
+        q = config.get("quantitative", {})
+        self.quant_weight = q.get("weight", 0.65)
+        self.metrics = [_CompiledMetric(m) for m in q.get("metrics", [])]
+        ql = config.get("qualitative", {})
+        self.qual_weight = ql.get("weight", 0.35)
+        self.factors = [(f["key"], f["weight"], f.get("levels", {})) for f in ql.get("factors", [])]
+        scales = config.get("scales", {})
+        internal = scales.get("internal_scores", {})
+        self.grade_ranges = [(g, *internal.get(g, [0, 100])) for g in scales.get("grades", ["AAA", "AA", "A", "BBB", "BB", "B", "CCC"])]
+        outputs = config.get("outputs", {})
+        self.default_grade = outputs.get("default_grade", "BBB")
+        self.pd_mapping = outputs.get("pd_mapping", {})
+
+    def score_quantitative(self, metrics: dict[str, float]) -> tuple[float, dict]:
+        total_weight = 0.0
+        weighted_sum = 0.0
+        breakdown = {}
+        for m in self.metrics:
+            value = metrics.get(m.key)
+            if value is None:
+                continue
+            score = m.score(value)
+            weighted_sum += score * m.weight
+            total_weight += m.weight
+            breakdown[m.key] = {"value": value, "score": score, "weight": m.weight}
+        if total_weight == 0:
+            return 0.0, breakdown
+        return (weighted_sum / total_weight) * self.quant_weight, breakdown
+
+    def score_qualitative(self, factors: dict[str, str]) -> float:
+        total = 0.0
+        total_w = 0.0
+        for key, w, levels in self.factors:
+            total += levels.get(factors.get(key, "MED"), 65) * w
+            total_w += w
+        if total_w == 0:
+            return 0.0
+        return (total / total_w) * self.qual_weight
+
+    def grade(self, total_score: float) -> str:
+        for g, lo, hi in self.grade_ranges:
+            if lo <= total_score <= hi:
+                return g
+        return self.default_grade
+
+    def rate(
+        self,
+        metrics: dict[str, float],
+        qualitative: dict[str, str] | None = None,
+        overrides_context: dict | None = None,
+    ) -> dict[str, Any]:
+        qual = qualitative or {}
+        quant_score, quant_breakdown = self.score_quantitative(metrics)
+        qual_score = self.score_qualitative(qual)
+        total_score = quant_score + qual_score
+        grade = apply_overrides(self.config, self.grade(total_score), overrides_context or {})
+        return {
+            "rating_grade": grade,
+            "total_score": round(total_score, 2),
+            "quantitative_score": round(quant_score, 2),
+            "qualitative_score": round(qual_score, 2),
+            "score_breakdown": quant_breakdown,
+            "pd_band": self.pd_mapping.get(grade),
+            "rationale": {
+                "quantitative_breakdown": quant_breakdown,
+                "qualitative_factors": qual,
+            },
+        }
+
+    def score_many(
+        self,
+        metrics_table: pd.DataFrame,
+        qualitative: list[dict[str, str] | None] | None = None,
+        overrides_context: list[dict | None] | None = None,
+    ) -> pd.DataFrame:
+        """
+        Rate every row of metrics_table (columns = metric keys; missing column or NaN = not provided).
+        qualitative / overrides_context: optional per-row dicts in row order.
+        Returns a frame on the same index: quantitative_score, qualitative_score, total_score (rounded
+        as run_rating), rating_grade, pd_band.
+        """
+        n = len(metrics_table)
+        weighted_sum = np.zeros(n)
+        total_weight = np.zeros(n)
+        # Metric-by-metric accumulation keeps run_rating's summation order (adding 0.0 is exact)
+        for m in self.metrics:
+            if m.key not in metrics_table.columns:
+                continue
+            values = pd.to_numeric(metrics_table[m.key], errors="coerce").to_numpy(dtype=float)
+            present = ~np.isnan(values)
+            weighted_sum = weighted_sum + np.where(present, m.score_array(values) * m.weight, 0.0)
+            total_weight = total_weight + np.where(present, m.weight, 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            quant = np.where(total_weight == 0, 0.0, (weighted_sum / total_weight) * self.quant_weight)
+        if qualitative is None:
+            qual = np.full(n, self.score_qualitative({}))
+        else:
+            qual = np.array([self.score_qualitative(q or {}) for q in qualitative], dtype=float)
+        total = quant + qual
+        grades = np.full(n, self.default_grade, dtype=object)
+        unassigned = np.ones(n, dtype=bool)
+        for g, lo, hi in self.grade_ranges:
+            hit = unassigned & (lo <= total) & (total <= hi)
+            grades[hit] = g
+            unassigned &= ~hit
+        if overrides_context is not None:
+            grades = np.array([apply_overrides(self.config, g, ctx or {}) for g, ctx in zip(grades, overrides_context)], dtype=object)
+        return pd.DataFrame(
+            {
+                "quantitative_score": np.round(quant, 2),
+                "qualitative_score": np.round(qual, 2),
+                "total_score": np.round(total, 2),
+                "rating_grade": grades,
+                "pd_band": [self.pd_mapping.get(g) for g in grades],
+            },
+            index=metrics_table.index,
+        )
+
+
+_scorecard: CompiledScorecard | None = None
+_scorecard_lock = threading.Lock()
+
+
+def _config_fingerprint(path: Path) -> tuple:
+    st = os.stat(path)
+    return (str(path), st.st_mtime_ns, st.st_size)
+
+
+def get_scorecard(path: Path | None = None) -> CompiledScorecard:
+    """Process-wide compiled scorecard; one stat() per call, recompiled when the file changes."""
+    global _scorecard
+    path = Path(path or CONFIG_PATH)
+    fingerprint = _config_fingerprint(path)
+    current = _scorecard
+    if current is not None and current.fingerprint == fingerprint:
+        return current
+    with _scorecard_lock:
+        current = _scorecard
+        if current is not None and current.fingerprint == fingerprint:
+            return current
+        with open(path) as f:
+            config = json.load(f)
+        compiled = CompiledScorecard(config, fingerprint)
+        if current is not None and current.fingerprint and current.fingerprint[0] == fingerprint[0]:
+            logger.info(
+                "rating_scorecard_reloaded",
+                extra={
+                    "event": "rating_scorecard_reloaded",
+                    "old_version": current.version,
+                    "new_version": compiled.version,
+                    "version_changed": current.version != compiled.version,
+                },
+            )
+        _scorecard = compiled
+        return compiled
+
+
+def score_many(
+    metrics_table: pd.DataFrame,
+    qualitative: list[dict[str, str] | None] | None = None,
+    overrides_context: list[dict | None] | None = None,
+) -> pd.DataFrame:
+    """Batch run_rating over a metrics table (see CompiledScorecard.score_many)."""
+    return get_scorecard().score_many(metrics_table, qualitative, overrides_context)
+
+
 def run_rating(
     metrics: dict[str, float],
     qualitative: dict[str, str] | None = None,
     overrides_context: dict | None = None,
 ) -> dict[str, Any]:
-    config = load_config()
-    qual = qualitative or {}
-    overrides_context = overrides_context or {}
-    quant_score, quant_breakdown = score_quantitative(config, metrics)
-    qual_score = score_qualitative(config, qual)
-    total_score = quant_score + qual_score
-    grade = score_to_grade(config, total_score)
-    grade = apply_overrides(config, grade, overrides_context)
-    outputs = config.get("outputs", {})
-    pd_mapping = outputs.get("pd_mapping", {})
-    pd_band = pd_mapping.get(grade)
-    return {
-        "rating_grade": grade,
-        "total_score": round(total_score, 2),
-        "quantitative_score": round(quant_score, 2),
-        "qualitative_score": round(qual_score, 2),
-        "score_breakdown": quant_breakdown,
-        "pd_band": pd_band,
-        "rationale": {
-            "quantitative_breakdown": quant_breakdown,
-            "qualitative_factors": qual,
-        },
-    }
+    return get_scorecard().rate(metrics, qualitative, overrides_context)
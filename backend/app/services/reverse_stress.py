@@ -0,0 +1,157 @@
+"""
+Reverse stress: how far can a driver move before a covenant breaches?
+
+Closed-form inversion of the two ratios run_covenant_engine tests, on the latest period:
+leverage = net debt incl. leases / EBITDA (breach at >= leverage_max) and interest cover =
+EBITDA / cash interest (breach below interest_cover_min). Drivers:
+- ebitda_decline: EBITDA falls by a fraction x.
+- revenue_decline: revenue falls by x with cost of sales moving with it and other costs fixed, so
+  EBITDA loses x * gross profit (all of revenue when cost of sales is missing).
+- rate_rise_bps: interest on gross borrowings rises by b bps (interest cover only).
+A threshold of 0 means already in breach; None means the driver cannot cause that breach.
+solve_breakevens is array-valued, so portfolio_reverse_stress solves every company in one batch.
+"""
+from __future__ import annotations
+
+from datetime import date
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from app.services.covenant_engine import _parse_covenants
+from app.services.financial_engine import get_fact
+from app.services.financial_matrix import compute_metric_arrays
+from app.services.leverage_engine import cash_interest_expense
+from app.services.metric_graph import MetricEvaluator
+
+COVENANTS = ("leverage", "interest_cover")
+DRIVERS = ("ebitda_decline", "revenue_decline", "rate_rise_bps")
+
+
+def solve_breakevens(
+    ebitda: np.ndarray,
+    net_debt: np.ndarray,
+    interest: np.ndarray,
+    gross_debt: np.ndarray,
+    gross_profit: np.ndarray,
+    leverage_max: np.ndarray | float,
+    interest_cover_min: np.ndarray | float,
+) -> dict[str, dict[str, np.ndarray]]:
+    """Breakeven shock per covenant and driver (NaN where the driver cannot cause a breach)."""
+    e = np.asarray(ebitda, dtype=float)
+    nd = np.asarray(net_debt, dtype=float)
+    i = np.asarray(interest, dtype=float)
+    g = np.asarray(gross_debt, dtype=float)
+    gp = np.asarray(gross_profit, dtype=float)
+    nan = np.nan
+    out: dict[str, dict[str, np.ndarray]] = {}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # EBITDA at which each covenant is exactly met; a covenant only binds when its numerator is positive
+        required = {
+            "leverage": (nd / leverage_max, nd > 0),
+            "interest_cover": (interest_cover_min * i, i > 0),
+        }
+        for name, (e_req, binds) in required.items():
+            headroom = e - e_req
+            ok = binds & (headroom > 0)
+            ebitda_x = np.where(ok, headroom / e, 0.0)
+            revenue_x = np.where(ok, np.where(gp > 0, headroom / gp, nan), 0.0)
+            out[name] = {
+                "ebitda_decline": np.where(binds, ebitda_x, nan),
+                # Revenue cannot fall by more than 100%
+                "revenue_decline": np.where(binds & ~(revenue_x > 1), revenue_x, nan),
+                "rate_rise_bps": np.full(e.shape, nan),
+            }
+        rate = (e / interest_cover_min - i) / g * 10_000
+        out["interest_cover"]["rate_rise_bps"] = np.where(g > 0, np.maximum(0.0, rate), nan)
+    return out
+
+
+def _as_result(solved: dict[str, dict[str, np.ndarray]], j: int, leverage_max: float, interest_cover_min: float) -> dict[str, Any]:
+    result: dict[str, Any] = {"leverage_max": leverage_max, "interest_cover_min": interest_cover_min}
+    for name in COVENANTS:
+        row = {}
+        for driver in DRIVERS:
+            v = float(solved[name][driver][j])
+            row[driver] = None if np.isnan(v) else round(v, 1 if driver == "rate_rise_bps" else 4)
+        result[name] = row
+    declines = [result[n]["ebitda_decline"] for n in COVENANTS if result[n]["ebitda_decline"] is not None]
+    result["tightest_ebitda_decline"] = min(declines) if declines else None
+    result["tightest_covenant"] = (
+        min((n for n in COVENANTS if result[n]["ebitda_decline"] is not None), key=lambda n: result[n]["ebitda_decline"])
+        if declines else None
+    )
+    return result
+
+
+def reverse_stress(
+    facts: dict[tuple[str, date], float],
+    periods: list[date],
+    notes_json: dict | None = None,
+    metrics: MetricEvaluator | None = None,
+) -> dict[str, Any]:
+    """Breakevens for one company's latest period against its parsed covenant thresholds."""
+    if not periods:
+        return {}
+    metrics = metrics or MetricEvaluator(facts)
+    pe = max(periods)
+    covenants = _parse_covenants(notes_json or {})
+    revenue = get_fact(facts, "revenue", pe) or 0
+    cos = get_fact(facts, "cost_of_sales", pe)
+    gross_debt = sum(get_fact(facts, k, pe) or 0 for k in ("short_term_borrowings", "current_portion_long_term_debt", "long_term_borrowings"))
+    solved = solve_breakevens(
+        np.array([metrics.value("ebitda", pe) or 0]),
+        np.array([metrics.value("net_debt_incl_leases", pe) or 0]),
+        np.array([cash_interest_expense(facts, pe)]),
+        np.array([gross_debt]),
+        np.array([revenue - abs(cos) if cos is not None else revenue]),
+        covenants["leverage_max"],
+        covenants["interest_cover_min"],
+    )
+    result = _as_result(solved, 0, covenants["leverage_max"], covenants["interest_cover_min"])
+    result["period"] = pe.isoformat()
+    return result
+
+
+def portfolio_reverse_stress(
+    table: pd.DataFrame,
+    notes_by_company: dict[Any, dict] | None = None,
+) -> dict[Any, dict[str, Any]]:
+    """reverse_stress for every company in a long-format facts table (see portfolio_batch), in one solve."""
+    from app.services.portfolio_batch import PortfolioFacts
+
+    cube = PortfolioFacts(table)
+    if not len(cube):
+        return {}
+    notes_by_company = notes_by_company or {}
+    arrays = compute_metric_arrays(cube)
+
+    def latest(key: str) -> np.ndarray:
+        return cube.row(key)[:, 0]
+
+    def nz(x: np.ndarray) -> np.ndarray:
+        return np.where(np.isnan(x), 0.0, x)
+
+    fc, paid = nz(latest("finance_costs")), nz(latest("interest_paid"))
+    paid = np.where(paid != 0, paid, fc)
+    interest = np.where(paid < 0, np.abs(paid), np.where(fc < 0, np.abs(fc), 0.0))
+    revenue, cos = nz(latest("revenue")), latest("cost_of_sales")
+    parsed = [_parse_covenants(notes_by_company.get(c) or {}) for c in cube.company_ids]
+    lev_max = np.array([p["leverage_max"] for p in parsed], dtype=float)
+    ic_min = np.array([p["interest_cover_min"] for p in parsed], dtype=float)
+    solved = solve_breakevens(
+        nz(arrays["ebitda"][:, 0]),
+        nz(arrays["net_debt_incl_leases"][:, 0]),
+        interest,
+        nz(latest("short_term_borrowings")) + nz(latest("current_portion_long_term_debt")) + nz(latest("long_term_borrowings")),
+        np.where(np.isnan(cos), revenue, revenue - np.abs(cos)),
+        lev_max,
+        ic_min,
+    )
+    out = {}
+    for j, company_id in enumerate(cube.company_ids):
+        result = _as_result(solved, j, parsed[j]["leverage_max"], parsed[j]["interest_cover_min"])
+        result["period"] = cube.period_ends[j, 0].isoformat()
+        out[company_id] = result
+    return out
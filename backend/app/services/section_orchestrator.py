@@ -1,10 +1,16 @@
 """Section-Based Analysis Orchestrator. Runs 8 engines -> aggregation -> commentary."""
 from __future__ import annotations
 from datetime import date
+import logging
 from typing import Any
 
-def run_section_based_analysis(facts: dict[tuple[str, date], float], periods: list[date], notes_json: dict | None = None, committed_facilities: dict[str, float] | None = None, company_name: str = "", rating_grade_override: str | None = None) -> dict[str, Any]:
-    from app.services.financial_engine import run_engine
+logger = logging.getLogger(__name__)
+
+def section_engine_nodes(ctx: Any, notes_json: dict | None = None, committed_facilities: dict[str, float] | None = None) -> list:
+    """
+    The section engines as an engine_graph over one AnalysisContext. Independent engines run concurrently;
+    covenants waits for leverage, liquidity, stress and breakevens. Declaration order is the section_blocks order.
+    """
     from app.services.business_risk_engine import run_business_risk_engine
     from app.services.performance_engine import run_performance_engine
     from app.services.liquidity_section_engine import run_liquidity_section_engine
@@ -12,36 +18,93 @@ def run_section_based_analysis(facts: dict[tuple[str, date], float], periods: li
     from app.services.notes_validation_engine import run_accounting_quality_engine
     from app.services.stress_section_engine import run_stress_section_engine
     from app.services.covenant_engine import run_covenant_engine
+    from app.services.reverse_stress import reverse_stress
+    from app.services.engine_graph import EngineNode
+    from app.config import get_settings
+
+    facts, periods = ctx.facts, ctx.periods
+    latest = ctx.latest
+    draws = get_settings().stress_simulation_draws
+    simulation = None
+    if draws > 0:
+        from app.services.stress_simulation import SimulationParams
+        simulation = SimulationParams(draws=draws)
+
+    def accounting_quality(_: dict[str, Any]) -> dict[str, Any]:
+        ebitda = ctx.financial.get("ebitda", {}).get(latest.isoformat()) if latest else None
+        return run_accounting_quality_engine(notes_json, ctx.facts_by_period_iso, ebitda)
+
+    def covenants(done: dict[str, Any]) -> dict[str, Any]:
+        lev_block = done["leverage"].get("key_metrics") or {}
+        liq_block = done["liquidity"].get("key_metrics") or {}
+        return run_covenant_engine(
+            notes_json,
+            lev_block.get("net_debt_to_ebitda_incl_leases"),
+            lev_block.get("ebitda_to_interest"),
+            liq_block.get("undrawn_facilities"),
+            done["stress"].get("key_metrics", {}).get("scenarios") or {},
+            breakevens=done["breakevens"],
+        )
+
+    return [
+        EngineNode("business_risk", lambda _: run_business_risk_engine(facts, periods, notes_json, context=ctx)),
+        EngineNode("financial_performance", lambda _: run_performance_engine(facts, periods, context=ctx)),
+        EngineNode("liquidity", lambda _: run_liquidity_section_engine(facts, periods, committed_facilities, context=ctx)),
+        EngineNode("leverage", lambda _: run_leverage_section_engine(facts, periods, context=ctx)),
+        EngineNode("accounting_quality", accounting_quality),
+        EngineNode("stress", lambda _: run_stress_section_engine(facts, periods, simulation=simulation, notes_json=notes_json, context=ctx)),
+        EngineNode("breakevens", lambda _: reverse_stress(facts, periods, notes_json, ctx.metrics)),
+        EngineNode("covenants", covenants, deps=("leverage", "liquidity", "stress", "breakevens")),
+    ]
+
+
+def section_engines_serial(serial: bool | None = None) -> bool:
+    """
+    Explicit argument, else SECTION_ENGINES_SERIAL, else serial unless stress simulation is on: the other
+    engines are pure Python and lose more to pool hand-off under the GIL than they gain.
+    """
+    if serial is not None:
+        return serial
+    from app.config import get_settings
+
+    settings = get_settings()
+    if settings.section_engines_serial is not None:
+        return settings.section_engines_serial
+    return settings.stress_simulation_draws <= 0
+
+
+def aggregate_sections(section_blocks: dict[str, dict[str, Any]], notes_json: dict | None = None, rating_grade_override: str | None = None) -> dict[str, Any]:
+    """Weighted rating aggregation over finished section blocks (governance reads covenants and stress)."""
     from app.services.rating_aggregation_engine import run_rating_aggregation
-    from app.services.section_commentary import add_section_commentary
 
-    periods_sorted = sorted(periods, reverse=True)
-    latest = periods_sorted[0] if periods_sorted else None
-    facts_by_period_iso = {p.isoformat(): {k[0]: v for (k, v) in facts.items() if k[1] == p} for p in periods}
-    financial = run_engine(facts, periods)
-    ebitda = financial.get("ebitda", {}).get(latest.isoformat()) if latest else None
-
-    section_blocks: dict[str, dict[str, Any]] = {}
-    section_blocks["business_risk"] = run_business_risk_engine(facts, periods, notes_json)
-    section_blocks["financial_performance"] = run_performance_engine(facts, periods)
-    section_blocks["liquidity"] = run_liquidity_section_engine(facts, periods, committed_facilities)
-    section_blocks["leverage"] = run_leverage_section_engine(facts, periods)
-    section_blocks["accounting_quality"] = run_accounting_quality_engine(notes_json, facts_by_period_iso, ebitda)
-    section_blocks["stress"] = run_stress_section_engine(facts, periods)
     stress_raw = section_blocks.get("stress", {}).get("key_metrics", {}).get("scenarios") or {}
-    lev_block = section_blocks.get("leverage", {}).get("key_metrics") or {}
-    liq_block = section_blocks.get("liquidity", {}).get("key_metrics") or {}
-    section_blocks["covenants"] = run_covenant_engine(
-        notes_json,
-        lev_block.get("net_debt_to_ebitda_incl_leases"),
-        lev_block.get("ebitda_to_interest"),
-        liq_block.get("undrawn_facilities"),
-        stress_raw,
-    )
-
     aggregation = run_rating_aggregation(section_blocks, covenant_block=section_blocks.get("covenants"), stress_output={"scenarios": stress_raw}, notes_json=notes_json)
     if rating_grade_override:
         aggregation["rating_grade"] = rating_grade_override
+    return aggregation
+
+
+def run_section_based_analysis(facts: dict[tuple[str, date], float], periods: list[date], notes_json: dict | None = None, committed_facilities: dict[str, float] | None = None, company_name: str = "", rating_grade_override: str | None = None, metrics: Any = None, context: Any = None, serial: bool | None = None) -> dict[str, Any]:
+    from app.services.section_commentary import add_section_commentary
+    from app.services.analysis_context import AnalysisContext
+    from app.services.engine_graph import run_engine_graph
+    from app.config import get_settings
+
+    # One context per run: period views, the metric table and trend diagnostics are derived once and
+    # every engine reads them (EBITDA / net debt via the context's memoised metric graph)
+    ctx = context or AnalysisContext(facts, periods, metrics)
+    financial = ctx.financial
+    ctx.trend  # derive before fanning out so concurrent engines share one copy
+
+    settings = get_settings()
+    serial = section_engines_serial(serial)
+    nodes = section_engine_nodes(ctx, notes_json, committed_facilities)
+    results, timings = run_engine_graph(nodes, serial=serial, max_workers=settings.section_engine_workers)
+    ctx.engine_timings_ms = timings
+    logger.debug("section_engines", extra={"event": "section_engines", "serial": serial, "timings_ms": timings})
+    section_blocks: dict[str, dict[str, Any]] = {k: v for k, v in results.items() if k != "breakevens"}
+
+    aggregation = aggregate_sections(section_blocks, notes_json, rating_grade_override)
     add_section_commentary(section_blocks, aggregation, company_name)
 
-    return {"audit": {"periods": [p.isoformat() for p in periods]}, "section_blocks": section_blocks, "aggregation": aggregation, "financial": financial, "facts_by_period": facts_by_period_iso}
+    return {"audit": {"periods": [p.isoformat() for p in periods]}, "section_blocks": section_blocks, "aggregation": aggregation, "financial": financial, "facts_by_period": ctx.facts_by_period_iso}
@@ -7,21 +7,19 @@ from __future__ import annotations
 from datetime import date
 from typing import Any
 
-from app.services.financial_engine import (
-    get_fact,
-    compute_ebitda,
-    compute_net_debt_ex_leases,
-    compute_net_debt_incl_leases,
-)
+from app.services.financial_engine import get_fact
+from app.services.metric_graph import MetricEvaluator
 
 
 def run_stress_engine(
     facts: dict[tuple[str, date], float],
     periods: list[date],
+    metrics: MetricEvaluator | None = None,
 ) -> dict[str, Any]:
     """
     Run minimum stress scenarios. Recalculate EBITDA, interest cover, net debt/EBITDA.
     """
+    metrics = metrics or MetricEvaluator(facts)
     results: dict[str, Any] = {"scenarios": {}}
     for pe in sorted(periods, reverse=True)[:1]:  # Latest period
         pe_iso = pe.isoformat()
@@ -30,8 +28,8 @@ def run_stress_engine(
         da = get_fact(facts, "depreciation_amortisation", pe) or 0
         fc = get_fact(facts, "finance_costs", pe)
         finance_costs = abs(fc) if fc and fc < 0 else 0
-        ebitda = compute_ebitda(facts, pe) or 0
-        net_debt = compute_net_debt_incl_leases(facts, pe) or 0
+        ebitda = metrics.value("ebitda", pe) or 0
+        net_debt = metrics.value("net_debt_incl_leases", pe) or 0
 
         # Scenario A: Revenue -10%
         rev_shock = rev * 0.9
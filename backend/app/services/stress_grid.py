@@ -0,0 +1,255 @@
+"""
+Scenario-grid stress: the full Cartesian grid of revenue, margin, rate and working-capital shocks,
+evaluated as NumPy broadcasts over all periods.
+
+The stressed formulas generalise stress_engine's five scenarios: each legacy scenario is one grid
+point (LEGACY_GRID_POINTS) and gives the same numbers. Surfaces keep only the axes they depend on
+(axes: period, revenue, margin, rate, wc), e.g. ND/EBITDA does not vary with rate or working capital,
+so a 14k-point grid stores ~1.7k values per period for its largest surface; StressSurfaces.full()
+broadcasts on demand. stress_kernel is shared with the Monte Carlo simulation (stress_simulation).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Iterable
+
+import numpy as np
+
+from app.services.financial_engine import get_fact
+from app.services.metric_graph import MetricEvaluator
+
+
+@dataclass(frozen=True)
+class ShockGrid:
+    """Shock axes. revenue_pct and wc_pct are fractions (-0.10 = revenue -10%); margin/rate in bps."""
+
+    revenue_pct: np.ndarray
+    margin_bps: np.ndarray
+    rate_bps: np.ndarray
+    wc_pct: np.ndarray
+
+    @classmethod
+    def build(
+        cls,
+        revenue_pct: Iterable[float] = (0.0,),
+        margin_bps: Iterable[float] = (0.0,),
+        rate_bps: Iterable[float] = (0.0,),
+        wc_pct: Iterable[float] = (0.0,),
+    ) -> "ShockGrid":
+        axes = [np.asarray(list(a), dtype=float).ravel() for a in (revenue_pct, margin_bps, rate_bps, wc_pct)]
+        if any(a.size == 0 for a in axes):
+            raise ValueError("every shock axis needs at least one value")
+        return cls(*axes)
+
+    @property
+    def shape(self) -> tuple[int, int, int, int]:
+        return (self.revenue_pct.size, self.margin_bps.size, self.rate_bps.size, self.wc_pct.size)
+
+    @property
+    def size(self) -> int:
+        return int(np.prod(self.shape))
+
+
+# 13 x 11 x 11 x 9 = 14,157 combinations
+DEFAULT_GRID = ShockGrid.build(
+    revenue_pct=np.linspace(-0.30, 0.0, 13),
+    margin_bps=np.linspace(-500, 0, 11),
+    rate_bps=np.linspace(0, 500, 11),
+    wc_pct=np.linspace(0.0, 0.20, 9),
+)
+
+# stress_engine's scenarios A-E as (revenue_pct, margin_bps, rate_bps, wc_pct)
+LEGACY_GRID_POINTS: dict[str, tuple[float, float, float, float]] = {
+    "A_revenue_minus_10pct": (-0.10, 0.0, 0.0, 0.0),
+    "B_interest_plus_200bps": (0.0, 0.0, 200.0, 0.0),
+    "C_working_capital_shock": (0.0, 0.0, 0.0, 0.10),
+    "D_margin_compression_200bps": (0.0, -200.0, 0.0, 0.0),
+    "E_combined": (-0.10, 0.0, 200.0, 0.0),
+}
+
+
+@dataclass(frozen=True)
+class StressBase:
+    """Unstressed inputs per period (latest first); missing facts read as 0, as in stress_engine."""
+
+    periods: list[date]
+    revenue: np.ndarray
+    operating_profit: np.ndarray
+    ebitda: np.ndarray
+    margin_pct: np.ndarray
+    finance_costs: np.ndarray  # positive interest expense; 0 for net finance income
+    gross_debt: np.ndarray
+    net_debt: np.ndarray
+    cash: np.ndarray
+    st_debt: np.ndarray
+
+
+def stress_base(
+    facts: dict[tuple[str, date], float],
+    periods: list[date],
+    metrics: MetricEvaluator | None = None,
+) -> StressBase:
+    metrics = metrics or MetricEvaluator(facts)
+    ps = sorted(periods, reverse=True)
+
+    def col(key: str) -> np.ndarray:
+        return np.array([get_fact(facts, key, pe) or 0 for pe in ps], dtype=float)
+
+    revenue = col("revenue")
+    ebitda = np.array([metrics.value("ebitda", pe) or 0 for pe in ps], dtype=float)
+    fc = col("finance_costs")
+    st = col("short_term_borrowings") + col("current_portion_long_term_debt")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        margin = np.where(revenue > 0, ebitda / revenue * 100, 0.0)
+    return StressBase(
+        periods=ps,
+        revenue=revenue,
+        operating_profit=col("operating_profit"),
+        ebitda=ebitda,
+        margin_pct=margin,
+        finance_costs=np.where(fc < 0, np.abs(fc), 0.0),
+        gross_debt=st + col("long_term_borrowings"),
+        net_debt=np.array([metrics.value("net_debt_incl_leases", pe) or 0 for pe in ps], dtype=float),
+        cash=col("cash_and_cash_equivalents"),
+        st_debt=st,
+    )
+
+
+def stress_kernel(
+    base: StressBase,
+    revenue_pct: np.ndarray | float,
+    margin_bps: np.ndarray | float,
+    rate_bps: np.ndarray | float,
+    expand: tuple[int, ...] = (),
+) -> dict[str, np.ndarray]:
+    """
+    Stressed EBITDA, finance costs, interest cover and ND/EBITDA (NaN where undefined) for broadcastable shocks.
+    Base arrays are reshaped to (P, 1, ..., 1) with len(expand) trailing axes, so shocks shaped to
+    those axes broadcast against every period. The margin shock floors the margin at 0 (scenario D);
+    with no margin shock a zero-margin company falls back to EBITDA x (1 + revenue shock) (scenario A).
+    """
+    tail = (1,) * len(expand)
+
+    def b(x: np.ndarray) -> np.ndarray:
+        return x.reshape((-1,) + tail)
+
+    rev, op, ebitda, margin = b(base.revenue), b(base.operating_profit), b(base.ebitda), b(base.margin_pct)
+    fc, gross, net_debt = b(base.finance_costs), b(base.gross_debt), b(base.net_debt)
+    r = np.asarray(revenue_pct, dtype=float)
+    m = np.asarray(margin_bps, dtype=float)
+    rate = np.asarray(rate_bps, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shocked_margin = m != 0
+        margin_s = np.where(shocked_margin, np.maximum(0.0, margin + m / 100), margin)
+        rev_s = rev * (1 + r)
+        ebitda_s = np.where(~shocked_margin & (margin == 0), ebitda * (1 + r), rev_s * (margin_s / 100))
+        # EBIT moves with revenue and, under a margin shock, in proportion to the margin
+        scale = np.where(shocked_margin, np.where(margin > 0, margin_s / margin, np.nan), 1.0)
+        ebit_s = op * (1 + r) * scale
+        fc_s = fc + gross * (rate / 10_000)
+        interest_cover = np.where(fc_s > 0, ebit_s / fc_s, np.nan)
+        nd_ebitda = np.where(ebitda_s > 0, net_debt / ebitda_s, np.nan)
+    return {
+        "ebitda_stressed": ebitda_s,
+        "finance_costs_stressed": fc_s,
+        "interest_cover": interest_cover,
+        "net_debt_to_ebitda": nd_ebitda,
+    }
+
+
+@dataclass(frozen=True)
+class StressSurfaces:
+    """Compact surfaces over axes (period, revenue, margin, rate, wc); size-1 axes broadcast."""
+
+    periods: list[date]
+    grid: ShockGrid
+    ebitda_stressed: np.ndarray  # (P, R, M, 1, 1)
+    interest_cover: np.ndarray  # (P, R, M, I, 1)
+    net_debt_to_ebitda: np.ndarray  # (P, R, M, 1, 1)
+    cash_after_shock: np.ndarray  # (P, 1, 1, 1, W)
+    st_debt_to_cash: np.ndarray  # (P, 1, 1, 1, W)
+
+    def full(self, name: str) -> np.ndarray:
+        """Read-only view of one surface broadcast to the full (P, R, M, I, W) grid."""
+        return np.broadcast_to(getattr(self, name), (len(self.periods),) + self.grid.shape)
+
+    def at(self, period_index: int, revenue_pct: float, margin_bps: float, rate_bps: float, wc_pct: float) -> dict[str, float | None]:
+        """Surface values at one grid point (each shock must be on its axis)."""
+        idx = [
+            int(np.flatnonzero(np.isclose(axis, v))[0])
+            for axis, v in zip(
+                (self.grid.revenue_pct, self.grid.margin_bps, self.grid.rate_bps, self.grid.wc_pct),
+                (revenue_pct, margin_bps, rate_bps, wc_pct),
+            )
+        ]
+        out = {}
+        for name in ("ebitda_stressed", "interest_cover", "net_debt_to_ebitda", "cash_after_shock", "st_debt_to_cash"):
+            arr = getattr(self, name)[period_index]
+            v = float(arr[tuple(i if n > 1 else 0 for i, n in zip(idx, arr.shape))])
+            out[name] = None if np.isnan(v) else v
+        return out
+
+
+def run_stress_grid(
+    facts: dict[tuple[str, date], float],
+    periods: list[date],
+    grid: ShockGrid = DEFAULT_GRID,
+    metrics: MetricEvaluator | None = None,
+) -> StressSurfaces:
+    """Evaluate every grid combination for every period (latest first) in one broadcast."""
+    base = stress_base(facts, periods, metrics)
+    expand = (1, 1, 1, 1)
+    k = stress_kernel(
+        base,
+        grid.revenue_pct[:, None, None, None],
+        grid.margin_bps[None, :, None, None],
+        grid.rate_bps[None, None, :, None],
+        expand=expand,
+    )
+    cash = base.cash.reshape(-1, 1, 1, 1, 1)
+    cash_after = cash - base.revenue.reshape(-1, 1, 1, 1, 1) * grid.wc_pct[None, None, None, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        st_to_cash = np.where(cash_after > 0, base.st_debt.reshape(-1, 1, 1, 1, 1) / cash_after, np.nan)
+    return StressSurfaces(
+        periods=base.periods,
+        grid=grid,
+        ebitda_stressed=k["ebitda_stressed"],
+        interest_cover=k["interest_cover"],
+        net_debt_to_ebitda=k["net_debt_to_ebitda"],
+        cash_after_shock=cash_after,
+        st_debt_to_cash=st_to_cash,
+    )
+
+
+def summarise_surfaces(
+    surfaces: StressSurfaces,
+    period_index: int = 0,
+    ic_floor: float = 2.0,
+    nd_cap: float = 3.0,
+) -> dict[str, Any]:
+    """Compact summary for one period (default latest): extremes and share of grid points breaching."""
+    if not surfaces.periods:
+        return {}
+    ic = surfaces.interest_cover[period_index]
+    nd = surfaces.net_debt_to_ebitda[period_index]
+    cash = surfaces.cash_after_shock[period_index]
+
+    def nan_extreme(fn, arr: np.ndarray) -> float | None:
+        return round(float(fn(arr)), 2) if np.isfinite(arr).any() else None
+
+    # Shares over a compact surface equal shares over the full grid: broadcast axes repeat cells evenly
+
+    return {
+        "period": surfaces.periods[period_index].isoformat(),
+        "grid_shape": list(surfaces.grid.shape),
+        "combinations": surfaces.grid.size,
+        "min_interest_cover": nan_extreme(np.nanmin, ic),
+        "max_net_debt_to_ebitda": nan_extreme(np.nanmax, nd),
+        "min_cash_after_shock": nan_extreme(np.nanmin, cash),
+        "share_interest_cover_below_floor": round(float(np.mean(ic < ic_floor)), 4),
+        "share_net_debt_to_ebitda_above_cap": round(float(np.mean(nd > nd_cap)), 4),
+        "share_cash_negative": round(float(np.mean(cash < 0)), 4),
+        "ic_floor": ic_floor,
+        "nd_cap": nd_cap,
+    }
@@ -2,14 +2,24 @@
 from __future__ import annotations
 from datetime import date
 from typing import Any
+from app.services.analysis_context import AnalysisContext
 from app.services.stress_engine import run_stress_engine
+from app.services.metric_graph import MetricEvaluator
+from app.services.stress_grid import ShockGrid, run_stress_grid, summarise_surfaces
+from app.services.stress_simulation import SimulationParams, simulate_breach_probability
 from app.core.section_schema import score_to_rating
 
-def run_stress_section_engine(facts: dict[tuple[str, date], float], periods: list[date]) -> dict[str, Any]:
+def run_stress_section_engine(facts: dict[tuple[str, date], float], periods: list[date], metrics: MetricEvaluator | None = None, grid: ShockGrid | None = None, simulation: SimulationParams | None = None, notes_json: dict | None = None, context: AnalysisContext | None = None) -> dict[str, Any]:
     block: dict[str, Any] = {"section_name": "Stress Testing & Downside Analysis", "key_metrics": {}, "score": 50.0, "section_rating": "Adequate", "risk_flags": [], "evidence_notes": [], "llm_commentary": ""}
-    stress = run_stress_engine(facts, periods)
+    metrics = AnalysisContext.ensure(facts, periods, context, metrics).metrics
+    stress = run_stress_engine(facts, periods, metrics)
     scenarios = stress.get("scenarios") or {}
     block["key_metrics"] = {"scenarios": scenarios}
+    if grid is not None and periods:
+        # Grid summary is informational; scoring below still uses the legacy five scenarios
+        block["key_metrics"]["scenario_grid"] = summarise_surfaces(run_stress_grid(facts, periods, grid, metrics))
+    if simulation is not None and periods:
+        block["key_metrics"]["breach_probability"] = simulate_breach_probability(facts, periods, notes_json, simulation, metrics)
     block["by_period"] = scenarios
     resilience_score = 70.0
     for name, sc in scenarios.items():
@@ -0,0 +1,139 @@
+"""
+Monte Carlo downside simulation: probability of covenant breach under correlated shocks.
+
+Revenue growth, EBITDA margin and interest-rate shocks are drawn as correlated normals (Cholesky of
+SimulationParams.correlation), seeded, over a horizon of annual steps: revenue compounds, margin and
+rate shocks accumulate. Each step is evaluated with stress_grid.stress_kernel on the latest period,
+and a path breaches if any step breaches the thresholds from covenant_engine._parse_covenants
+(ND/EBITDA >= leverage_max, interest cover < interest_cover_min, same rules as run_covenant_engine).
+Draws are generated and evaluated in fixed-size chunks, so memory is bounded by chunk_size and results
+do not depend on it (the generator stream is consumed in the same order).
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, fields
+from datetime import date
+from typing import Any, Iterator
+
+import numpy as np
+
+from app.services.covenant_engine import _parse_covenants
+from app.services.metric_graph import MetricEvaluator
+from app.services.stress_grid import StressBase, stress_base, stress_kernel
+
+
+@dataclass(frozen=True)
+class SimulationParams:
+    draws: int = 100_000
+    seed: int = 0
+    horizon_years: int = 1
+    chunk_size: int = 25_000
+    # Annual shock means and standard deviations: revenue growth (fraction), margin (bps), rate (bps)
+    mean: tuple[float, float, float] = (0.0, 0.0, 0.0)
+    stdev: tuple[float, float, float] = (0.10, 150.0, 150.0)
+    # Correlation of (revenue, margin, rate): downturns compress margins and coincide with tighter rates
+    correlation: tuple[tuple[float, float, float], ...] = (
+        (1.0, 0.6, -0.2),
+        (0.6, 1.0, -0.2),
+        (-0.2, -0.2, 1.0),
+    )
+
+
+def _cholesky(params: SimulationParams) -> np.ndarray:
+    corr = np.asarray(params.correlation, dtype=float)
+    if corr.shape != (3, 3) or not np.allclose(corr, corr.T):
+        raise ValueError("correlation must be a symmetric 3x3 matrix")
+    try:
+        return np.linalg.cholesky(corr) * np.asarray(params.stdev, dtype=float)[:, None]
+    except np.linalg.LinAlgError as e:
+        raise ValueError("correlation matrix is not positive definite") from e
+
+
+def iter_breach_chunks(
+    base: StressBase,
+    leverage_max: float,
+    interest_cover_min: float,
+    params: SimulationParams = SimulationParams(),
+) -> Iterator[dict[str, np.ndarray]]:
+    """
+    Yield per-chunk boolean arrays (leverage, interest_cover, any) of length <= chunk_size, one entry
+    per simulated path, plus the terminal-step ND/EBITDA and interest cover (NaN where undefined).
+    """
+    if not base.periods:
+        return
+    latest = StressBase(**{f.name: getattr(base, f.name)[:1] for f in fields(StressBase)})
+    rng = np.random.default_rng(params.seed)
+    scale = _cholesky(params)
+    mean = np.asarray(params.mean, dtype=float)
+    horizon = max(1, params.horizon_years)
+    remaining = params.draws
+    while remaining > 0:
+        n = min(params.chunk_size, remaining)
+        remaining -= n
+        z = rng.standard_normal((n, horizon, 3))
+        shocks = mean + z @ scale.T
+        revenue_factor = np.cumprod(1 + shocks[..., 0], axis=1)
+        margin_bps = np.cumsum(shocks[..., 1], axis=1)
+        rate_bps = np.cumsum(shocks[..., 2], axis=1)
+        k = stress_kernel(latest, revenue_factor - 1, margin_bps, rate_bps, expand=(n, horizon))
+        nd, ic = k["net_debt_to_ebitda"][0], k["interest_cover"][0]
+        net_debt = latest.net_debt[0]
+        # Undefined ratios count as breaches when they are undefined for the wrong reason:
+        # non-positive EBITDA with debt outstanding, or interest due with no measurable EBIT cover
+        lev = (nd >= leverage_max) | (np.isnan(nd) & (net_debt > 0))
+        cov = (ic < interest_cover_min) | (np.isnan(ic) & (k["finance_costs_stressed"][0] > 0))
+        lev_path, cov_path = lev.any(axis=1), cov.any(axis=1)
+        yield {
+            "leverage": lev_path,
+            "interest_cover": cov_path,
+            "any": lev_path | cov_path,
+            "terminal_net_debt_to_ebitda": nd[:, -1],
+            "terminal_interest_cover": ic[:, -1],
+        }
+
+
+def simulate_breach_probability(
+    facts: dict[tuple[str, date], float],
+    periods: list[date],
+    notes_json: dict | None = None,
+    params: SimulationParams = SimulationParams(),
+    metrics: MetricEvaluator | None = None,
+) -> dict[str, Any]:
+    """Breach probabilities (with Monte Carlo standard errors) against the parsed covenant thresholds."""
+    covenants = _parse_covenants(notes_json or {})
+    lev_max, ic_min = covenants["leverage_max"], covenants["interest_cover_min"]
+    base = stress_base(facts, periods, metrics)
+    counts = {"leverage": 0, "interest_cover": 0, "any": 0}
+    nd_sum = ic_sum = 0.0
+    nd_n = ic_n = 0
+    n = 0
+    for chunk in iter_breach_chunks(base, lev_max, ic_min, params):
+        n += len(chunk["any"])
+        for key in counts:
+            counts[key] += int(chunk[key].sum())
+        nd, ic = chunk["terminal_net_debt_to_ebitda"], chunk["terminal_interest_cover"]
+        nd_sum += float(np.nansum(nd))
+        nd_n += int(np.count_nonzero(~np.isnan(nd)))
+        ic_sum += float(np.nansum(ic))
+        ic_n += int(np.count_nonzero(~np.isnan(ic)))
+    if n == 0:
+        return {}
+
+    def prob(key: str) -> dict[str, float]:
+        p = counts[key] / n
+        return {"probability": round(p, 4), "std_error": round(math.sqrt(p * (1 - p) / n), 4)}
+
+    return {
+        "period": base.periods[0].isoformat(),
+        "draws": n,
+        "seed": params.seed,
+        "horizon_years": max(1, params.horizon_years),
+        "leverage_max": lev_max,
+        "interest_cover_min": ic_min,
+        "leverage_breach": prob("leverage"),
+        "interest_cover_breach": prob("interest_cover"),
+        "any_breach": prob("any"),
+        "mean_terminal_net_debt_to_ebitda": round(nd_sum / nd_n, 2) if nd_n else None,
+        "mean_terminal_interest_cover": round(ic_sum / ic_n, 2) if ic_n else None,
+    }
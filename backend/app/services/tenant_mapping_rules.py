@@ -0,0 +1,133 @@
+"""
+Track 3A: Tenant MappingRule engine.
+
+MappingRule rows (created from the unmapped queue or manual overrides) are compiled into a
+priority-ordered, per-tenant rule set that run_mapping consults before the built-in synonyms:
+- pattern is the lower-cased raw label; it matches the normalised label exactly.
+- scope "per_document_version" rules apply only to scope_entity_id and beat tenant-wide ("global")
+  rules; within a scope the higher priority wins, then the older rule (stable: created_at, id).
+
+Compiled sets are cached per (tenant_id, rules_version). The version is a fingerprint of the tenant's
+rules (row count + max(updated_at)), so writing, editing or deleting a rule bumps it and workers reload
+lazily on their next run: one indexed aggregate query per run, never a query per label.
+"""
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Iterable
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.mapping_rule import MappingRule
+from app.services.label_matcher import normalize_label
+
+TENANT_RULE_METHOD = "TENANT_RULE"
+SCOPE_GLOBAL = "global"
+SCOPE_DOCUMENT_VERSION = "per_document_version"
+
+RuleTarget = tuple[str, bool]
+
+
+@dataclass(frozen=True)
+class TenantRuleSet:
+    tenant_id: str
+    version: str
+    global_rules: dict[str, RuleTarget] = field(default_factory=dict)
+    document_rules: dict[str, dict[str, RuleTarget]] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.global_rules) + sum(len(r) for r in self.document_rules.values())
+
+    def match(self, raw_label: str, document_version_id: str | None = None) -> tuple[str, str, bool] | None:
+        """Return (canonical_key, TENANT_RULE, is_expense) if a tenant rule applies, else None."""
+        normalized = normalize_label(raw_label)
+        if document_version_id is not None:
+            hit = self.document_rules.get(str(document_version_id), {}).get(normalized)
+            if hit is not None:
+                return hit[0], TENANT_RULE_METHOD, hit[1]
+        hit = self.global_rules.get(normalized)
+        if hit is not None:
+            return hit[0], TENANT_RULE_METHOD, hit[1]
+        return None
+
+
+def compile_tenant_rules(tenant_id: str, version: str, rules: Iterable[Any]) -> TenantRuleSet:
+    """Compile MappingRule rows (or row-likes) into lookup maps; first rule in priority order wins."""
+    ordered = sorted(
+        rules,
+        key=lambda r: (-(r.priority if r.priority is not None else 100), str(r.created_at or ""), str(r.id)),
+    )
+    global_rules: dict[str, RuleTarget] = {}
+    document_rules: dict[str, dict[str, RuleTarget]] = {}
+    for r in ordered:
+        pattern = normalize_label(r.pattern)
+        if not pattern or not r.canonical_key:
+            continue
+        target = (r.canonical_key, bool(r.is_expense))
+        if r.scope == SCOPE_DOCUMENT_VERSION and r.scope_entity_id is not None:
+            document_rules.setdefault(str(r.scope_entity_id), {}).setdefault(pattern, target)
+        elif r.scope == SCOPE_GLOBAL:
+            global_rules.setdefault(pattern, target)
+    return TenantRuleSet(str(tenant_id), version, global_rules, document_rules)
+
+
+_lock = threading.Lock()
+_cache: dict[str, TenantRuleSet] = {}
+
+
+def invalidate_tenant_rules(tenant_id: str) -> None:
+    """Drop this process's compiled set for a tenant (other processes pick up the new version lazily)."""
+    with _lock:
+        _cache.pop(str(tenant_id), None)
+
+
+def _version_stmt(tenant_id: str):
+    return select(func.count(MappingRule.id), func.max(MappingRule.updated_at)).where(
+        MappingRule.tenant_id == tenant_id
+    )
+
+
+def _rules_stmt(tenant_id: str):
+    return select(MappingRule).where(MappingRule.tenant_id == tenant_id)
+
+
+def _version(row: Any) -> str:
+    count, max_updated = row
+    return f"{int(count or 0)}-{max_updated.isoformat() if max_updated else 'none'}"
+
+
+def _cached(tenant_id: str, version: str) -> TenantRuleSet | None:
+    with _lock:
+        rule_set = _cache.get(tenant_id)
+    return rule_set if rule_set is not None and rule_set.version == version else None
+
+
+def _store(rule_set: TenantRuleSet) -> TenantRuleSet:
+    with _lock:
+        _cache[rule_set.tenant_id] = rule_set
+    return rule_set
+
+
+def get_tenant_rules(db: Session, tenant_id: str) -> TenantRuleSet:
+    """Compiled rule set for tenant_id, reloaded only when its rules_version changed."""
+    tenant_id = str(tenant_id)
+    version = _version(db.execute(_version_stmt(tenant_id)).one())
+    rule_set = _cached(tenant_id, version)
+    if rule_set is not None:
+        return rule_set
+    rules = db.execute(_rules_stmt(tenant_id)).scalars().all()
+    return _store(compile_tenant_rules(tenant_id, version, rules))
+
+
+async def get_tenant_rules_async(db: AsyncSession, tenant_id: str) -> TenantRuleSet:
+    """Async twin of get_tenant_rules."""
+    tenant_id = str(tenant_id)
+    version = _version((await db.execute(_version_stmt(tenant_id))).one())
+    rule_set = _cached(tenant_id, version)
+    if rule_set is not None:
+        return rule_set
+    rules = (await db.execute(_rules_stmt(tenant_id))).scalars().all()
+    return _store(compile_tenant_rules(tenant_id, version, rules))
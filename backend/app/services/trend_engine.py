@@ -2,19 +2,21 @@
 from __future__ import annotations
 from datetime import date
 from typing import Any
-from app.services.financial_engine import get_fact, compute_ebitda, compute_net_debt_ex_leases, compute_net_debt_incl_leases
+from app.services.financial_engine import get_fact
+from app.services.metric_graph import MetricEvaluator
 
 def _pct(c: float, p: float):
     return 100.0 * (c - p) / abs(p) if p and p != 0 else None
 
-def run_trend_engine(facts, periods):
+def run_trend_engine(facts, periods, metrics: MetricEvaluator | None = None):
+    metrics = metrics or MetricEvaluator(facts)
     ps = sorted(periods, reverse=True)
     if len(ps) < 2:
         return {"growth_diagnostics": {}, "balance_sheet_diagnostics": {}, "quality_diagnostics": {}}
     l, p = ps[0], ps[1]
     rc = get_fact(facts, "revenue", l) or 0
     rp = get_fact(facts, "revenue", p) or 0
-    ec, ep = compute_ebitda(facts, l), compute_ebitda(facts, p)
+    ec, ep = metrics.value("ebitda", l), metrics.value("ebitda", p)
     pac = get_fact(facts, "profit_after_tax", l)
     pap = get_fact(facts, "profit_after_tax", p)
     cfoc, cfop = get_fact(facts, "net_cfo", l), get_fact(facts, "net_cfo", p)
@@ -34,10 +36,10 @@ def run_trend_engine(facts, periods):
     wcp = sum(get_fact(facts, k, p) or 0 for k in wck)
     growth["working_capital_movement"] = wcc - wcp
     growth["working_capital_movement_pct"] = _pct(wcc, wcp) if wcp else None
-    ndec = compute_net_debt_ex_leases(facts, l)
-    ndep = compute_net_debt_ex_leases(facts, p)
-    ndic = compute_net_debt_incl_leases(facts, l)
-    ndip = compute_net_debt_incl_leases(facts, p)
+    ndec = metrics.value("net_debt_ex_leases", l)
+    ndep = metrics.value("net_debt_ex_leases", p)
+    ndic = metrics.value("net_debt_incl_leases", l)
+    ndip = metrics.value("net_debt_incl_leases", p)
     tac, tap = get_fact(facts, "total_assets", l), get_fact(facts, "total_assets", p)
     tec, tep = get_fact(facts, "total_equity", l), get_fact(facts, "total_equity", p)
     balance = {
@@ -12,12 +12,22 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.mapping import MappingDecision
 from app.models.mapping_rule import MappingRule, UnmappedLabel
+from app.services.label_similarity import SOURCE_TENANT_RULE, record_label
 from app.services.extraction_loader import load_extraction_from_s3, extraction_to_flat_rows
 from app.services.mapping_rules import map_raw_label
+from app.services.tenant_mapping_rules import TenantRuleSet, invalidate_tenant_rules
 
 
-def get_unmapped_from_extraction(extraction: dict, limit: int = 100) -> list[dict[str, Any]]:
-    """Derive unmapped labels from extraction dict. Returns list of {raw_label, count, sheets}."""
+def get_unmapped_from_extraction(
+    extraction: dict,
+    limit: int = 100,
+    tenant_rules: TenantRuleSet | None = None,
+    document_version_id: str | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Derive unmapped labels from extraction dict. Returns list of {raw_label, count, sheets}.
+    Labels covered by tenant_rules (global or this document version's overrides) are not unmapped.
+    """
     sheet_to_type = {s: s.split("_")[0] for s in extraction.keys()}
     flat = extraction_to_flat_rows(extraction, sheet_to_type)
     raw_with_sheet = [(r.get("raw_label", ""), r.get("sheet", "")) for r in flat if r.get("raw_label")]
@@ -26,6 +36,8 @@ def get_unmapped_from_extraction(extraction: dict, limit: int = 100) -> list[dic
     for (raw, sheet), cnt in counter.most_common(limit * 2):
         if not raw:
             continue
+        if tenant_rules and tenant_rules.match(raw, document_version_id):
+            continue
         key, _, _ = map_raw_label(raw)
         if key:
             continue
@@ -95,6 +107,9 @@ async def create_mapping_rule(
     )
     db.add(rule)
     await db.flush()
+    # Other workers see the new rules_version on their next run; drop this process's copy now
+    invalidate_tenant_rules(tenant_id)
+    record_label(tenant_id, rule.pattern, rule.canonical_key, source=SOURCE_TENANT_RULE)
     return {"id": str(rule.id), "pattern": rule.pattern, "canonical_key": rule.canonical_key, "scope": "global"}
 
 
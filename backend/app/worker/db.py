@@ -0,0 +1,154 @@
+"""
+Sync DB engine for Celery workers (fork-safe, pooled).
+
+Under prefork the engine must never be shared across the fork boundary: an engine created in the
+parent would hand the same sockets to every child. The engine is therefore (re)built in each child
+from the ``worker_process_init`` signal, with the pool sized for the worker's concurrency, and the
+session factory is cached alongside it. Non-forking pools (solo/threads) and the API fall back to
+lazy creation on first use.
+
+Pool pressure is recorded per process (checkouts, wait time, overflow) and emitted with every task
+via ``task_postrun`` as a ``db_pool_stats`` log record.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Any
+
+from celery.signals import task_postrun, worker_process_init
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.config import get_settings
+from app.db.hnsw import install_hnsw_session_settings
+
+logger = logging.getLogger(__name__)
+
+_sync_engine: Engine | None = None
+_session_factory: sessionmaker | None = None
+_engine_pid: int | None = None
+_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_stats: dict[str, float] = {"checkouts": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0}
+
+
+def _sync_url() -> str:
+    return get_settings().database_url.replace("+asyncpg", "").replace("postgresql+asyncpg", "postgresql")
+
+
+def pool_size_for_concurrency(concurrency: int | None, pool: str | None) -> int:
+    """
+    Connections each worker process needs. Prefork children run one task at a time (pool of 2
+    covers a task plus one nested session); threads/gevent/eventlet share one process across
+    ``concurrency`` tasks. An explicit CELERY_DB_POOL_SIZE always wins.
+    """
+    override = get_settings().celery_db_pool_size
+    if override:
+        return override
+    if (pool or "prefork") in ("prefork", "solo"):
+        return 2
+    return max(2, int(concurrency or os.cpu_count() or 1))
+
+
+def init_sync_engine(pool_size: int | None = None) -> Engine:
+    """(Re)create this process's engine and session factory. Safe to call after fork."""
+    global _sync_engine, _session_factory, _engine_pid
+    with _lock:
+        if _sync_engine is not None:
+            # Inherited from the parent: drop the pool without closing the parent's sockets.
+            _sync_engine.dispose(close=False)
+        settings = get_settings()
+        size = pool_size or pool_size_for_concurrency(None, None)
+        # Recycle connections every 5 min to avoid "SSL connection closed" with cloud DBs (Neon etc.)
+        _sync_engine = create_engine(
+            _sync_url(),
+            pool_pre_ping=True,
+            pool_recycle=300,
+            pool_size=size,
+            max_overflow=settings.celery_db_max_overflow,
+            pool_timeout=settings.celery_db_pool_timeout,
+        )
+        install_hnsw_session_settings(_sync_engine)
+        _session_factory = sessionmaker(autocommit=False, autoflush=False, bind=_sync_engine)
+        _engine_pid = os.getpid()
+        reset_pool_stats()
+        return _sync_engine
+
+
+def get_sync_session() -> Session:
+    """Session bound to this process's pooled engine; the connection is checked out eagerly and timed."""
+    if _session_factory is None or _engine_pid != os.getpid():
+        init_sync_engine()
+    session = _session_factory()
+    t0 = time.perf_counter()
+    try:
+        session.connection()
+    except Exception:
+        session.close()
+        raise
+    _record_checkout((time.perf_counter() - t0) * 1000)
+    return session
+
+
+def _record_checkout(wait_ms: float) -> None:
+    with _stats_lock:
+        _stats["checkouts"] += 1
+        _stats["wait_ms_total"] += wait_ms
+        if wait_ms > _stats["wait_ms_max"]:
+            _stats["wait_ms_max"] = wait_ms
+
+
+def reset_pool_stats() -> None:
+    with _stats_lock:
+        _stats.update({"checkouts": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0})
+
+
+def pool_stats() -> dict[str, Any]:
+    """Checkout counters for this process plus the live pool state (size, checked out, overflow)."""
+    with _stats_lock:
+        checkouts = int(_stats["checkouts"])
+        out: dict[str, Any] = {
+            "pid": os.getpid(),
+            "checkouts": checkouts,
+            "wait_ms_total": round(_stats["wait_ms_total"], 2),
+            "wait_ms_avg": round(_stats["wait_ms_total"] / checkouts, 2) if checkouts else 0.0,
+            "wait_ms_max": round(_stats["wait_ms_max"], 2),
+        }
+    pool = _sync_engine.pool if _sync_engine is not None else None
+    if pool is not None and hasattr(pool, "checkedout"):
+        out.update({
+            "pool_size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "checked_in": pool.checkedin(),
+        })
+    return out
+
+
+@worker_process_init.connect
+def _on_worker_process_init(**_: Any) -> None:
+    from app.worker.celery_app import celery_app
+
+    conf = celery_app.conf
+    init_sync_engine(pool_size_for_concurrency(conf.worker_concurrency, conf.worker_pool))
+    logger.info("db_pool_init", extra={"event": "db_pool_init", **pool_stats()})
+
+
+@task_postrun.connect
+def _log_pool_stats(task_id: str | None = None, task: Any = None, **_: Any) -> None:
+    if _sync_engine is None:
+        return
+    logger.info(
+        "db_pool_stats",
+        extra={
+            "event": "db_pool_stats",
+            "task_id": task_id,
+            "task": getattr(task, "name", None),
+            **pool_stats(),
+        },
+    )
@@ -1,12 +1,9 @@
 import hashlib
 import re
 from uuid import UUID
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
 
 import fitz  # PyMuPDF
 
-from app.config import get_settings
 from app.models.document import DocumentVersion, Document, PageAsset, PageLayout
 from app.models.extraction import PresentationContext, NotesIndex, NoteExtraction, NoteChunk, Statement, StatementLine
 from app.models.mapping import NormalizedFact
@@ -14,21 +11,12 @@ from app.models.metrics import MetricFact, RatingModel, RatingResult
 from app.models.company import CreditReview, CreditReviewVersion, Engagement, ReviewStatus
 from app.services.storage import download_file_from_url
 from app.worker.celery_app import celery_app
+from app.worker.db import get_sync_session
 
 # Max chars to send to LLM (leave room for prompt + response; ~100k chars ~= 25k tokens)
 _EXTRACTION_TEXT_LIMIT = 100_000
 
-# Sync engine for Celery (workers typically use sync DB)
-# Recycle connections every 5 min to avoid "SSL connection closed" with cloud DBs (Neon etc.)
-_sync_engine = None
-
-def get_sync_session() -> Session:
-    global _sync_engine
-    if _sync_engine is None:
-        url = get_settings().database_url.replace("+asyncpg", "").replace("postgresql+asyncpg", "postgresql")
-        _sync_engine = create_engine(url, pool_pre_ping=True, pool_recycle=300)
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=_sync_engine)
-    return SessionLocal()
+# Sync engine for Celery lives in app.worker.db (built per worker process after fork)
 
 
 def _extract_regions_from_page(page: "fitz.Page") -> list[dict]:
@@ -318,8 +306,10 @@ def run_mapping_for_review(credit_review_version_id: str):
     run mapping pipeline, persist NormalizedFact. Required before financial engine.
     """
     import logging
-    from app.services.mapping_pipeline import run_mapping as run_mapping_pipeline
+    from app.services.extraction_loader import load_extraction_from_s3
+    from app.services.mapping_columnar import run_mapping_frame_isolated
     from app.services.mapping_validator import validate_facts
+    from app.services.tenant_mapping_rules import get_tenant_rules
 
     log = logging.getLogger(__name__)
     db = get_sync_session()
@@ -344,7 +334,11 @@ def run_mapping_for_review(credit_review_version_id: str):
             log.warning("No documents in engagement %s", engagement.id)
             return {"credit_review_version_id": credit_review_version_id, "facts_count": 0, "message": "No documents"}
 
-        all_facts = []
+        # Compiled tenant MappingRules; reloaded only if a rule was written since this process last ran
+        tenant_rules = get_tenant_rules(db, tenant_id)
+
+        # Load every MAPPED extraction first, then map the whole engagement in one columnar pass
+        documents = []
         for doc in docs:
             for dv in doc.versions:
                 if dv.status != "MAPPED":
@@ -352,11 +346,14 @@ def run_mapping_for_review(credit_review_version_id: str):
                 pdf_name = (doc.original_filename or "document").replace(".pdf", "").replace(".PDF", "")
                 excel_key = f"extracted/{tenant_id}/{dv.id}/statements_{pdf_name}.xlsx"
                 try:
-                    facts = run_mapping_pipeline(excel_key, company_id)
-                    all_facts.extend(facts)
+                    documents.append((str(dv.id), load_extraction_from_s3(excel_key)))
                 except Exception as e:
                     log.warning("Mapping failed for %s: %s", excel_key, e)
 
+        all_facts, failed = run_mapping_frame_isolated(documents, company_id, tenant_rules=tenant_rules) if documents else ([], {})
+        for dv_id, err in failed.items():
+            log.warning("Mapping failed for document version %s: %s", dv_id, err)
+
         if not all_facts:
             return {"credit_review_version_id": credit_review_version_id, "facts_count": 0}
 
@@ -563,9 +560,175 @@ def run_full_credit_analysis(credit_review_version_id: str, formats: list | None
     return generate_pack(credit_review_version_id, formats)
 
 
+def _load_review_notes_json(db, engagement) -> dict | None:
+    """Notes JSON of the first MAPPED document version in the engagement that loads from storage."""
+    import json
+    from app.models.document import Document
+    from app.services.storage import download_json_from_storage
+
+    docs = db.query(Document).filter(Document.engagement_id == engagement.id).all()
+    for doc in docs:
+        for dv in doc.versions:
+            if dv.status != "MAPPED":
+                continue
+            pdf_name = (doc.original_filename or "document").replace(".pdf", "").replace(".PDF", "")
+            json_key = f"extracted/{engagement.tenant_id}/{dv.id}/notes_{pdf_name}.json"
+            try:
+                notes_raw = download_json_from_storage(json_key)
+                notes_json = json.loads(notes_raw) if isinstance(notes_raw, str) else notes_raw
+            except Exception:
+                continue
+            if notes_json:
+                return notes_json
+    return None
+
+
+@celery_app.task(name="app.worker.tasks.apply_fact_overrides")
+def apply_fact_overrides(credit_review_version_id: str, overrides: list[dict], formats: list | None = None):
+    """
+    Apply analyst fact overrides and re-analyse incrementally instead of re-running the full pipeline.
+    overrides: [{canonical_key, period_end (ISO), value, statement_type?}]; value None removes the fact.
+    Skips re-mapping, rewrites MetricFact rows only for metrics the changed keys feed, re-runs the rating
+    only when one of them changed, then rebuilds the pack from the state stored with the last pack:
+    only the affected engines re-run and only the affected memo sections are rebuilt (see _build_pack).
+    Returns the incremental_analysis report.
+    """
+    import logging
+    from datetime import date
+    from app.services.canonical_keys import EXPECTED_STATEMENT_FOR_KEY
+    from app.services.incremental_analysis import affected_metrics
+    from app.services.metric_graph import ROUNDED_METRICS, MetricEvaluator
+
+    log = logging.getLogger(__name__)
+    db = get_sync_session()
+    try:
+        version = db.get(CreditReviewVersion, UUID(credit_review_version_id))
+        if not version:
+            return {"error": "CreditReviewVersion not found"}
+        review = db.get(CreditReview, version.credit_review_id)
+        if not review:
+            return {"error": "CreditReview not found"}
+        engagement = db.get(Engagement, review.engagement_id)
+        if not engagement:
+            return {"error": "Engagement not found"}
+
+        facts_rows = db.query(NormalizedFact).filter(NormalizedFact.company_id == engagement.company_id).all()
+        facts_before, _ = _facts_rows_to_dict(facts_rows)
+
+        rows_by_key = {(r.canonical_key, r.period_end): r for r in facts_rows}
+        facts_after = dict(facts_before)
+        changed: set[tuple[str, date]] = set()
+        for o in overrides:
+            key, pe, value = o["canonical_key"], date.fromisoformat(str(o["period_end"])), o.get("value")
+            row = rows_by_key.get((key, pe))
+            if value is None:
+                if row is not None:
+                    db.delete(row)
+                    facts_after.pop((key, pe), None)
+                    changed.add((key, pe))
+                continue
+            value = float(value)
+            if row is None:
+                db.add(NormalizedFact(
+                    company_id=engagement.company_id,
+                    period_end=pe,
+                    statement_type=o.get("statement_type") or EXPECTED_STATEMENT_FOR_KEY.get(key, "SFP"),
+                    canonical_key=key,
+                    value_base=value,
+                    source_refs_json=[{"method": "MANUAL_OVERRIDE"}],
+                ))
+            elif row.value_base != value:
+                row.value_base = value
+                row.source_refs_json = (row.source_refs_json or []) + [{"method": "MANUAL_OVERRIDE"}]
+            else:
+                continue
+            facts_after[(key, pe)] = value
+            changed.add((key, pe))
+
+        # MetricFact rows for the metrics the changed keys feed (all periods, as run_financial_engine writes them)
+        digits = dict(ROUNDED_METRICS)
+        evaluator = MetricEvaluator(facts_after)
+        metric_rows = {
+            (m.metric_key, m.period_end): m
+            for m in db.query(MetricFact).filter(MetricFact.credit_review_version_id == version.id).all()
+        }
+        metrics_written = 0
+        for metric_key, pe in sorted(affected_metrics(changed), key=lambda x: (x[0], x[1])):
+            value = evaluator.value(metric_key, pe)
+            if value is not None and metric_key in digits:
+                value = round(value, digits[metric_key])
+            row = metric_rows.get((metric_key, pe))
+            if value is None:
+                if row is not None:
+                    db.delete(row)
+                    metrics_written += 1
+                continue
+            trace = [] if metric_key in digits else [evaluator.trace(metric_key, pe, value)]
+            if row is None:
+                db.add(MetricFact(credit_review_version_id=version.id, metric_key=metric_key, period_end=pe, value=float(value), calc_trace_json=trace))
+            elif row.value != value:
+                row.value = float(value)
+                row.calc_trace_json = trace
+            else:
+                continue
+            metrics_written += 1
+        db.commit()
+        log.info(
+            "fact_overrides_applied",
+            extra={
+                "event": "fact_overrides_applied",
+                "credit_review_version_id": credit_review_version_id,
+                "facts_changed": len(changed),
+                "metric_rows_written": metrics_written,
+            },
+        )
+    finally:
+        db.close()
+
+    if metrics_written:
+        run_rating(credit_review_version_id)
+    pack = _build_pack(credit_review_version_id, formats or ["DOCX"], incremental=True) if changed else None
+    return {
+        "credit_review_version_id": credit_review_version_id,
+        "facts_changed": len(changed),
+        "metric_rows_written": metrics_written,
+        "report": (pack or {}).get("incremental"),
+        "pack": pack,
+    }
+
+
+def _pack_state_key(tenant_id, version_id) -> str:
+    return f"exports/{tenant_id}/{version_id}/pack_state.json"
+
+
+def _load_pack_state(tenant_id, version_id) -> dict | None:
+    """Analysis output and memo section texts stored by the last pack of this version, if any."""
+    import json
+    from app.services.storage import download_json_from_storage
+
+    try:
+        state = json.loads(download_json_from_storage(_pack_state_key(tenant_id, version_id)))
+    except Exception:
+        return None
+    if not isinstance(state, dict) or not state.get("analysis") or not isinstance(state.get("section_texts"), dict):
+        return None
+    return state
+
+
 @celery_app.task(name="app.worker.tasks.generate_pack")
 def generate_pack(credit_review_version_id: str, formats: list | None = None):
     """Generate Word/Excel/PPT pack from NormalizedFact, MetricFact, RatingResult. Upload to S3, create ExportArtifact."""
+    return _build_pack(credit_review_version_id, formats)
+
+
+def _build_pack(credit_review_version_id: str, formats: list | None = None, incremental: bool = False):
+    """
+    Pack generation. Every pack also stores its analysis output and memo section texts (pack_state.json).
+    incremental=True (fact overrides): re-analyse from that stored state with incremental_analysis.reanalyse
+    and rebuild only the memo sections its report lists, keeping the other stored texts (LLM narrative
+    included). Without stored state it falls back to a full analysis and memo build.
+    """
+    import json
     import logging
     from datetime import date
     from app.services.report_generator import (
@@ -582,11 +745,12 @@ def generate_pack(credit_review_version_id: str, formats: list | None = None):
     )
     from app.services.memo_composer import build_all_sections
     from app.services.credit_risk_quant_engine import compute_credit_risk_quantification
-    from app.services.storage import upload_bytes
+    from app.services.storage import upload_bytes, upload_json_to_storage
     from app.models.metrics import ExportArtifact
 
     log = logging.getLogger(__name__)
     formats = formats or ["DOCX"]
+    report = None
 
     db = get_sync_session()
     try:
@@ -630,25 +794,7 @@ def generate_pack(credit_review_version_id: str, formats: list | None = None):
         pd_band = rr.pd_band if rr else None
 
         # Load notes JSON from S3 for key_risks section (Phase 2)
-        notes_json = None
-        from app.models.document import Document
-        from app.services.storage import download_json_from_storage
-        docs = db.query(Document).filter(Document.engagement_id == engagement.id).all()
-        for doc in docs:
-            for dv in doc.versions:
-                if dv.status != "MAPPED":
-                    continue
-                pdf_name = (doc.original_filename or "document").replace(".pdf", "").replace(".PDF", "")
-                json_key = f"extracted/{engagement.tenant_id}/{dv.id}/notes_{pdf_name}.json"
-                try:
-                    import json as _json
-                    notes_raw = download_json_from_storage(json_key)
-                    notes_json = _json.loads(notes_raw) if isinstance(notes_raw, str) else notes_raw
-                    break
-                except Exception:
-                    pass
-            if notes_json:
-                break
+        notes_json = _load_review_notes_json(db, engagement)
 
         periods = sorted(facts_by_period.keys(), reverse=True)[:5]
         facts_dict = {(k, pe): v for pe, vals in facts_by_period.items() for k, v in vals.items()}
@@ -656,15 +802,33 @@ def generate_pack(credit_review_version_id: str, formats: list | None = None):
         from app.services.provenance import add_provenance_to_analysis
         from app.services.recommendation_conditions import compute_recommendation
 
-        analysis_output = run_full_analysis(
-            facts=facts_dict,
-            periods=periods,
-            notes_json=notes_json,
-            fs_version="",
-            mapping_version="",
-            company_name=company_name,
-            rating_grade_override=rating_grade,
-        )
+        state = _load_pack_state(engagement.tenant_id, version.id) if incremental else None
+        if state is not None:
+            from app.services.incremental_analysis import reanalyse
+
+            # Diffs the facts against the stored run, so changes since that pack from any source are picked up
+            analysis_output, report = reanalyse(
+                state["analysis"],
+                facts_dict,
+                periods,
+                notes_json,
+                company_name=company_name,
+                rating_grade_override=rating_grade,
+            )
+        else:
+            analysis_output = run_full_analysis(
+                facts=facts_dict,
+                periods=periods,
+                notes_json=notes_json,
+                fs_version="",
+                mapping_version="",
+                company_name=company_name,
+                rating_grade_override=rating_grade,
+            )
+            if incremental:
+                report = {"full": True, "reason": "no stored pack state"}
+        # Serialised before provenance / quantification are attached: the state is a plain run_full_analysis output
+        analysis_state = json.dumps(analysis_output, default=str)
         add_provenance_to_analysis(analysis_output, facts_rows, m_rows)
         cov_block = (analysis_output.get("section_blocks") or {}).get("covenants", {}).get("key_metrics") or {}
         stress_scenarios = (analysis_output.get("section_blocks") or {}).get("stress", {}).get("key_metrics", {}).get("scenarios") or {}
@@ -678,7 +842,7 @@ def generate_pack(credit_review_version_id: str, formats: list | None = None):
             analysis_output=analysis_output,
         )
         analysis_output["credit_risk_quantification"] = credit_risk_quant
-        section_texts = build_all_sections(
+        memo_kwargs = dict(
             company_name=company_name,
             review_period_end=review.review_period_end or (periods[0] if periods else None),
             rating_grade=rating_grade,
@@ -690,6 +854,12 @@ def generate_pack(credit_review_version_id: str, formats: list | None = None):
             notes_json=notes_json,
             analysis_output=analysis_output,
         )
+        if state is not None and not report.get("full"):
+            from app.services.incremental_analysis import refresh_memo_sections
+
+            section_texts = refresh_memo_sections(state["section_texts"], report["memo_sections"], **memo_kwargs)
+        else:
+            section_texts = build_all_sections(**memo_kwargs)
 
         version_id_str = str(version.id)
         tenant_id = str(engagement.tenant_id)
@@ -821,8 +991,16 @@ def generate_pack(credit_review_version_id: str, formats: list | None = None):
         db.add(ExportArtifact(credit_review_version_id=version.id, type="ZIP", storage_url=zip_url))
         log.info("Uploaded data room ZIP to %s", zip_key)
 
+        upload_json_to_storage(
+            _pack_state_key(tenant_id, version_id_str),
+            '{"analysis": %s, "section_texts": %s}' % (analysis_state, json.dumps(section_texts, default=str)),
+        )
+
         db.commit()
-        return {"credit_review_version_id": credit_review_version_id, "formats": formats}
+        out = {"credit_review_version_id": credit_review_version_id, "formats": formats}
+        if incremental:
+            out["incremental"] = report
+        return out
     except Exception as e:
         log.exception("generate_pack failed: %s", e)
         raise
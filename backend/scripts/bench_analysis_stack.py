@@ -0,0 +1,257 @@
+"""
+Micro-benchmarks for the deterministic analysis stack, with JSON baselines and regression gates.
+Run from backend:
+  python -m scripts.bench_analysis_stack [--companies 200] [--periods 5] [--keys 30] [--seed 7]
+  python -m scripts.bench_analysis_stack --save-baseline bench_baseline.json
+  python -m scripts.bench_analysis_stack --baseline bench_baseline.json [--max-slowdown 0.25] [--threshold memo=0.5]
+
+Synthetic companies get M annual periods of the first K canonical keys the engines read (K beyond the
+list adds filler keys that only grow the fact dicts), ~10% of optional facts missing. Stages run in
+pipeline order over every company, each fed the previous stage's output prepared outside the timer:
+
+  engine              run_engine
+  sections            run_section_based_analysis (serial, so timings exclude pool scheduling)
+  rating_aggregation  run_rating_aggregation over the section blocks
+  credit_risk_quant   compute_credit_risk_quantification
+  memo                memo_composer.build_all_sections (deterministic composer; the LLM rewrite is off)
+
+Time is best-of --repeats samples per stage, each looping the stage for at least --min-time with the
+garbage collector off (as timeit does). Allocations are measured in a separate tracemalloc pass (tracing
+slows the code down): peak traced KiB while the stage runs over all companies, and KiB still held after.
+A run fails (exit 1) when a stage's ms/company grows by more than its slowdown threshold, or its peak
+allocation by more than --max-alloc-growth, relative to the baseline. Baselines are machine-specific;
+save one on the machine that will gate.
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# The memo stage measures the deterministic composer, never a network round-trip
+os.environ["OPENAI_API_KEY"] = ""
+
+from app.services.credit_risk_quant_engine import compute_credit_risk_quantification
+from app.services.financial_engine import run_engine
+from app.services.memo_composer import build_all_sections
+from app.services.rating_aggregation_engine import run_rating_aggregation
+from app.services.section_orchestrator import run_section_based_analysis
+
+STAGES = ("engine", "sections", "rating_aggregation", "credit_risk_quant", "memo")
+
+_KEYS = [
+    "revenue", "cost_of_sales", "operating_profit", "depreciation_amortisation", "finance_costs",
+    "profit_after_tax", "cash_and_cash_equivalents", "short_term_borrowings", "current_portion_long_term_debt",
+    "long_term_borrowings", "borrowings", "lease_liabilities_current", "lease_liabilities_non_current",
+    "trade_receivables", "other_receivables", "inventories", "trade_payables", "net_cfo", "capex",
+    "total_equity", "total_assets", "total_liabilities", "interest_paid", "property_plant_and_equipment",
+    "intangible_assets", "investment_properties", "gross_profit", "income_tax_expense", "dividends_paid",
+    "total_current_assets", "total_current_liabilities",
+]
+_NEGATIVE = {"cost_of_sales", "finance_costs", "capex", "interest_paid", "dividends_paid", "income_tax_expense"}
+_PD_BAND = {"AA": 0.05, "A": 0.1, "BBB": 0.8, "BB": 2.5, "B": 6.0, "CCC": 20.0}
+
+
+def generate_companies(n_companies: int, n_periods: int, n_keys: int, seed: int) -> list[tuple[dict, list[date]]]:
+    """N companies x M periods x K keys of (canonical_key, period_end) -> value."""
+    rng = random.Random(seed)
+    keys = _KEYS[:n_keys] + [f"bench_filler_{i}" for i in range(max(0, n_keys - len(_KEYS)))]
+    out = []
+    for _ in range(n_companies):
+        scale = 10 ** rng.uniform(3, 7)
+        periods = [date(2025 - i, 6, 30) for i in range(n_periods)]
+        facts = {}
+        for pe in periods:
+            for key in keys:
+                if key != "operating_profit" and rng.random() < 0.1:
+                    continue
+                value = scale * rng.uniform(0.01, 1.0)
+                facts[(key, pe)] = -value if key in _NEGATIVE else value
+        out.append((facts, periods))
+    return out
+
+
+def _by_period(facts: dict, periods: list[date]) -> dict[date, dict[str, float]]:
+    out: dict[date, dict[str, float]] = {pe: {} for pe in periods}
+    for (k, pe), v in facts.items():
+        out[pe][k] = v
+    return out
+
+
+def _metric_by_period(engine_out: dict) -> dict[date, dict[str, float]]:
+    out: dict[date, dict[str, float]] = {}
+    for mk, pv in engine_out.items():
+        for pe_str, v in (pv or {}).items():
+            if v is not None:
+                out.setdefault(date.fromisoformat(pe_str), {})[mk] = float(v)
+    return out
+
+
+def build_stages(companies: list[tuple[dict, list[date]]]) -> list[tuple[str, Callable[[], Any]]]:
+    """
+    One closure per stage over all companies. Each stage's inputs come from running the earlier stages
+    once here, outside any timer, so a stage is timed on exactly its own work.
+    """
+    engine_outs = [run_engine(f, p) for f, p in companies]
+    analyses = [run_section_based_analysis(f, p, serial=True) for f, p in companies]
+    facts_bp = [_by_period(f, p) for f, p in companies]
+    metrics_bp = [_metric_by_period(e) for e in engine_outs]
+    grades = [a["aggregation"].get("rating_grade") for a in analyses]
+
+    def engine() -> None:
+        for f, p in companies:
+            run_engine(f, p)
+
+    def sections() -> None:
+        for f, p in companies:
+            run_section_based_analysis(f, p, serial=True)
+
+    def rating_aggregation() -> None:
+        for a in analyses:
+            blocks = a["section_blocks"]
+            stress = blocks.get("stress", {}).get("key_metrics", {}).get("scenarios") or {}
+            run_rating_aggregation(blocks, covenant_block=blocks.get("covenants"), stress_output={"scenarios": stress})
+
+    def credit_risk_quant() -> None:
+        for fb, mb, g, a in zip(facts_bp, metrics_bp, grades, analyses):
+            compute_credit_risk_quantification(fb, mb, g, _PD_BAND.get(g or "", 2.5), analysis_output=a)
+
+    def memo() -> None:
+        for (_, p), fb, mb, g, a in zip(companies, facts_bp, metrics_bp, grades, analyses):
+            build_all_sections(
+                company_name="Bench Co",
+                review_period_end=p[0],
+                rating_grade=g,
+                recommendation="Maintain",
+                facts_by_period=fb,
+                metric_by_period=mb,
+                key_metrics=mb.get(p[0], {}),
+                analysis_output=a,
+            )
+
+    return [("engine", engine), ("sections", sections), ("rating_aggregation", rating_aggregation), ("credit_risk_quant", credit_risk_quant), ("memo", memo)]
+
+
+def measure(fn: Callable[[], Any], n_companies: int, repeats: int, min_time: float = 0.2) -> dict[str, float]:
+    # Like timeit's autorange: loop the stage until one sample spans min_time, so sub-millisecond
+    # stages are not gated on timer noise
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        loops = 1
+        while True:
+            t0 = time.perf_counter()
+            for _ in range(loops):
+                fn()
+            if time.perf_counter() - t0 >= min_time:
+                break
+            loops *= 2
+        best = float("inf")
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            for _ in range(loops):
+                fn()
+            best = min(best, (time.perf_counter() - t0) / loops)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+        gc.collect()
+
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "total_ms": round(best * 1000, 3),
+        "ms_per_company": round(best * 1000 / n_companies, 4),
+        "companies_per_s": round(n_companies / best, 1) if best > 0 else None,
+        "peak_kib": round((peak - before) / 1024, 1),
+        "retained_kib": round((after - before) / 1024, 1),
+    }
+
+
+def run_bench(n_companies: int, n_periods: int, n_keys: int, seed: int, repeats: int, stages: list[str] | None = None, min_time: float = 0.2) -> dict[str, Any]:
+    companies = generate_companies(n_companies, n_periods, n_keys, seed)
+    results = {}
+    for name, fn in build_stages(companies):
+        if stages and name not in stages:
+            continue
+        results[name] = measure(fn, n_companies, repeats, min_time)
+    return {
+        "config": {"companies": n_companies, "periods": n_periods, "keys": n_keys, "seed": seed},
+        "facts": sum(len(f) for f, _ in companies),
+        "python": sys.version.split()[0],
+        "stages": results,
+    }
+
+
+def compare(report: dict, baseline: dict, slowdown: dict[str, float], max_alloc_growth: float) -> list[str]:
+    """Regression messages (empty when every stage is within its thresholds)."""
+    if report["config"] != baseline.get("config"):
+        return [f"baseline config {baseline.get('config')} does not match run config {report['config']}"]
+    failures = []
+    for stage, cur in report["stages"].items():
+        base = (baseline.get("stages") or {}).get(stage)
+        if not base:
+            continue
+        limit = slowdown.get(stage, slowdown["*"])
+        if base["ms_per_company"] > 0 and cur["ms_per_company"] > base["ms_per_company"] * (1 + limit):
+            failures.append(f"{stage}: {cur['ms_per_company']} ms/company vs baseline {base['ms_per_company']} (limit +{limit:.0%})")
+        if base["peak_kib"] > 0 and cur["peak_kib"] > base["peak_kib"] * (1 + max_alloc_growth):
+            failures.append(f"{stage}: peak {cur['peak_kib']} KiB vs baseline {base['peak_kib']} (limit +{max_alloc_growth:.0%})")
+    return failures
+
+
+def _parse_thresholds(items: list[str], default: float) -> dict[str, float]:
+    out = {"*": default}
+    for item in items:
+        stage, _, value = item.partition("=")
+        if stage not in STAGES or not value:
+            raise SystemExit(f"--threshold expects STAGE=FRACTION with STAGE in {', '.join(STAGES)}")
+        out[stage] = float(value)
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--companies", type=int, default=200)
+    parser.add_argument("--periods", type=int, default=5)
+    parser.add_argument("--keys", type=int, default=len(_KEYS))
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds each timed sample spans at least")
+    parser.add_argument("--stage", action="append", choices=STAGES, help="Only these stages (repeatable)")
+    parser.add_argument("--baseline", help="Compare against this baseline JSON and fail on regressions")
+    parser.add_argument("--save-baseline", help="Write this run as a baseline JSON")
+    parser.add_argument("--max-slowdown", type=float, default=0.25, help="Allowed ms/company growth per stage (fraction)")
+    parser.add_argument("--threshold", action="append", default=[], help="Per-stage slowdown override, e.g. memo=0.5")
+    parser.add_argument("--max-alloc-growth", type=float, default=0.25, help="Allowed peak allocation growth per stage (fraction)")
+    args = parser.parse_args()
+
+    slowdown = _parse_thresholds(args.threshold, args.max_slowdown)
+    report = run_bench(args.companies, args.periods, args.keys, args.seed, args.repeats, args.stage, args.min_time)
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    failures: list[str] = []
+    if args.baseline:
+        failures = compare(report, json.loads(Path(args.baseline).read_text(encoding="utf-8")), slowdown, args.max_alloc_growth)
+        report["regressions"] = failures
+    print(json.dumps(report, indent=2))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark the compiled label matcher against the original Pass A / Pass B loops on synthetic labels.
+Run from backend: python -m scripts.bench_label_matcher [--labels 100000] [--seed 7]
+
+Labels are generated from the synonym lists and Pass B patterns with prefix/suffix words, casing and
+whitespace noise, plus unmappable filler. Every label is checked for identical (key, method, is_expense).
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.label_matcher import CompiledLabelMatcher
+from app.services.mapping_rules import RAW_TO_CANONICAL, pass_b_patterns
+from tests.label_matcher_reference import generate_labels, legacy_map
+
+
+def bench(n: int, seed: int) -> dict:
+    labels = generate_labels(n, seed)
+
+    t0 = time.perf_counter()
+    matcher = CompiledLabelMatcher(RAW_TO_CANONICAL, pass_b_patterns())
+    build_ms = (time.perf_counter() - t0) * 1000
+
+    t0 = time.perf_counter()
+    legacy = [legacy_map(label) for label in labels]
+    legacy_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    compiled = [matcher.match(label) for label in labels]
+    compiled_s = time.perf_counter() - t0
+
+    mismatches = [(label, a, b) for label, a, b in zip(labels, legacy, compiled) if a != b]
+    methods: dict[str, int] = {}
+    for _, method, _ in compiled:
+        methods[method] = methods.get(method, 0) + 1
+    return {
+        "labels": n,
+        "build_ms": round(build_ms, 2),
+        "legacy_s": round(legacy_s, 3),
+        "compiled_s": round(compiled_s, 3),
+        "speedup": round(legacy_s / compiled_s, 1) if compiled_s else None,
+        "legacy_us_per_label": round(legacy_s / n * 1e6, 2),
+        "compiled_us_per_label": round(compiled_s / n * 1e6, 2),
+        "methods": methods,
+        "mismatches": len(mismatches),
+        "mismatch_examples": mismatches[:5],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--labels", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    report = bench(args.labels, args.seed)
+    print(json.dumps(report, indent=2))
+    if report["mismatches"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark portfolio batch analysis against one run_full_analysis per company on synthetic facts.
+Run from backend: python -m scripts.bench_portfolio_batch [--companies 1000 10000] [--seed 7]
+
+Each synthetic company has 2-7 annual periods of the canonical keys the section engines read, with
+~15% of optional facts missing. The per-company baseline builds each facts dict from the same long
+table with a pandas groupby (how a loop over reviews would load them). A sample of companies is
+checked for identical analysis_output.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd
+
+from app.services.analysis_orchestrator import run_full_analysis
+from app.services.portfolio_batch import MAX_PERIODS, run_portfolio_analysis
+
+_KEYS = [
+    "revenue", "cost_of_sales", "operating_profit", "depreciation_amortisation", "finance_costs",
+    "profit_after_tax", "cash_and_cash_equivalents", "short_term_borrowings", "current_portion_long_term_debt",
+    "long_term_borrowings", "lease_liabilities_current", "lease_liabilities_non_current", "trade_receivables",
+    "other_receivables", "inventories", "trade_payables", "net_cfo", "capex", "total_equity", "total_assets",
+    "total_liabilities", "interest_paid",
+]
+_NEGATIVE = {"cost_of_sales", "finance_costs", "capex", "interest_paid"}
+
+
+def generate_table(n_companies: int, seed: int) -> pd.DataFrame:
+    rng = random.Random(seed)
+    rows = []
+    for c in range(n_companies):
+        scale = 10 ** rng.uniform(3, 7)
+        for y in range(2025, 2025 - rng.randint(2, 7), -1):
+            pe = date(y, rng.choice((2, 6, 12)), 28)
+            for key in _KEYS:
+                if key != "operating_profit" and rng.random() < 0.15:
+                    continue
+                value = scale * rng.uniform(0.01, 1.0)
+                rows.append((f"co-{c}", key, pe, -value if key in _NEGATIVE else value))
+    return pd.DataFrame.from_records(rows, columns=["company_id", "canonical_key", "period_end", "value"])
+
+
+def _per_company(table: pd.DataFrame) -> dict:
+    out = {}
+    for company_id, g in table.groupby("company_id", sort=False):
+        facts = dict(zip(zip(g["canonical_key"], g["period_end"]), g["value"].astype(float)))
+        periods = sorted({pe for _, pe in facts}, reverse=True)[:MAX_PERIODS]
+        window = {k: v for k, v in facts.items() if k[1] in periods}
+        out[company_id] = run_full_analysis(window, periods)
+    return out
+
+
+def bench(n_companies: int, seed: int, check: int = 200) -> dict:
+    table = generate_table(n_companies, seed)
+
+    t0 = time.perf_counter()
+    baseline = _per_company(table)
+    baseline_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    batch = run_portfolio_analysis(table)
+    batch_s = time.perf_counter() - t0
+
+    sample = random.Random(seed).sample(list(baseline), min(check, len(baseline)))
+    mismatches = [c for c in sample if batch.get(c) != baseline[c]]
+    return {
+        "companies": n_companies,
+        "facts": len(table),
+        "per_company_s": round(baseline_s, 3),
+        "batch_s": round(batch_s, 3),
+        "speedup": round(baseline_s / batch_s, 2) if batch_s else None,
+        "batch_ms_per_company": round(batch_s / n_companies * 1000, 3),
+        "checked": len(sample),
+        "mismatches": len(mismatches),
+        "mismatch_examples": mismatches[:5],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--companies", type=int, nargs="+", default=[1000, 10_000])
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    reports = [bench(n, args.seed) for n in args.companies]
+    print(json.dumps(reports, indent=2))
+    if any(r["mismatches"] for r in reports):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Benchmark the production semantic notes query (notes_retrieval._SEMANTIC_SQL) on pgvector HNSW.
+Run from backend: python -m scripts.bench_vector_search [--sizes 10000,100000,1000000] [--dim 1536] [--docs 100]
+
+For each corpus size a scratch schema gets an UNLOGGED note_chunks table of seeded, clustered unit
+vectors spread over --docs synthetic document versions, with the (document_version_id, scope) btree of
+migration 004 and the HNSW index of migration 008. Queries run the shipped SQL (float8[] bind, filtered
+on one document each) with the scratch schema first on the search_path. Every --ef value is measured
+with hnsw.iterative_scan off and relaxed_order against exact per-document top-k (brute force, NumPy):
+recall@k, fill (rows returned / k), p50/p95 latency and whether the plan used the HNSW index.
+Exact (index scans off) latency is the baseline. The scratch schema is dropped at the end.
+1M x 1536 dims needs ~6 GB in Postgres; use --dim to scale down.
+"""
+import argparse
+import io
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine, text
+from app.config import get_settings
+from app.services.notes_retrieval import _SEMANTIC_SQL
+
+SCHEMA = "bench_vector_search"
+SCOPE = "GROUP"
+ITERATIVE_SCAN_MODES = ("off", "relaxed_order")
+CHUNK = 20_000
+N_CLUSTERS = 256
+
+
+def _centers(dim: int, seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((N_CLUSTERS, dim)).astype(np.float32)
+
+
+def _chunk_vectors(i: int, n: int, dim: int, seed: int, centers: np.ndarray) -> np.ndarray:
+    """Deterministic chunk i of the corpus: cluster centre + noise, L2-normalised (embedding-like)."""
+    rng = np.random.default_rng((seed, i))
+    v = centers[rng.integers(0, N_CLUSTERS, n)] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+def _doc_id(doc: int) -> str:
+    return f"bench-doc-{doc}"
+
+
+def _load(conn, size: int, dim: int, n_docs: int, seed: int, centers: np.ndarray) -> None:
+    """Row i belongs to document i % n_docs; chunk_id is the row id."""
+    conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    conn.execute(text(f"""
+        CREATE UNLOGGED TABLE {SCHEMA}.note_chunks (
+            id bigint PRIMARY KEY, chunk_id text, document_version_id text, scope text, embedding vector({dim})
+        )
+    """))
+    raw = conn.connection.dbapi_connection
+    with raw.cursor() as cur:
+        for ci, start in enumerate(range(0, size, CHUNK)):
+            vecs = _chunk_vectors(ci, min(CHUNK, size - start), dim, seed, centers)
+            buf = io.StringIO()
+            for j, v in enumerate(vecs):
+                rid = start + j
+                buf.write(f"{rid}\t{rid}\t{_doc_id(rid % n_docs)}\t{SCOPE}\t[{','.join(f'{x:.6f}' for x in v)}]\n")
+            buf.seek(0)
+            cur.copy_expert(f"COPY {SCHEMA}.note_chunks (id, chunk_id, document_version_id, scope, embedding) FROM STDIN", buf)
+    conn.execute(text(f"CREATE INDEX ON {SCHEMA}.note_chunks (document_version_id, scope)"))
+
+
+def _exact_topk(
+    queries: np.ndarray, query_docs: np.ndarray, size: int, dim: int, n_docs: int, seed: int, centers: np.ndarray, k: int,
+) -> np.ndarray:
+    """Brute-force cosine top-k within each query's document, streamed chunk by chunk (1M rows never in memory)."""
+    best_sim = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    best_id = np.full((len(queries), k), -1, dtype=np.int64)
+    for ci, start in enumerate(range(0, size, CHUNK)):
+        vecs = _chunk_vectors(ci, min(CHUNK, size - start), dim, seed, centers)
+        row_ids = np.arange(start, start + len(vecs))
+        sims = np.where(query_docs[:, None] == row_ids % n_docs, queries @ vecs.T, -np.inf).astype(np.float32)
+        ids = np.broadcast_to(row_ids, sims.shape)
+        all_sim = np.concatenate([best_sim, sims], axis=1)
+        all_id = np.concatenate([best_id, ids], axis=1)
+        top = np.argpartition(-all_sim, k - 1, axis=1)[:, :k]
+        best_sim = np.take_along_axis(all_sim, top, axis=1)
+        best_id = np.take_along_axis(all_id, top, axis=1)
+    return np.where(np.isfinite(best_sim), best_id, -1)  # -1: document holds fewer than k rows
+
+
+def _params(q: np.ndarray, doc: int, k: int) -> dict:
+    # Same bind shape as notes_retrieval._semantic_params: a float list sent as float8[]
+    return {"emb": [float(x) for x in q], "dv_id": _doc_id(doc), "scope": SCOPE, "top_k": k}
+
+
+def _session(conn, ef: int | None = None, iterative_scan: str | None = None) -> None:
+    """Transaction-local: scratch schema shadows the real note_chunks; HNSW knobs as in production."""
+    conn.execute(text(f"SET LOCAL search_path TO {SCHEMA}, public"))
+    if ef is not None:
+        conn.execute(text("SELECT set_config('hnsw.ef_search', :ef, true)"), {"ef": str(ef)})
+    if iterative_scan is not None:
+        conn.execute(text("SELECT set_config('hnsw.iterative_scan', :mode, true)"), {"mode": iterative_scan})
+
+
+def _uses_hnsw(conn, q: np.ndarray, doc: int, k: int) -> bool:
+    plan = conn.execute(text("EXPLAIN " + _SEMANTIC_SQL.text), _params(q, doc, k)).fetchall()
+    return any("hnsw" in r[0] or "embedding_idx" in r[0] for r in plan)
+
+
+def _run_queries(conn, queries: np.ndarray, query_docs: np.ndarray, k: int) -> tuple[list[set[int]], list[float]]:
+    results, latencies = [], []
+    for q, doc in zip(queries, query_docs):
+        params = _params(q, int(doc), k)
+        t0 = time.perf_counter()
+        rows = conn.execute(_SEMANTIC_SQL, params).fetchall()
+        latencies.append((time.perf_counter() - t0) * 1000)
+        results.append({int(r[0]) for r in rows})
+    return results, latencies
+
+
+def _summarise(found: list[set[int]], truth: np.ndarray, latencies: list[float], k: int) -> dict:
+    recall = statistics.mean(len(f & set(t[t >= 0].tolist())) / max(1, int((t >= 0).sum())) for f, t in zip(found, truth))
+    lat = sorted(latencies)
+    return {
+        "recall_at_k": round(recall, 4),
+        "fill": round(statistics.mean(len(f) for f in found) / k, 4),
+        "p50_ms": round(lat[len(lat) // 2], 2),
+        "p95_ms": round(lat[min(len(lat) - 1, int(len(lat) * 0.95))], 2),
+    }
+
+
+def bench(sizes: list[int], dim: int, k: int, n_queries: int, ef_values: list[int], n_docs: int, seed: int) -> list[dict]:
+    url = get_settings().database_url.replace("+asyncpg", "")
+    engine = create_engine(url)
+    centers = _centers(dim, seed)
+    qrng = np.random.default_rng(seed + 1)
+    queries = centers[qrng.integers(0, N_CLUSTERS, n_queries)] + 0.6 * qrng.standard_normal((n_queries, dim)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    query_docs = qrng.integers(0, n_docs, n_queries)
+
+    report = []
+    try:
+        for size in sizes:
+            with engine.begin() as conn:
+                t0 = time.perf_counter()
+                _load(conn, size, dim, n_docs, seed, centers)
+                load_s = time.perf_counter() - t0
+                conn.execute(text(f"ANALYZE {SCHEMA}.note_chunks"))
+            truth = _exact_topk(queries, query_docs, size, dim, n_docs, seed, centers, k)
+
+            with engine.begin() as conn:
+                _session(conn)
+                conn.execute(text("SET LOCAL enable_indexscan = off"))
+                found, lat = _run_queries(conn, queries, query_docs, k)
+            row = {"size": size, "dim": dim, "docs": n_docs, "k": k, "load_s": round(load_s, 1),
+                   "exact": _summarise(found, truth, lat, k), "hnsw": {}}
+
+            with engine.begin() as conn:
+                t0 = time.perf_counter()
+                conn.execute(text(
+                    f"CREATE INDEX ON {SCHEMA}.note_chunks USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)"
+                ))
+                row["index_build_s"] = round(time.perf_counter() - t0, 1)
+                conn.execute(text(f"ANALYZE {SCHEMA}.note_chunks"))
+            for ef in ef_values:
+                row["hnsw"][str(ef)] = {}
+                for mode in ITERATIVE_SCAN_MODES:
+                    with engine.begin() as conn:
+                        _session(conn, ef, mode)
+                        used = _uses_hnsw(conn, queries[0], int(query_docs[0]), k)
+                        found, lat = _run_queries(conn, queries, query_docs, k)
+                    row["hnsw"][str(ef)][mode] = {**_summarise(found, truth, lat, k), "hnsw_index_used": used}
+            report.append(row)
+            print(json.dumps(row))
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        engine.dispose()
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--ef", default="20,40,80,160", help="hnsw.ef_search values to sweep")
+    parser.add_argument("--docs", type=int, default=100, help="Synthetic document versions the corpus is spread over")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="Write the JSON report here")
+    args = parser.parse_args()
+    report = bench(
+        sizes=[int(s) for s in args.sizes.split(",")],
+        dim=args.dim,
+        k=args.k,
+        n_queries=args.queries,
+        ef_values=[int(e) for e in args.ef.split(",")],
+        n_docs=args.docs,
+        seed=args.seed,
+    )
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
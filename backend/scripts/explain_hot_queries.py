@@ -0,0 +1,165 @@
+"""
+Seed synthetic facts/metrics/ratings/versions and print EXPLAIN ANALYZE for each hot query.
+Run from backend (after alembic upgrade head): python -m scripts.explain_hot_queries [--companies 200] [--keep]
+
+All seeded rows are rolled back at the end unless --keep is passed.
+"""
+import argparse
+import asyncio
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from uuid import uuid4
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import insert, text
+from app.db.session import async_session_maker, engine
+from app.models.tenancy import Tenant
+from app.models.company import Company, Engagement, CreditReview, CreditReviewVersion
+from app.models.document import Document, DocumentVersion
+from app.models.mapping import NormalizedFact
+from app.models.metrics import MetricFact, RatingModel, RatingResult
+from app.core.canonical_keys import CANONICAL_KEYS, KEY_TO_STATEMENT_TYPE
+
+PERIODS = [date(2021 + i, 6, 30) for i in range(5)]
+METRIC_KEYS = [
+    "ebitda", "net_debt_ex_leases", "net_debt_incl_leases", "interest_cover", "net_debt_to_ebitda",
+    "ebitda_margin", "current_ratio", "fcf_conversion", "dso", "dio", "dpo", "wc_intensity",
+]
+
+# (label, SQL). Parameters are bound from the seeded target ids.
+HOT_QUERIES = [
+    (
+        "normalized_facts by company (engine / pack load)",
+        "SELECT period_end, canonical_key, value_base FROM normalized_facts WHERE company_id = :company_id",
+    ),
+    (
+        "metric_facts latest period (run_rating / get_credit_review)",
+        "SELECT max(period_end) FROM metric_facts WHERE credit_review_version_id = :version_id",
+    ),
+    (
+        "metric_facts for version + period",
+        "SELECT metric_key, value FROM metric_facts "
+        "WHERE credit_review_version_id = :version_id AND period_end = :period_end",
+    ),
+    (
+        "rating_results latest for version",
+        "SELECT * FROM rating_results WHERE credit_review_version_id = :version_id "
+        "ORDER BY created_at DESC LIMIT 1",
+    ),
+    (
+        "document_versions latest for document",
+        "SELECT * FROM document_versions WHERE document_id = :document_id ORDER BY created_at DESC LIMIT 1",
+    ),
+    (
+        "credit_review_versions latest for review",
+        "SELECT * FROM credit_review_versions WHERE credit_review_id = :review_id ORDER BY created_at DESC LIMIT 1",
+    ),
+]
+
+
+async def _seed(db, n_companies: int) -> dict:
+    """Bulk-insert a synthetic portfolio; returns ids of one company's rows to explain against."""
+    now = datetime.utcnow()
+    tenant = Tenant(name="Explain benchmark tenant")
+    db.add(tenant)
+    await db.flush()
+    model = RatingModel(tenant_id=tenant.id, name="Explain model", version="1.0", config_json={})
+    db.add(model)
+    await db.flush()
+
+    companies, engagements, reviews, versions, documents, doc_versions = [], [], [], [], [], []
+    facts, metrics, ratings = [], [], []
+    for c in range(n_companies):
+        company_id, engagement_id, review_id, document_id = uuid4(), uuid4(), uuid4(), uuid4()
+        companies.append({"id": company_id, "tenant_id": tenant.id, "name": f"Company {c}", "created_at": now})
+        engagements.append({
+            "id": engagement_id, "tenant_id": tenant.id, "company_id": company_id,
+            "type": "ANNUAL_REVIEW", "created_at": now,
+        })
+        reviews.append({"id": review_id, "engagement_id": engagement_id, "created_at": now})
+        documents.append({
+            "id": document_id, "tenant_id": tenant.id, "company_id": company_id,
+            "doc_type": "AFS", "original_filename": f"afs_{c}.pdf", "created_at": now,
+        })
+        for v in range(3):
+            doc_versions.append({
+                "id": uuid4(), "document_id": document_id, "status": "MAPPED",
+                "created_at": now + timedelta(minutes=v),
+            })
+            version_id = uuid4()
+            versions.append({
+                "id": version_id, "credit_review_id": review_id, "version_no": str(v + 1),
+                "created_at": now + timedelta(minutes=v),
+            })
+            ratings.append({
+                "id": uuid4(), "credit_review_version_id": version_id, "model_id": model.id,
+                "rating_grade": "BBB", "pd_band": 0.5, "created_at": now + timedelta(minutes=v),
+            })
+            for pe in PERIODS:
+                for k, key in enumerate(METRIC_KEYS):
+                    metrics.append({
+                        "id": uuid4(), "credit_review_version_id": version_id, "metric_key": key,
+                        "value": float(c + k), "period_end": pe, "created_at": now,
+                    })
+        for pe in PERIODS:
+            for k, key in enumerate(CANONICAL_KEYS):
+                facts.append({
+                    "id": uuid4(), "company_id": company_id, "period_end": pe,
+                    "statement_type": KEY_TO_STATEMENT_TYPE.get(key, "SFP"), "canonical_key": key,
+                    "value_base": float(c * 1000 + k), "created_at": now,
+                })
+
+    for model_cls, rows in (
+        (Company, companies), (Engagement, engagements), (CreditReview, reviews),
+        (CreditReviewVersion, versions), (Document, documents), (DocumentVersion, doc_versions),
+        (NormalizedFact, facts), (MetricFact, metrics), (RatingResult, ratings),
+    ):
+        for i in range(0, len(rows), 5000):
+            await db.execute(insert(model_cls.__table__), rows[i:i + 5000])
+    for table in ("normalized_facts", "metric_facts", "rating_results", "document_versions", "credit_review_versions"):
+        await db.execute(text(f"ANALYZE {table}"))
+
+    mid = n_companies // 2
+    print(
+        f"Seeded {len(companies)} companies, {len(facts)} normalized_facts, "
+        f"{len(metrics)} metric_facts, {len(ratings)} rating_results, {len(doc_versions)} document_versions."
+    )
+    return {
+        "company_id": companies[mid]["id"],
+        "version_id": versions[mid * 3 + 2]["id"],
+        "period_end": PERIODS[-1],
+        "document_id": documents[mid]["id"],
+        "review_id": reviews[mid]["id"],
+    }
+
+
+async def explain(n_companies: int, keep: bool) -> None:
+    engine.sync_engine.echo = False
+    async with async_session_maker() as db:
+        params = await _seed(db, n_companies)
+        for label, sql in HOT_QUERIES:
+            bind = {k: v for k, v in params.items() if f":{k}" in sql}
+            result = await db.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"), bind)
+            print(f"\n=== {label} ===")
+            for (line,) in result.all():
+                print(line)
+        if keep:
+            await db.commit()
+            print("\nSeeded rows kept.")
+        else:
+            await db.rollback()
+            print("\nSeeded rows rolled back.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--companies", type=int, default=200, help="Synthetic companies to seed")
+    parser.add_argument("--keep", action="store_true", help="Commit seeded rows instead of rolling back")
+    args = parser.parse_args()
+    asyncio.run(explain(args.companies, args.keep))
+
+
+if __name__ == "__main__":
+    main()
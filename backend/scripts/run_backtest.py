@@ -1,87 +1,266 @@
 #!/usr/bin/env python3
 """
 Track 6B: Backtest harness - run engine on gold set, distribution of grades, comparison to known outcomes.
+
+Every extraction file under the gold dir is run through mapping -> engine -> rating -> analysis -> memo,
+fanned out over a process pool (documents are independent and the pipeline is CPU-bound Python, so
+threads would serialise on the GIL). The memo stage is the deterministic composer: workers switch the
+LLM rewrite off. Each document records its wall time per stage; the report carries the grade
+distribution and a timing summary per stage.
+
+Run from backend:
+  python scripts/run_backtest.py [gold_dir] [--workers 8] [--out reports/backtest]
 """
 from __future__ import annotations
 
 import json
+import os
 import sys
+import time
+from contextlib import contextmanager
 from pathlib import Path
 
 # Add backend to path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date
+from typing import Any, Iterator
+
+STAGES = ("mapping", "engine", "rating", "analysis", "memo")
+
+
+def discover_documents(gold_dir: Path) -> list[Path]:
+    """Extraction workbooks under the gold dir (gold_runner layout first, then any workbook)."""
+    extraction_files = list(gold_dir.glob("**/extraction*.xlsx")) + list(gold_dir.glob("**/statements*.xlsx"))
+    if not extraction_files:
+        extraction_files = list(gold_dir.glob("**/*.xlsx"))
+    return sorted(set(extraction_files))
+
+
+def _disable_llm() -> None:
+    # The memo stage runs the deterministic composer: no paid LLM call per filing, no network in the timings
+    os.environ["OPENAI_API_KEY"] = ""
+    from app.config import get_settings
+    get_settings.cache_clear()
+
+
+@contextmanager
+def _llm_disabled() -> Iterator[None]:
+    """In-process runs: LLM off for the backtest only; the caller's API key and settings come back after."""
+    from app.config import get_settings
+    saved = os.environ.get("OPENAI_API_KEY")
+    _disable_llm()
+    try:
+        yield
+    finally:
+        if saved is None:
+            os.environ.pop("OPENAI_API_KEY", None)
+        else:
+            os.environ["OPENAI_API_KEY"] = saved
+        get_settings.cache_clear()
+
+
+def _import_pipeline() -> None:
+    """Import the pipeline up front so module import is not charged to the first document's mapping."""
+    import app.services.mapping_pipeline  # noqa: F401
+    import app.services.analysis_orchestrator  # noqa: F401
+    import app.services.memo_composer  # noqa: F401
+
 
+def _init_worker() -> None:
+    """Pool worker setup: the process only runs backtests, so the LLM is switched off for its lifetime."""
+    _disable_llm()
+    _import_pipeline()
+
+
+@contextmanager
+def _stage(timings: dict[str, float], name: str) -> Iterator[None]:
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = round((time.perf_counter() - t0) * 1000, 2)
+
+
+def backtest_document(fpath: str) -> dict[str, Any]:
+    """Run one extraction through the pipeline. Never raises: errors come back in the result."""
+    from app.services.extraction_loader import load_extraction_from_file
+    from app.services.mapping_pipeline import run_mapping
+    from app.services.financial_engine import run_engine
+    from app.services.rating_engine import run_rating
+    from app.services.analysis_orchestrator import run_full_analysis
+    from app.services.memo_composer import build_all_sections
+
+    path = Path(fpath)
+    timings: dict[str, float] = {}
+    out: dict[str, Any] = {"file": str(path), "timings_ms": timings}
+    try:
+        with _stage(timings, "mapping"):
+            extraction = load_extraction_from_file(str(path))
+            facts = run_mapping(excel_key="", company_id="backtest", extraction_override=extraction)
+            if isinstance(facts, tuple):
+                facts = facts[0]
+        if not facts:
+            out["error"] = "no facts mapped"
+            return out
+        facts_dict = {(f["canonical_key"], f["period_end"]): float(f["value_base"]) for f in facts}
+        periods = sorted({f["period_end"] for f in facts}, reverse=True)
+        latest = periods[0]
+
+        with _stage(timings, "engine"):
+            engine_out = run_engine(facts_dict, periods)
+
+        with _stage(timings, "rating"):
+            metrics = {k: (v.get(latest.isoformat()) if isinstance(v, dict) else v) for k, v in engine_out.items()}
+            metrics = {k: v for k, v in metrics.items() if v is not None}
+            grade = run_rating(metrics).get("rating_grade", "N/A")
 
-def run_backtest(gold_dir: str | Path | None = None) -> dict:
+        notes_path = path.parent / "notes.json"
+        notes_json = json.loads(notes_path.read_text(encoding="utf-8")) if notes_path.exists() else None
+        window = periods[:5]
+        with _stage(timings, "analysis"):
+            # Serial engines: the pool already has a process per CPU, a section thread pool each would oversubscribe
+            analysis = run_full_analysis(facts=facts_dict, periods=window, notes_json=notes_json, company_name=path.parent.name, serial=True)
+        section_grade = (analysis.get("aggregation") or {}).get("rating_grade")
+
+        with _stage(timings, "memo"):
+            facts_by_period: dict[date, dict[str, float]] = {pe: {} for pe in window}
+            for (k, pe), v in facts_dict.items():
+                if pe in facts_by_period:
+                    facts_by_period[pe][k] = v
+            metric_by_period: dict[date, dict[str, float]] = {}
+            for mk, pv in engine_out.items():
+                for pe_str, v in (pv or {}).items():
+                    if v is not None:
+                        metric_by_period.setdefault(date.fromisoformat(pe_str), {})[mk] = float(v)
+            build_all_sections(
+                company_name=path.parent.name,
+                review_period_end=latest,
+                rating_grade=section_grade,
+                recommendation="Maintain",
+                facts_by_period=facts_by_period,
+                metric_by_period=metric_by_period,
+                key_metrics=metric_by_period.get(latest, {}),
+                notes_json=notes_json,
+                analysis_output=analysis,
+            )
+
+        out.update({
+            "grade": grade,
+            "section_grade": section_grade,
+            "facts_count": len(facts),
+            "periods": [str(p) for p in periods[:3]],
+        })
+    except Exception as e:
+        out["error"] = str(e)
+    return out
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def timing_report(comparisons: list[dict], wall_s: float, workers: int) -> dict[str, Any]:
+    """Per-stage totals and distribution across documents, plus end-to-end throughput."""
+    stages: dict[str, dict[str, float]] = {}
+    for stage in STAGES:
+        values = [c["timings_ms"][stage] for c in comparisons if stage in c.get("timings_ms", {})]
+        if not values:
+            continue
+        stages[stage] = {
+            "documents": len(values),
+            "total_ms": round(sum(values), 2),
+            "mean_ms": round(sum(values) / len(values), 2),
+            "p50_ms": _percentile(values, 0.5),
+            "p95_ms": _percentile(values, 0.95),
+            "max_ms": max(values),
+        }
+    return {
+        "workers": workers,
+        "documents": len(comparisons),
+        "wall_s": round(wall_s, 3),
+        "documents_per_s": round(len(comparisons) / wall_s, 2) if wall_s > 0 else None,
+        "stages": stages,
+        "documents_ms": {c["file"]: c.get("timings_ms", {}) for c in comparisons},
+    }
+
+
+def run_backtest(gold_dir: str | Path | None = None, workers: int | None = None) -> dict:
     """
     Run financial + rating engine on gold extraction outputs.
-    Returns: {grades: {grade: count}, comparisons: [...], summary: {...}}
+    Returns: {grades: {grade: count}, comparisons: [...], summary: {...}, timings: {...}}
+    workers=1 runs in-process; default is one worker per CPU (capped at the document count).
     """
     gold_dir = Path(gold_dir or Path(__file__).parent.parent / "tests" / "gold")
     if not gold_dir.exists():
         return {"error": f"Gold dir not found: {gold_dir}", "grades": {}, "comparisons": []}
 
-    from app.services.mapping_pipeline import run_mapping
-    from app.services.financial_engine import run_engine
-    from app.services.rating_engine import run_rating
-    from app.services.extraction_loader import load_extraction_from_file, extraction_to_flat_rows
-
-    grades: list[str] = []
-    comparisons: list[dict] = []
-    extraction_files = list(gold_dir.glob("**/extraction*.xlsx")) + list(gold_dir.glob("**/statements*.xlsx"))
-    if not extraction_files:
-        extraction_files = list(gold_dir.glob("**/*.xlsx"))
+    extraction_files = discover_documents(gold_dir)
     if not extraction_files:
         return {"error": "No extraction files in gold dir", "grades": {}, "comparisons": []}
 
-    for fpath in extraction_files[:20]:
-        try:
-            extraction = load_extraction_from_file(str(fpath))
-            sheet_to_type = {s: s.split("_")[0] for s in extraction.keys()}
-            facts = run_mapping(
-                excel_key="",
-                company_id="backtest",
-                extraction_override=extraction,
-            )
-            if isinstance(facts, tuple):
-                facts = facts[0]
-            if not facts:
-                continue
-            facts_dict = {(f["canonical_key"], f["period_end"]): f["value_base"] for f in facts}
-            periods = sorted({f["period_end"] for f in facts}, reverse=True)
-            if not periods:
-                continue
-            engine_out = run_engine(facts_dict, periods)
-            latest = periods[0]
-            metrics = {k: (v.get(latest.isoformat() if hasattr(latest, "isoformat") else str(latest)) if isinstance(v, dict) else v) for k, v in engine_out.items()}
-            metrics = {k: v for k, v in metrics.items() if v is not None}
-            result = run_rating(metrics)
-            grade = result.get("rating_grade", "N/A")
-            grades.append(grade)
-            comparisons.append({
-                "file": fpath.name,
-                "grade": grade,
-                "facts_count": len(facts),
-                "periods": [str(p) for p in periods[:3]],
-            })
-        except Exception as e:
-            comparisons.append({"file": fpath.name, "error": str(e)})
+    workers = max(1, min(workers or os.cpu_count() or 1, len(extraction_files)))
+    paths = [str(p) for p in extraction_files]
+    t0 = time.perf_counter()
+    if workers == 1:
+        with _llm_disabled():
+            _import_pipeline()
+            comparisons = [backtest_document(p) for p in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            # Results come back in discovery order whatever order the workers finish in
+            comparisons = list(pool.map(backtest_document, paths, chunksize=max(1, len(paths) // (workers * 4))))
+    wall_s = time.perf_counter() - t0
 
+    grades = [c["grade"] for c in comparisons if "grade" in c]
     dist = dict(Counter(grades))
+    section_dist = dict(Counter(c["section_grade"] for c in comparisons if c.get("section_grade")))
     return {
         "grades": dist,
+        "section_grades": section_dist,
         "total_runs": len(grades),
+        "errors": sum(1 for c in comparisons if "error" in c),
         "comparisons": comparisons,
         "summary": {
             "unique_grades": len(dist),
             "most_common": dist and max(dist.items(), key=lambda x: x[1]),
         },
+        "timings": timing_report(comparisons, wall_s, workers),
     }
 
 
+def write_reports(result: dict, out_dir: Path) -> tuple[Path, Path]:
+    """grade_distribution.json (grades + per-document outcomes) and timings.json."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    grades_path = out_dir / "grade_distribution.json"
+    timings_path = out_dir / "timings.json"
+    grades = {k: v for k, v in result.items() if k != "timings"}
+    grades["comparisons"] = [{k: v for k, v in c.items() if k != "timings_ms"} for c in result.get("comparisons", [])]
+    grades_path.write_text(json.dumps(grades, indent=2, default=str), encoding="utf-8")
+    timings_path.write_text(json.dumps(result.get("timings", {}), indent=2), encoding="utf-8")
+    return grades_path, timings_path
+
+
+def main() -> int:
+    import argparse
+    ap = argparse.ArgumentParser(description="Backtest the pipeline over a gold set")
+    ap.add_argument("gold_dir", nargs="?", default=None, help="Gold root (default tests/gold)")
+    ap.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count; 1 = in-process)")
+    ap.add_argument("--out", default=None, help="Write grade_distribution.json and timings.json here")
+    args = ap.parse_args()
+
+    out = run_backtest(args.gold_dir, workers=args.workers)
+    if args.out and "error" not in out:
+        for p in write_reports(out, Path(args.out)):
+            print(f"Wrote {p}", file=sys.stderr)
+        out = {k: out[k] for k in ("grades", "section_grades", "total_runs", "errors", "summary")} | {"timings": {k: v for k, v in out["timings"].items() if k != "documents_ms"}}
+    print(json.dumps(out, indent=2, default=str))
+    return 1 if "error" in out else 0
+
+
 if __name__ == "__main__":
-    out = run_backtest()
-    print(json.dumps(out, indent=2))
+    sys.exit(main())
@@ -7,6 +7,7 @@ Exit 0 = PASS, non-zero = FAIL.
 Usage:
   python -m tests.gold_runner                    # Run all gold docs
   python -m tests.gold_runner tests/gold/shoprite_2025  # Run one
+  python -m tests.gold_runner --workers 8        # Run gold docs in parallel processes
   python -m tests.gold_runner --bootstrap tests/gold/shoprite_2025 --extraction path/to/statements.xlsx --notes path/to/notes.json
 """
 from __future__ import annotations
@@ -230,6 +231,7 @@ def main() -> int:
     ap.add_argument("--bootstrap", action="store_true", help="Bootstrap: create snapshots from extraction")
     ap.add_argument("--extraction", help="Extraction Excel path (for bootstrap)")
     ap.add_argument("--notes", help="Notes JSON path (for bootstrap)")
+    ap.add_argument("--workers", type=int, default=1, help="Worker processes for multiple gold docs (default 1)")
     args = ap.parse_args()
 
     path = Path(args.gold_path)
@@ -251,9 +253,17 @@ def main() -> int:
         print(f"No gold documents found under {path}")
         return 1
 
+    gold_dirs = sorted(gold_dirs)
+    workers = max(1, min(args.workers, len(gold_dirs)))
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            outcomes = list(pool.map(run_gold, gold_dirs))
+    else:
+        outcomes = [run_gold(d) for d in gold_dirs]
+
     all_ok = True
-    for gold_dir in sorted(gold_dirs):
-        ok, errs = run_gold(gold_dir)
+    for gold_dir, (ok, errs) in zip(gold_dirs, outcomes):
         name = gold_dir.name
         if ok:
             print(f"PASS {name}")
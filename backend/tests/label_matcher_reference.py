@@ -0,0 +1,54 @@
+"""
+Reference Pass A / Pass B loops (pre-compiled-matcher) and a synthetic label generator.
+Shared by tests/test_label_matcher.py and scripts/bench_label_matcher.py.
+"""
+import random
+import re
+
+from app.services.mapping_rules import RAW_TO_CANONICAL, pass_b_patterns
+
+_PREFIXES = ["", "", "total", "net", "group", "other", "less:", "add back", "current"]
+_SUFFIXES = ["", "", "(note 12)", "for the year", "- continuing operations", "paid", "restated", "2025"]
+_PHRASES = [
+    "depreciation of right-of-use assets", "amortization of software", "interest received on deposits",
+    "profit attributable to owners of the parent", "net decrease in cash held", "purchase of ppe items",
+    "short-term borrowings repaid", "long term borrowings raised", "lease liabilities repaid",
+    "sale of merchandise to franchisees", "cash generated by operations", "inventory write-down",
+]
+_FILLER = ["deferred", "contingent", "reserve", "hedging", "fair", "value", "adjustment", "other", "items", "movement"]
+
+
+def legacy_map(raw_label: str) -> tuple[str | None, str, bool]:
+    """Original matching loops (pre-compiled-matcher), kept as the reference."""
+    normalized = re.sub(r"\s+", " ", (raw_label or "").lower().strip())
+    for synonyms, canonical_key, is_expense in RAW_TO_CANONICAL:
+        for syn in synonyms:
+            if syn == normalized:
+                return canonical_key, "RULE", is_expense
+            if normalized.startswith(syn + " ") or normalized.endswith(" " + syn):
+                return canonical_key, "RULE", is_expense
+    for pattern, canonical_key, is_expense in pass_b_patterns():
+        if re.search(pattern, normalized):
+            return canonical_key, "REGEX", is_expense
+    return None, "UNMAPPED", False
+
+
+def generate_labels(n: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    synonyms = [s for syns, _, _ in RAW_TO_CANONICAL for s in syns]
+    labels = []
+    for _ in range(n):
+        roll = rng.random()
+        if roll < 0.55:
+            core = rng.choice(synonyms)
+        elif roll < 0.8:
+            core = rng.choice(_PHRASES)
+        else:
+            core = " ".join(rng.choice(_FILLER) for _ in range(rng.randint(1, 4)))
+        label = " ".join(p for p in (rng.choice(_PREFIXES), core, rng.choice(_SUFFIXES)) if p)
+        if rng.random() < 0.3:
+            label = label.title()
+        if rng.random() < 0.2:
+            label = "  " + label.replace(" ", "   ") + " "
+        labels.append(label)
+    return labels
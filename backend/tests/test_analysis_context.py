@@ -0,0 +1,40 @@
+"""AnalysisContext: per-run views are derived once and shared by every section engine."""
+
+from app.services.analysis_context import AnalysisContext
+from app.services.business_risk_engine import run_business_risk_engine
+from app.services.performance_engine import run_performance_engine
+from app.services.section_orchestrator import run_section_based_analysis
+from tests.test_metric_graph import FACTS, PE, PP
+
+
+def test_views_derived_once_per_run(monkeypatch):
+    built = []
+    monkeypatch.setattr(AnalysisContext, "__init__", _recording_init(built))
+    out = run_section_based_analysis(FACTS, [PP, PE])
+    (ctx,) = built
+    assert ctx.derivations == {"by_period": 1, "financial": 1, "trend": 1}
+    assert out["facts_by_period"][PE.isoformat()]["revenue"] == 1000.0
+    assert set(out["facts_by_period"]) == {PE.isoformat(), PP.isoformat()}
+
+
+def test_engines_match_standalone_runs():
+    ctx = AnalysisContext(FACTS, [PE, PP])
+    assert run_business_risk_engine(FACTS, [PE, PP], context=ctx) == run_business_risk_engine(FACTS, [PE, PP])
+    assert run_performance_engine(FACTS, [PE, PP], context=ctx) == run_performance_engine(FACTS, [PE, PP])
+    assert ctx.derivations["trend"] == 1
+    assert ctx.latest == PE
+
+
+def test_empty_periods():
+    ctx = AnalysisContext(FACTS, [])
+    assert ctx.latest is None
+    assert ctx.facts_by_period_iso == {}
+
+
+def _recording_init(built):
+    original = AnalysisContext.__init__
+
+    def init(self, *args, **kwargs):
+        original(self, *args, **kwargs)
+        built.append(self)
+    return init
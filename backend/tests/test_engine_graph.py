@@ -0,0 +1,101 @@
+"""Section engine graph: dependency order, deterministic output, serial fallback, timings."""
+import threading
+import time
+from graphlib import CycleError
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.analysis_context import AnalysisContext
+from app.services.engine_graph import EngineNode, run_engine_graph
+from app.services.section_orchestrator import run_section_based_analysis, section_engines_serial
+from tests.test_metric_graph import FACTS, PE, PP
+
+
+def _nodes(log):
+    def leaf(name, delay):
+        def fn(_):
+            time.sleep(delay)
+            log.append(name)
+            return name.upper()
+        return fn
+
+    return [
+        EngineNode("slow", leaf("slow", 0.05)),
+        EngineNode("fast", leaf("fast", 0.0)),
+        EngineNode("join", lambda done: done["slow"] + done["fast"], deps=("slow", "fast")),
+    ]
+
+
+@pytest.mark.parametrize("serial", [True, False])
+def test_results_in_declaration_order(serial):
+    log = []
+    results, timings = run_engine_graph(_nodes(log), serial=serial)
+    assert list(results) == list(timings) == ["slow", "fast", "join"]
+    assert results["join"] == "SLOWFAST"
+    assert log == (["slow", "fast"] if serial else ["fast", "slow"])
+
+
+def test_independent_nodes_overlap():
+    barrier = threading.Barrier(2, timeout=5)
+    nodes = [EngineNode(n, lambda _: barrier.wait()) for n in ("a", "b")]
+    results, _ = run_engine_graph(nodes, serial=False)
+    assert set(results) == {"a", "b"}
+
+
+def test_errors_and_cycles_raise():
+    def boom(_):
+        raise RuntimeError("engine failed")
+
+    with pytest.raises(RuntimeError):
+        run_engine_graph([EngineNode("a", boom), EngineNode("b", lambda d: d["a"], deps=("a",))])
+    with pytest.raises(CycleError):
+        run_engine_graph([EngineNode("a", lambda _: 1, deps=("b",)), EngineNode("b", lambda _: 2, deps=("a",))])
+    with pytest.raises(ValueError):
+        run_engine_graph([EngineNode("a", lambda _: 1, deps=("missing",))])
+
+
+def test_orchestrator_serial_matches_concurrent():
+    ctx = AnalysisContext(FACTS, [PE, PP])
+    concurrent = run_section_based_analysis(FACTS, [PE, PP], context=ctx, serial=False)
+    serial = run_section_based_analysis(FACTS, [PE, PP], serial=True)
+    assert concurrent == serial
+    assert list(concurrent["section_blocks"]) == [
+        "business_risk", "financial_performance", "liquidity", "leverage", "accounting_quality", "stress", "covenants",
+    ]
+    assert set(ctx.engine_timings_ms) == set(concurrent["section_blocks"]) | {"breakevens"}
+
+
+def test_serial_by_default_unless_simulation(monkeypatch):
+    import app.config
+
+    def settings(serial, draws):
+        monkeypatch.setattr(app.config, "get_settings", lambda: SimpleNamespace(section_engines_serial=serial, stress_simulation_draws=draws))
+
+    settings(None, 0)
+    assert section_engines_serial() is True
+    settings(None, 500)
+    assert section_engines_serial() is False
+    settings(True, 500)
+    assert section_engines_serial() is True
+    assert section_engines_serial(False) is False
+
+
+def test_pool_size_change_does_not_break_running_graph():
+    started, release = threading.Event(), threading.Event()
+
+    def slow(_):
+        started.set()
+        release.wait(5)
+        return "a"
+
+    nodes = [EngineNode("a", slow), EngineNode("b", lambda d: d["a"] + "b", deps=("a",))]
+    out = {}
+    t = threading.Thread(target=lambda: out.update(run_engine_graph(nodes, max_workers=2)[0]))
+    t.start()
+    started.wait(5)
+    # A caller with another worker count must not shut down the pool the first graph still submits to
+    run_engine_graph([EngineNode("x", lambda _: 1), EngineNode("y", lambda _: 2)], max_workers=3)
+    release.set()
+    t.join(5)
+    assert out == {"a": "a", "b": "ab"}
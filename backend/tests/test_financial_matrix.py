@@ -0,0 +1,49 @@
+"""Matrix-mode financial engine must match the scalar run_engine exactly (values, order, traces)."""
+import random
+from datetime import date
+
+from app.services.financial_engine import _FORMULA_INPUTS, run_engine
+from app.services.financial_matrix import FactMatrix, compute_metric_arrays
+from app.services.metric_graph import REGISTRY
+
+_KEYS = sorted({k for keys in _FORMULA_INPUTS.values() for k in keys} | {
+    "other_receivables", "revenue", "cost_of_sales", "finance_costs", "net_cfo", "capex", "inventories",
+})
+_EDGE = [0.0, -0.0, 1.0, -1.0, 0.5, -0.5, 1e-9, 250.0, -250.0]
+
+
+def _random_facts(rng, periods):
+    facts = {}
+    for pe in periods:
+        for key in _KEYS:
+            roll = rng.random()
+            if roll < 0.25:
+                continue
+            facts[(key, pe)] = rng.choice(_EDGE) if roll < 0.4 else round(rng.uniform(-5000, 20000), 3)
+    return facts
+
+
+def test_matrix_mode_matches_scalar_mode():
+    rng = random.Random(11)
+    periods = [date(y, 6, 30) for y in range(2025, 2019, -1)]
+    for _ in range(300):
+        facts = _random_facts(rng, periods)
+        scalar = run_engine(facts, periods, return_traces=True, mode="scalar")
+        matrix = run_engine(facts, periods, return_traces=True, mode="matrix")
+        assert matrix == scalar
+        assert list(matrix[0]) == list(scalar[0])
+        assert {k: list(v) for k, v in matrix[1].items()} == {k: list(v) for k, v in scalar[1].items()}
+
+
+def test_matrix_mode_handles_no_facts_and_unknown_periods():
+    periods = [date(2025, 6, 30)]
+    facts = {("revenue", date(2019, 6, 30)): 10.0}
+    assert run_engine(facts, periods, mode="matrix") == run_engine(facts, periods, mode="scalar") == {}
+    assert run_engine({}, [], mode="matrix") == {}
+
+
+def test_every_registry_metric_has_a_vectorised_body():
+    # A metric added with @metric but no @vectorised counterpart must not silently drop out of matrix mode
+    assert [k for k, node in REGISTRY.items() if node.vector_fn is None] == []
+    arrays = compute_metric_arrays(FactMatrix({("revenue", date(2025, 6, 30)): 100.0}, [date(2025, 6, 30)]))
+    assert set(arrays) == set(REGISTRY)
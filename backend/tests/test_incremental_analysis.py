@@ -0,0 +1,93 @@
+"""Incremental re-analysis: single-fact overrides reproduce a full run and report what changed."""
+import json
+import random
+from datetime import date
+
+import pytest
+
+from app.services.analysis_orchestrator import run_full_analysis
+from app.services.incremental_analysis import SECTION_FACT_KEYS, reanalyse, refresh_memo_sections
+
+PE, PP = date(2025, 6, 30), date(2024, 6, 30)
+KEYS = sorted(set().union(*SECTION_FACT_KEYS.values()) | {"unused_key"})
+NEGATIVE = {"cost_of_sales", "finance_costs", "capex", "interest_paid"}
+NOTES = {"notes": {"43": {"text": "Covenant: net debt to EBITDA shall not exceed 3.0 times; interest cover of at least 3.0 times. Goodwill impairment sensitivity."}}}
+
+
+def _facts(seed: int = 3) -> dict:
+    rng = random.Random(seed)
+    facts = {}
+    for pe in (PE, PP):
+        for key in KEYS:
+            v = rng.uniform(100, 5000)
+            facts[(key, pe)] = -v if key in NEGATIVE else v
+    return facts
+
+
+def _full(facts):
+    return run_full_analysis(facts, [PE, PP], NOTES, company_name="Co", serial=True)
+
+
+@pytest.mark.parametrize("key", KEYS)
+def test_single_override_matches_full_run(key):
+    facts = _facts()
+    previous = _full(facts)
+    new = dict(facts)
+    new[(key, PE)] = facts[(key, PE)] * 1.7
+    out, report = reanalyse(previous, new, [PE, PP], NOTES, company_name="Co", serial=True)
+    assert out == _full(new)
+    assert report["changed_facts"] == [f"{key}@{PE.isoformat()}"]
+    assert set(report["sections_changed"]) <= set(report["sections_recomputed"])
+
+
+def test_report_limits_work_to_affected_artifacts():
+    facts = _facts()
+    previous = _full(facts)
+    new = {**facts, ("goodwill", PE): facts[("goodwill", PE)] * 50}
+    out, report = reanalyse(previous, new, [PE, PP], NOTES, company_name="Co", serial=True)
+    assert report["metrics_recomputed"] == 0
+    assert report["sections_recomputed"] == ["accounting_quality"]
+    assert "leverage" not in report["memo_sections"]
+    assert out["section_blocks"]["leverage"] == previous["section_blocks"]["leverage"]
+
+    _, unchanged = reanalyse(previous, facts, [PE, PP], NOTES, company_name="Co", serial=True)
+    assert unchanged["changed_facts"] == [] and unchanged["memo_sections"] == []
+
+
+def test_removed_fact_and_period_change():
+    facts = _facts()
+    previous = _full(facts)
+    new = {k: v for k, v in facts.items() if k != ("depreciation_amortisation", PP)}
+    out, report = reanalyse(previous, new, [PE, PP], NOTES, company_name="Co", serial=True)
+    assert out == _full(new)
+    assert "ebitda@" + PP.isoformat() in report["metrics_changed"]
+
+    out, report = reanalyse(previous, facts, [PE], NOTES, company_name="Co", serial=True)
+    assert report["full"] is True
+
+
+def test_refresh_memo_sections_keeps_untouched_text():
+    previous = {"executive_summary": "old summary", "security_collateral": "kept"}
+    facts = _facts()
+    out = _full(facts)
+    refreshed = refresh_memo_sections(
+        previous, ["executive_summary"], company_name="Co", review_period_end=PE, rating_grade=None,
+        recommendation="Approve", facts_by_period={}, metric_by_period={}, key_metrics={}, analysis_output=out,
+    )
+    assert refreshed["security_collateral"] == "kept"
+    assert refreshed["executive_summary"].startswith("This credit review covers Co")
+
+
+def test_reanalyse_from_stored_pack_state():
+    # generate_pack stores run_full_analysis output as JSON; overrides re-analyse from that copy
+    facts = _facts()
+    stored = json.loads(json.dumps(_full(facts), default=str))
+    new = {**facts, ("revenue", PE): facts[("revenue", PE)] * 0.6}
+    out, report = reanalyse(stored, new, [PE, PP], NOTES, company_name="Co", rating_grade_override="B", serial=True)
+    full = run_full_analysis(new, [PE, PP], NOTES, company_name="Co", rating_grade_override="B", serial=True)
+    assert json.loads(json.dumps(out, default=str)) == json.loads(json.dumps(full, default=str))
+
+    # A new rating with no block change still reaches the aggregation and the rating memo sections
+    _, report = reanalyse(stored, facts, [PE, PP], NOTES, company_name="Co", rating_grade_override="CCC", serial=True)
+    assert report["sections_changed"] == [] and report["aggregation_changed"]
+    assert "internal_rating_rationale" in report["memo_sections"]
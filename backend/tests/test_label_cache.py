@@ -0,0 +1,36 @@
+"""Tests for the shared label -> canonical mapping cache."""
+from app.services import label_cache
+from app.services.label_cache import LabelMappingCache, map_labels_cached
+
+
+def test_repeat_labels_hit_lru_and_skip_matching(monkeypatch):
+    monkeypatch.setattr(label_cache, "_cache", LabelMappingCache(100))
+    calls: list[str] = []
+
+    def _match(label: str):
+        calls.append(label)
+        return ("revenue", "RULE", False) if "revenue" in label else (None, "UNMAPPED", False)
+
+    labels = ["Revenue", "revenue ", "Hedging reserve", "Revenue"]
+    mapped, stats = map_labels_cached(labels, match=_match, namespace="t")
+    assert mapped["revenue "] == ("revenue", "RULE", False)
+    assert stats["lookups"] == 4 and stats["unique_labels"] == 2
+    assert stats["computed"] == 2 and stats["hit_rate"] == 0.0
+    assert sorted(calls) == ["hedging reserve", "revenue"]
+
+    _, stats = map_labels_cached(["REVENUE", "hedging  reserve"], match=_match, namespace="t")
+    assert stats["lru_hits"] == 2 and stats["computed"] == 0 and stats["hit_rate"] == 1.0
+    assert len(calls) == 2
+
+    _, stats = map_labels_cached(["Revenue"], match=_match, namespace="other-version")
+    assert stats["computed"] == 1
+
+
+def test_lru_evicts_least_recent():
+    cache = LabelMappingCache(2)
+    cache.put("v", "a", (None, "UNMAPPED", False))
+    cache.put("v", "b", (None, "UNMAPPED", False))
+    cache.get("v", "a")
+    cache.put("v", "c", (None, "UNMAPPED", False))
+    assert cache.get("v", "b") is None
+    assert cache.get("v", "a") is not None and len(cache) == 2
@@ -0,0 +1,29 @@
+"""Compiled label matcher must reproduce the original Pass A / Pass B priority order exactly."""
+from app.services.label_matcher import CompiledLabelMatcher
+from app.services.mapping_rules import map_raw_label
+from tests.label_matcher_reference import generate_labels, legacy_map
+
+
+def test_earlier_prefix_rule_beats_later_exact_synonym():
+    # "total equity" (prefix, earlier rule) outranks the later exact rule "total equity and liabilities"
+    assert map_raw_label("Total equity and liabilities") == ("total_equity", "RULE", False)
+
+
+def test_regex_list_order_beats_match_position():
+    # "revenue" appears first in the label but is the last Pass B pattern
+    assert map_raw_label("Deferred revenue depreciation charge") == ("depreciation_amortisation", "REGEX", True)
+
+
+def test_suffix_and_unmapped():
+    assert map_raw_label("Group  INVENTORIES ") == ("inventories", "RULE", False)
+    assert map_raw_label("hedging reserve movement") == (None, "UNMAPPED", False)
+
+
+def test_matches_legacy_loops_on_synthetic_labels():
+    for label in generate_labels(5000, seed=11):
+        assert map_raw_label(label) == legacy_map(label), label
+
+
+def test_duplicate_synonym_keeps_first_priority():
+    m = CompiledLabelMatcher([(["sales"], "revenue", False), (["sales"], "other", False)], [])
+    assert m.match("sales") == ("revenue", "RULE", False)
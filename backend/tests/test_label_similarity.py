@@ -0,0 +1,44 @@
+"""Tests for the n-gram TF-IDF label similarity index and batched suggestions."""
+from app.services.label_similarity import LabelSimilarityIndex, base_entries, char_ngrams
+from app.services.llm_mapping_suggestions import suggest_batch
+
+
+def test_char_ngrams_are_normalised_and_padded():
+    grams = char_ngrams("  Net   Debt ")
+    assert " ne" in grams and "ebt " in grams
+    assert grams == char_ngrams("net debt")
+
+
+def test_top_k_candidates_collapse_to_best_entry_per_key():
+    index = LabelSimilarityIndex(base_entries())
+    [cands] = index.search_many(["Cash at bank"], k=3)
+    assert cands[0]["canonical_key"] == "cash_and_cash_equivalents"
+    assert len({c["canonical_key"] for c in cands}) == len(cands) == 3
+    assert all(0 < c["score"] <= 1 for c in cands)
+    assert [c["score"] for c in cands] == sorted((c["score"] for c in cands), reverse=True)
+    assert index.search("qqqq") == []
+
+
+def test_incremental_add_is_searchable_and_close_to_rebuild():
+    entries = base_entries()
+    index = LabelSimilarityIndex(entries)
+    index.search("warm up")  # compile the main segment
+    new = [("Merchandise sales to franchisees", "revenue", "decision"), ("Store rentals payable", "other_payables", "decision")]
+    assert index.add(new) == 2
+    assert index.add(new[:1]) == 0
+    rebuilt = LabelSimilarityIndex(entries + new)
+    for label in ("merchandise sales franchise", "store rental payables"):
+        # The delta segment reuses the main segment's idf, so only the scores drift slightly
+        got, want = index.search(label, 1)[0], rebuilt.search(label, 1)[0]
+        assert got["matched_label"] == want["matched_label"] and got["source"] == "decision"
+        assert abs(got["score"] - want["score"]) < 0.05
+
+
+def test_suggest_batch_rule_similarity_and_unmapped():
+    index = LabelSimilarityIndex(base_entries() + [("Merchandise sales to franchisees", "revenue", "decision")])
+    rule, similar, none = suggest_batch(["Revenue", "Merchandise sale to franchisee", "zzzz"], index=index)
+    assert rule["method"] == "RULE" and rule["canonical_key"] == "revenue"
+    assert similar["method"] == "SIMILARITY" and similar["canonical_key"] == "revenue"
+    assert similar["candidates"][0]["source"] == "decision"
+    assert 0 < similar["confidence"] < 0.75
+    assert none["canonical_key"] is None and none["suggested_candidates"] == []
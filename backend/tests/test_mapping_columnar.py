@@ -0,0 +1,80 @@
+"""Columnar engagement mapping must reproduce run_mapping per document, concatenated."""
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+from uuid import uuid4
+
+from app.services.extraction_loader import load_extraction_from_file
+from app.services.mapping_columnar import run_mapping_frame, run_mapping_frame_isolated
+from app.services.mapping_pipeline import run_mapping
+from app.services.tenant_mapping_rules import compile_tenant_rules
+
+GOLD = Path(__file__).parent / "gold" / "shoprite_2025" / "extraction.xlsx"
+
+
+def _per_document(documents, tenant_rules=None, scale_factor=1.0):
+    facts, unmapped = [], {}
+    for dv_id, extraction in documents:
+        f, u = run_mapping(
+            "", "c1", scale_factor=scale_factor, extraction_override=extraction, return_unmapped=True,
+            tenant_rules=tenant_rules, document_version_id=dv_id,
+        )
+        facts.extend(f)
+        unmapped[dv_id] = u
+    return facts, unmapped
+
+
+def test_gold_extraction_matches_run_mapping():
+    documents = [("dv-gold", load_extraction_from_file(str(GOLD)))]
+    expected = _per_document(documents, scale_factor=1000.0)
+    assert run_mapping_frame(documents, "c1", scale_factor=1000.0, return_unmapped=True) == expected
+
+
+def test_multi_document_dedup_sign_sfp_and_tenant_rules():
+    dv1, dv2 = str(uuid4()), str(uuid4())
+    doc1 = {
+        "SCI_GROUP": [
+            {"raw_label": "Revenue", "line_no": 1, "page": 3, "2025 (Rm)": 500.0, "2024 (Rm)": "450"},
+            {"raw_label": "Revenue", "line_no": 2, "2025 (Rm)": 999.0},
+            {"raw_label": "Cost of sales", "line_no": 3, "2025 (Rm)": 300.0, "2024 (Rm)": -280.0},
+            {"raw_label": "Mystery line", "line_no": 4, "2025 (Rm)": 1.0, "2024 (Rm)": "n/a"},
+            {"raw_label": "", "line_no": 5, "2025 (Rm)": 7.0},
+        ],
+        "CF_GROUP": [{"raw_label": "Cash and cash equivalents", "line_no": 1, "2025 (Rm)": 10.0}],
+        "SFP_GROUP": [{"raw_label": "Cash and cash equivalents", "line_no": 9, "2025 (Rm)": 12.0}],
+        "SCI_COMPANY": [{"raw_label": "Revenue", "line_no": 1, "2025 (Rm)": 1.0}],
+    }
+    doc2 = {
+        "SCI_COMPANY": [
+            {"raw_label": "Store sales", "line_no": 1, "2025": 40.0, "note": 4},
+            {"raw_label": "Mystery line", "line_no": 2, "2025": 2.0},
+            {"raw_label": "Mystery line", "line_no": 3, "2024": None},
+        ],
+    }
+    documents = [(dv1, doc1), (dv2, doc2)]
+    rules = compile_tenant_rules("t1", "v1", [
+        SimpleNamespace(
+            id=uuid4(), pattern="store sales", canonical_key="revenue", scope="per_document_version",
+            scope_entity_id=dv2, priority=100, is_expense=False, created_at=datetime(2026, 1, 1),
+        ),
+    ])
+    facts, unmapped = run_mapping_frame(documents, "c1", tenant_rules=rules, return_unmapped=True)
+    assert (facts, unmapped) == _per_document(documents, tenant_rules=rules)
+    cash = [f for f in facts if f["canonical_key"] == "cash_and_cash_equivalents"]
+    assert [f["value_base"] for f in cash] == [12.0]
+    assert any(f["source_refs_json"][0]["mapping_method"] == "TENANT_RULE" for f in facts)
+
+
+def test_empty_engagement():
+    assert run_mapping_frame([], "c1") == []
+    assert run_mapping_frame([("dv", {"SCI": []})], "c1", return_unmapped=True) == ([], {"dv": []})
+
+
+def test_malformed_document_only_drops_itself():
+    good = {"SCI_GROUP": [{"raw_label": "Revenue", "line_no": 1, "2025 (Rm)": 500.0, "2024 (Rm)": 450.0}]}
+    other = {"SFP_GROUP": [{"raw_label": "Inventories", "line_no": 1, "2025 (Rm)": 80.0}]}
+    documents = [("dv-good", good), ("dv-bad", {"SCI_GROUP": [{"raw_label": ["Revenue"], "2025 (Rm)": 1.0}]}), ("dv-other", other)]
+    facts, failed = run_mapping_frame_isolated(documents, "c1")
+    assert list(failed) == ["dv-bad"]
+    assert facts == run_mapping_frame([documents[0], documents[2]], "c1")
+    assert run_mapping_frame_isolated([documents[0]], "c1") == (run_mapping_frame([documents[0]], "c1"), {})
@@ -0,0 +1,69 @@
+"""Tests for the batched MappingDecision resolver (decisions first, one LLM call for misses)."""
+import hashlib
+from datetime import datetime
+from types import SimpleNamespace
+
+from app.schemas.llm_semantic import CanonicalMappingOutput
+from app.services.mapping_decisions import label_hash, resolve_labels
+
+
+class _Session:
+    """Minimal Session stand-in: serves decision rows for SELECTs and records bulk inserts."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.selects = 0
+        self.inserted = []
+
+    def execute(self, stmt, params=None):
+        if params is not None:
+            self.inserted.extend(params)
+            return None
+        self.selects += 1
+        return SimpleNamespace(all=lambda: self.rows)
+
+    def flush(self):
+        pass
+
+
+def _row(label, key, method, day, legacy=False):
+    h = hashlib.sha256(label.encode()).hexdigest() if legacy else label_hash(label)
+    return SimpleNamespace(raw_label_hash=h, canonical_key=key, confidence=1.0, method=method, updated_at=datetime(2026, 1, day))
+
+
+def test_label_hash_normalises():
+    assert label_hash("  Trade  Receivables ") == label_hash("trade receivables")
+
+
+def test_decisions_short_circuit_and_single_llm_call_for_misses():
+    db = _Session([
+        _row("store sales", "other_receivables", "LLM", 5),
+        _row("store sales", "revenue", "MANUAL", 1),
+        _row("Rental Income", "finance_income", "MANUAL", 2, legacy=True),
+    ])
+    calls = []
+
+    def mapper(lines, dv_id):
+        calls.append([l["raw_label"] for l in lines])
+        return CanonicalMappingOutput.model_validate({"mappings": [
+            {"statement_type": "SCI", "raw_label": "Franchise fees", "canonical_key": "revenue", "confidence": 0.9},
+            {"statement_type": "SCI", "raw_label": "Sundry", "canonical_key": "UNMAPPED", "confidence": 0.3},
+        ]})
+
+    lines = [{"statement_type": "SCI", "section_path": [], "raw_label": l} for l in
+             ["Store Sales", "Rental Income", "Franchise fees", "franchise  fees", "Sundry"]]
+    out = resolve_labels(db, "t1", lines, "dv1", llm_mapper=mapper)
+
+    assert db.selects == 1 and calls == [["Franchise fees", "Sundry"]]
+    assert [(r["canonical_key"], r["source"]) for r in out] == [
+        ("revenue", "decision"), ("finance_income", "decision"),
+        ("revenue", "llm"), ("revenue", "llm"), (None, "llm"),
+    ]
+    assert [(r["raw_label"], r["canonical_key"], r["method"]) for r in db.inserted] == [("Franchise fees", "revenue", "LLM")]
+    assert db.inserted[0]["raw_label_hash"] == label_hash("franchise fees")
+
+
+def test_no_llm_call_when_everything_is_decided():
+    db = _Session([_row("revenue", "revenue", "RULE", 1)])
+    out = resolve_labels(db, "t1", [{"statement_type": "SCI", "raw_label": "Revenue"}], "dv1", llm_mapper=None)
+    assert out[0]["canonical_key"] == "revenue" and db.inserted == []
@@ -0,0 +1,50 @@
+"""Metric DAG: topological order, per-(metric, period) memoisation and graph-derived traces."""
+from datetime import date
+
+from app.services.financial_engine import run_engine
+from app.services.metric_graph import REGISTRY, TOPO_ORDER, MetricEvaluator, fact_inputs
+from app.services.section_orchestrator import run_section_based_analysis
+
+PE, PP = date(2025, 6, 30), date(2024, 6, 30)
+FACTS = {
+    ("revenue", PE): 1000.0, ("revenue", PP): 900.0,
+    ("operating_profit", PE): 120.0, ("operating_profit", PP): 100.0,
+    ("depreciation_amortisation", PE): 30.0, ("depreciation_amortisation", PP): 25.0,
+    ("finance_costs", PE): -20.0, ("finance_costs", PP): -18.0,
+    ("cash_and_cash_equivalents", PE): 50.0, ("long_term_borrowings", PE): 300.0,
+    ("lease_liabilities_non_current", PE): 40.0, ("other_receivables", PE): 10.0,
+    ("trade_payables", PE): 80.0, ("net_cfo", PE): 110.0, ("capex", PE): 30.0,
+}
+
+
+def test_topological_order_puts_inputs_first():
+    pos = {k: i for i, k in enumerate(TOPO_ORDER)}
+    assert set(pos) == set(REGISTRY)
+    for key, node in REGISTRY.items():
+        assert all(pos[i] < pos[key] for i in node.inputs if i in REGISTRY)
+
+
+def test_each_intermediate_computed_once_per_period():
+    metrics = MetricEvaluator(FACTS)
+    metrics.evaluate([PE, PP])
+    assert metrics.evaluations == 2 * len(REGISTRY)
+    metrics.value("ebitda", PE)
+    metrics.value("net_debt_to_ebitda", PE)
+    assert metrics.evaluations == 2 * len(REGISTRY)
+
+
+def test_trace_inputs_follow_graph_leaves():
+    assert fact_inputs("net_debt_to_ebitda") == (
+        "operating_profit", "depreciation_amortisation", "cash_and_cash_equivalents", "short_term_borrowings",
+        "current_portion_long_term_debt", "long_term_borrowings", "lease_liabilities_current",
+        "lease_liabilities_non_current",
+    )
+    _, traces = run_engine(FACTS, [PE], return_traces=True, mode="scalar")
+    used = [i["canonical_key"] for i in traces["current_ratio"][PE.isoformat()]["inputs"]]
+    assert used == ["cash_and_cash_equivalents", "other_receivables", "trade_payables"]
+
+
+def test_shared_evaluator_serves_every_section_engine():
+    out = run_section_based_analysis(FACTS, [PE, PP])
+    assert out["financial"]["ebitda"] == {PE.isoformat(): 150.0, PP.isoformat(): 125.0}
+    assert out["section_blocks"]["leverage"]["key_metrics"]
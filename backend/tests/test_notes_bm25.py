@@ -0,0 +1,60 @@
+"""Tests for the BM25 keyword-fallback index and its LRU cache."""
+import asyncio
+
+from app.services import notes_bm25
+from app.services.notes_bm25 import Bm25Index, stem, terms, tokenize
+
+
+def _index() -> Bm25Index:
+    return Bm25Index.build([
+        ("GROUP:21.1", "Borrowings and lease liabilities. Revolving credit facility covenants."),
+        ("GROUP:3.1", "Revenue from contracts with customers. Revenue recognition policy."),
+        ("GROUP:9.2", "Inventories are measured at the lower of cost and net realisable value."),
+    ])
+
+
+def test_tokenize_drops_short_tokens():
+    assert tokenize("Net debt: R1.2bn of IFRS 16 leases") == ["net", "debt", "2bn", "ifrs", "leases"]
+
+
+def test_plural_and_singular_share_terms():
+    assert set(terms("covenant borrowing liability")) <= set(terms("Covenants and borrowings; contingent liabilities"))
+    assert [stem(w) for w in ("leases", "policies", "business", "status")] == ["lease", "policy", "business", "status"]
+    idx = _index()
+    assert idx.search("covenant borrowing")[0][0] == "GROUP:21.1"
+    assert idx.search("inventory")[0][0] == "GROUP:9.2"
+
+
+def test_bm25_ranks_by_term_weight():
+    idx = _index()
+    hits = idx.search("revenue recognition", top_k=5)
+    assert hits[0][0] == "GROUP:3.1"
+    assert len(hits) == 1
+    assert idx.search("covenants borrowings")[0][0] == "GROUP:21.1"
+    assert idx.search("goodwill") == []
+
+
+def test_bm25_json_round_trip():
+    idx = _index()
+    restored = Bm25Index.from_json(idx.to_json())
+    assert restored.search("inventories cost") == idx.search("inventories cost")
+
+
+def test_lru_eviction(monkeypatch):
+    notes_bm25.clear_bm25_cache()
+    monkeypatch.setattr(notes_bm25, "LRU_MAX_ENTRIES", 2)
+    idx = _index()
+    notes_bm25._lru_put(("dv1", "GROUP"), "f1", idx)
+    notes_bm25._lru_put(("dv2", "GROUP"), "f2", idx)
+    notes_bm25._lru_get(("dv1", "GROUP"))
+    notes_bm25._lru_put(("dv3", "GROUP"), "f3", idx)
+    assert notes_bm25._lru_get(("dv2", "GROUP")) is None
+    assert notes_bm25._lru_get(("dv1", "GROUP")) is not None
+    assert notes_bm25._lru_get(("dv3", "GROUP")) is not None
+    notes_bm25.clear_bm25_cache()
+
+
+def test_async_redis_tier_degrades_to_miss():
+    # Unreachable Redis (or a missing key) is a cache miss, never an error on the request path
+    assert asyncio.run(notes_bm25._redis_get_async(("dv-missing", "GROUP"), "none")) is None
+    asyncio.run(notes_bm25._redis_set_async(("dv-missing", "GROUP"), "none", _index()))
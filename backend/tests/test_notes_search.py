@@ -0,0 +1,86 @@
+"""Tests for notes search parameter building and rank fusion (no database required)."""
+from types import SimpleNamespace
+
+from app.db import hnsw
+from app.services import notes_retrieval
+from app.services.notes_retrieval import RRF_K, _hybrid_params, _rrf_single_list, _semantic_params
+
+
+def test_hybrid_params_require_query_and_embedding():
+    emb = [0.1] * 1536
+    assert _hybrid_params(None, "dv", "revenue recognition", "GROUP", 5, 0.5) is None
+    assert _hybrid_params(emb, "dv", " ", "GROUP", 5, 0.5) is None
+    params = _hybrid_params(emb, "dv", "revenue recognition", "GROUP", 5, 0.7)
+    assert params["pool"] == 10
+    assert params["kw_w"] == 0.7
+    assert abs(params["sem_w"] - 0.3) < 1e-12
+    assert params["rrf_k"] == float(RRF_K)
+    assert params["emb"] == emb
+
+
+def test_semantic_params_bind_vector_as_float_list():
+    assert _semantic_params([1.0, 2.0], "dv", "GROUP", 5) is None
+    params = _semantic_params([1] * 1536, "dv", "GROUP", 5)
+    assert isinstance(params["emb"], list) and all(isinstance(x, float) for x in params["emb"])
+
+
+def test_rrf_single_list_preserves_rank_order():
+    fused = _rrf_single_list([("GROUP:3.1", 0.9), ("GROUP:1.2", 0.4), ("GROUP:7.1", 0.1)], 2, 0.5)
+    assert [cid for cid, _ in fused] == ["GROUP:3.1", "GROUP:1.2"]
+    assert fused[0][1] == 0.5 / (RRF_K + 1)
+    assert fused[0][1] > fused[1][1]
+
+
+class _RecordingSession:
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+
+    def execute(self, stmt, params=None):
+        self.statements.append(stmt)
+        return SimpleNamespace(fetchall=lambda: self.rows)
+
+
+def test_short_query_with_embedding_ranks_semantically(monkeypatch):
+    # "x" is too short for tsvector, but an embedding exists: semantic hits, not an empty keyword search
+    monkeypatch.setattr(notes_retrieval, "get_embedding", lambda q: [0.1] * 1536)
+    db = _RecordingSession([("GROUP:4.1", 0.91), ("GROUP:2.3", 0.77)])
+    fused = notes_retrieval.search_notes_hybrid_scored(db, "dv", "x", top_k=5, keyword_weight=0.25)
+    assert notes_retrieval._SEMANTIC_SQL in db.statements
+    assert [cid for cid, _ in fused] == ["GROUP:4.1", "GROUP:2.3"]
+    assert fused[0][1] == 0.75 / (RRF_K + 1)
+
+
+class _FakeDbapiConnection:
+    def __init__(self, reject: str | None = None):
+        self.autocommit = False
+        self.executed = []
+        self.autocommit_during = []
+        self.reject = reject
+
+    def cursor(self):
+        conn = self
+
+        class _Cursor:
+            def execute(self, sql):
+                conn.autocommit_during.append(conn.autocommit)
+                if conn.reject and conn.reject in sql:
+                    raise RuntimeError("unrecognized configuration parameter")
+                conn.executed.append(sql)
+
+            def close(self):
+                pass
+
+        return _Cursor()
+
+
+def test_hnsw_settings_applied_once_per_connection_in_autocommit(monkeypatch):
+    monkeypatch.setattr(hnsw, "get_settings", lambda: SimpleNamespace(notes_hnsw_ef_search=80, notes_hnsw_iterative_scan="relaxed_order"))
+    conn = _FakeDbapiConnection(reject="iterative_scan")
+    hnsw._apply_hnsw_settings(conn, None)
+    assert conn.executed == ["SET hnsw.ef_search = '80'"]
+    assert conn.autocommit_during == [True, True]
+    assert conn.autocommit is False
+
+    monkeypatch.setattr(hnsw, "get_settings", lambda: SimpleNamespace(notes_hnsw_ef_search=40, notes_hnsw_iterative_scan="bogus; DROP"))
+    assert hnsw.hnsw_session_settings() == {"hnsw.ef_search": "40"}
@@ -0,0 +1,109 @@
+"""
+Notes search SQL against a live Postgres with pgvector >= 0.8 (skipped when none is reachable).
+Each test runs in a rolled-back transaction on a TEMP note_chunks table, which shadows the real one.
+"""
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import DBAPIError
+
+from app.config import get_settings
+from app.db.hnsw import install_hnsw_session_settings
+from app.services.notes_retrieval import _HYBRID_RRF_SQL, _SEMANTIC_SQL, _hybrid_params
+
+DIM = 16
+TARGET = "dv-target"
+
+
+@pytest.fixture(scope="module")
+def pg_engine():
+    url = get_settings().database_url.replace("+asyncpg", "")
+    engine = create_engine(url, connect_args={"connect_timeout": 2})
+    install_hnsw_session_settings(engine)
+    try:
+        with engine.connect() as conn:
+            version = conn.execute(text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")).scalar()
+    except DBAPIError:
+        engine.dispose()
+        pytest.skip("Postgres not reachable")
+    if version is None or tuple(int(x) for x in version.split(".")[:2]) < (0, 8):
+        engine.dispose()
+        pytest.skip("pgvector >= 0.8 not installed")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def conn(pg_engine):
+    with pg_engine.connect() as conn:
+        trans = conn.begin()
+        conn.execute(text(f"""
+            CREATE TEMP TABLE note_chunks (
+                chunk_id text, document_version_id text, scope text,
+                search_vector tsvector, embedding vector({DIM})
+            ) ON COMMIT DROP
+        """))
+        yield conn
+        trans.rollback()
+
+
+def _load(conn, rows: list[tuple[str, str, str, np.ndarray]], index: bool = True) -> None:
+    conn.execute(
+        text("""
+            INSERT INTO note_chunks (chunk_id, document_version_id, scope, search_vector, embedding)
+            VALUES (:cid, :dv, 'GROUP', to_tsvector('english', :body), CAST(:emb AS vector))
+        """),
+        [{"cid": cid, "dv": dv, "body": body, "emb": "[" + ",".join(map(str, v.tolist())) + "]"} for cid, dv, body, v in rows],
+    )
+    if index:
+        conn.execute(text("CREATE INDEX ON note_chunks USING hnsw (embedding vector_cosine_ops)"))
+    conn.execute(text("ANALYZE note_chunks"))
+
+
+def _unit(rng: np.random.Generator, n: int) -> np.ndarray:
+    v = rng.standard_normal((n, DIM))
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+def test_filtered_semantic_query_fills_top_k_through_hnsw(conn):
+    # 20 target chunks among 3000 others: ef_search (40) candidates from the whole table hold < 1 target row
+    rng = np.random.default_rng(3)
+    target = _unit(rng, 20)
+    others = _unit(rng, 3000)
+    _load(conn, [(f"T:{i}", TARGET, "", v) for i, v in enumerate(target)]
+          + [(f"O:{i}", f"dv-{i % 30}", "", v) for i, v in enumerate(others)])
+    # Session settings come from the connect listener, not per-search statements
+    assert conn.execute(text("SHOW hnsw.iterative_scan")).scalar() == get_settings().notes_hnsw_iterative_scan
+    conn.execute(text("SET LOCAL enable_seqscan = off"))
+    query = _unit(rng, 1)[0]
+    params = {"emb": query.tolist(), "dv_id": TARGET, "scope": "GROUP", "top_k": 5}
+
+    plan = "\n".join(r[0] for r in conn.execute(text("EXPLAIN " + str(_SEMANTIC_SQL)), params))
+    assert "note_chunks_embedding_idx" in plan
+    rows = conn.execute(_SEMANTIC_SQL, params).fetchall()
+    assert len(rows) == 5
+    assert all(cid.startswith("T:") for cid, _ in rows)
+    sims = [s for _, s in rows]
+    assert sims == sorted(sims, reverse=True)
+    exact = {f"T:{i}" for i in np.argsort(-(target @ query))[:5]}
+    assert len(exact & {cid for cid, _ in rows}) >= 4
+
+
+def test_hybrid_rrf_sql_fuses_both_lists_within_one_document(conn):
+    rng = np.random.default_rng(5)
+    query = _unit(rng, 1)[0]
+    near = query + 0.05 * _unit(rng, 1)[0]
+    far = -query
+    _load(conn, [
+        ("GROUP:1", TARGET, "covenant breach covenant breach", query),  # keyword rank 1, semantic rank 1
+        ("GROUP:2", TARGET, "covenant breach", far),  # keyword rank 2, semantic rank 3
+        ("GROUP:3", TARGET, "segment revenue", near),  # semantic rank 2 only
+        ("GROUP:9", "dv-other", "covenant breach covenant breach", query),  # filtered out
+    ], index=False)
+    params = _hybrid_params([0.0] * 1536, TARGET, "covenant breach", "GROUP", 3, 0.5)
+    params["emb"] = query.tolist()
+    rows = conn.execute(_HYBRID_RRF_SQL, params).fetchall()
+    assert [r[0] for r in rows] == ["GROUP:1", "GROUP:2", "GROUP:3"]
+    assert rows[0][1] == pytest.approx(0.5 / 61 + 0.5 / 61)
+    assert rows[1][1] == pytest.approx(0.5 / 62 + 0.5 / 63)
+    assert rows[2][1] == pytest.approx(0.5 / 62)
@@ -0,0 +1,50 @@
+"""Portfolio batch analysis must reproduce run_full_analysis per company."""
+import random
+from datetime import date
+
+import pandas as pd
+
+from app.services.analysis_orchestrator import run_full_analysis
+from app.services.portfolio_batch import facts_table_from_dicts, run_portfolio_analysis
+
+_KEYS = [
+    "revenue", "cost_of_sales", "operating_profit", "depreciation_amortisation", "finance_costs",
+    "profit_after_tax", "cash_and_cash_equivalents", "short_term_borrowings", "current_portion_long_term_debt",
+    "long_term_borrowings", "lease_liabilities_current", "lease_liabilities_non_current", "trade_receivables",
+    "inventories", "trade_payables", "net_cfo", "capex", "total_equity", "total_assets", "total_liabilities",
+]
+
+
+def _company_facts(rng: random.Random) -> dict:
+    periods = [date(y, 2, 28) for y in range(2025, 2025 - rng.randint(1, 7), -1)]
+    facts = {}
+    for pe in periods:
+        for key in _KEYS:
+            if key == "operating_profit" or rng.random() < 0.85:
+                sign = -1.0 if key in ("cost_of_sales", "finance_costs", "capex") else 1.0
+                facts[(key, pe)] = sign * round(rng.uniform(0, 5000), 2)
+    return facts
+
+
+def test_batch_matches_single_company_analysis():
+    rng = random.Random(5)
+    by_company = {f"co-{i}": _company_facts(rng) for i in range(40)}
+    out = run_portfolio_analysis(facts_table_from_dicts(by_company))
+    assert list(out) == list(by_company)
+    for company_id, facts in by_company.items():
+        periods = sorted({pe for _, pe in facts}, reverse=True)[:5]
+        window = {k: v for k, v in facts.items() if k[1] in periods}
+        assert out[company_id] == run_full_analysis(window, periods)
+
+
+def test_batch_accepts_datetime_periods_and_drops_missing_values():
+    table = pd.DataFrame({
+        "company_id": [1, 1, 1, 2],
+        "canonical_key": ["revenue", "operating_profit", "revenue", "revenue"],
+        "period_end": pd.to_datetime(["2025-06-30", "2025-06-30", "2024-06-30", "2025-06-30"]),
+        "value": [100.0, 20.0, None, 50.0],
+    })
+    out = run_portfolio_analysis(table)
+    assert out[1]["audit"]["periods"] == ["2025-06-30"]
+    assert out[1]["financial"]["ebitda"] == {"2025-06-30": 20.0}
+    assert "ebitda" not in out[2]["financial"]
@@ -0,0 +1,90 @@
+"""One-factor portfolio EL / UL must match the scalar Vasicek formula and aggregate additively."""
+import math
+import time
+from statistics import NormalDist
+
+import numpy as np
+import pytest
+
+from app.services.portfolio_risk_engine import (
+    asset_correlation,
+    basel_corporate_correlation,
+    norm_cdf,
+    norm_ppf,
+    portfolio_risk,
+    vasicek_loss_contributions,
+)
+
+_N = NormalDist()
+
+
+def _vasicek_scalar(pd: float, lgd: float, ead: float, rho: float, q: float) -> float:
+    return ead * lgd * _N.cdf((_N.inv_cdf(pd) + math.sqrt(rho) * _N.inv_cdf(q)) / math.sqrt(1 - rho))
+
+
+def test_normal_helpers_match_stdlib():
+    p = np.array([1e-6, 0.01, 0.5, 0.975])
+    assert np.allclose(norm_ppf(p), [_N.inv_cdf(x) for x in p])
+    x = np.array([-4.0, -1.0, 0.0, 2.5])
+    assert np.allclose(norm_cdf(x), [_N.cdf(v) for v in x])
+
+
+def test_contributions_match_scalar_formula():
+    pd = np.array([0.001, 0.02, 0.15])
+    lgd = np.array([0.45, 0.6, 0.3])
+    ead = np.array([100.0, 250.0, 40.0])
+    rho = np.array([0.24, 0.14, 0.2])
+    c = vasicek_loss_contributions(pd, lgd, ead, rho, 0.999)
+    expected = [_vasicek_scalar(*args, 0.999) for args in zip(pd, lgd, ead, rho)]
+    assert np.allclose(c["conditional_loss"], expected)
+    assert np.allclose(c["expected_loss"], pd * lgd * ead)
+    assert (c["unexpected_loss"] > 0).all()
+
+
+def test_degenerate_pds_have_no_unexpected_loss():
+    c = vasicek_loss_contributions(np.array([0.0, 1.0]), np.array([0.5, 0.5]), np.array([10.0, 10.0]), np.array([0.2, 0.2]))
+    assert c["expected_loss"].tolist() == [0.0, 5.0]
+    assert c["unexpected_loss"].tolist() == [0.0, 0.0]
+    with pytest.raises(ValueError):
+        vasicek_loss_contributions(np.array([0.01]), np.array([0.5]), np.array([1.0]), np.array([0.2]), confidence=1.0)
+
+
+def test_sector_table_then_basel_fallback():
+    pd = np.array([0.01, 0.01, 0.01])
+    rho = asset_correlation(pd, ["real_estate", "unclassified", "retail"], overrides={"retail": 0.3})
+    assert rho[0] == pytest.approx(0.24)
+    assert rho[1] == pytest.approx(float(basel_corporate_correlation(np.array([0.01]))[0]))
+    assert rho[2] == pytest.approx(0.3)
+
+
+def test_portfolio_aggregates_sectors_and_concentration():
+    out = portfolio_risk(
+        ["a", "b", "c", "d"],
+        pd=[0.01, 0.02, 0.005, 0.05],
+        lgd=[0.4, 0.5, 0.45, 0.6],
+        ead=[100.0, 100.0, 100.0, 100.0],
+        sectors=["Real Estate", "real estate", "Mining", None],
+    )
+    assert out["obligors"] == 4
+    assert set(out["by_sector"]) == {"real_estate", "mining", "unclassified"}
+    assert out["by_sector"]["real_estate"]["obligors"] == 2
+    assert sum(s["expected_loss"] for s in out["by_sector"].values()) == pytest.approx(out["expected_loss"], abs=0.02)
+    assert sum(s["unexpected_loss"] for s in out["by_sector"].values()) == pytest.approx(out["unexpected_loss"], abs=0.02)
+    assert out["concentration"]["hhi_name"] == pytest.approx(0.25)
+    assert out["concentration"]["effective_names"] == pytest.approx(4.0)
+    assert out["top_contributors"][0]["obligor_id"] == "d"
+
+
+def test_empty_portfolio():
+    out = portfolio_risk([], [], [], [], [])
+    assert out["obligors"] == 0 and out["expected_loss"] == 0.0
+
+
+def test_ten_thousand_obligors_well_under_a_second():
+    rng = np.random.default_rng(1)
+    n = 10_000
+    sectors = rng.choice(["retail", "mining", "real_estate", "other"], n).tolist()
+    t0 = time.perf_counter()
+    out = portfolio_risk(list(range(n)), rng.uniform(0.0005, 0.2, n), rng.uniform(0.2, 0.8, n), rng.lognormal(10, 1, n), sectors)
+    assert time.perf_counter() - t0 < 1.0
+    assert out["obligors"] == n and out["unexpected_loss"] > 0
@@ -0,0 +1,84 @@
+"""Compiled rating scorecard: identical to the reference scorer, batch scoring, reload on file change."""
+import json
+import os
+import random
+
+import numpy as np
+import pandas as pd
+
+from app.services.rating_engine import (
+    apply_overrides,
+    get_scorecard,
+    load_config,
+    run_rating,
+    score_many,
+    score_qualitative,
+    score_quantitative,
+    score_to_grade,
+)
+
+_KEYS = ["net_debt_to_ebitda", "interest_cover", "ebitda_margin", "current_ratio", "fcf_conversion"]
+
+
+def _reference(config, metrics, qualitative=None, overrides=None):
+    quant, breakdown = score_quantitative(config, metrics)
+    total = quant + score_qualitative(config, qualitative or {})
+    grade = apply_overrides(config, score_to_grade(config, total), overrides or {})
+    return grade, round(total, 2), round(quant, 2), breakdown
+
+
+def _random_metrics(rng, config):
+    edges = {m["key"]: [b.get("max", b.get("min")) for b in m["bands"]] for m in config["quantitative"]["metrics"]}
+    out = {}
+    for key in _KEYS:
+        roll = rng.random()
+        if roll < 0.15:
+            continue
+        out[key] = rng.choice(edges[key]) if roll < 0.4 else rng.uniform(-2, 30)
+    return out
+
+
+def test_compiled_scorecard_matches_reference():
+    config = load_config()
+    rng = random.Random(9)
+    for _ in range(2000):
+        metrics = _random_metrics(rng, config)
+        overrides = {"covenant_breach": rng.random() < 0.2}
+        result = run_rating(metrics, overrides_context=overrides)
+        grade, total, quant, breakdown = _reference(config, metrics, overrides=overrides)
+        assert (result["rating_grade"], result["total_score"], result["quantitative_score"]) == (grade, total, quant)
+        assert result["score_breakdown"] == breakdown
+
+
+def test_score_many_matches_run_rating_row_by_row():
+    config = load_config()
+    rng = random.Random(4)
+    rows = [_random_metrics(rng, config) for _ in range(3000)]
+    table = pd.DataFrame(rows, columns=_KEYS)
+    contexts = [{"audit_qualification": i % 7 == 0} for i in range(len(rows))]
+    out = score_many(table, overrides_context=contexts)
+    for i, (metrics, ctx) in enumerate(zip(rows, contexts)):
+        single = run_rating(metrics, overrides_context=ctx)
+        row = out.iloc[i]
+        assert row["rating_grade"] == single["rating_grade"]
+        assert row["total_score"] == single["total_score"]
+        assert row["pd_band"] == single["pd_band"]
+    assert score_many(pd.DataFrame({"interest_cover": [np.nan]}))["quantitative_score"].iloc[0] == 0.0
+
+
+def test_scorecard_reloads_when_config_file_changes(tmp_path):
+    config = load_config()
+    path = tmp_path / "rating_config.json"
+    path.write_text(json.dumps(config))
+    first = get_scorecard(path)
+    assert get_scorecard(path) is first
+    config["version"] = "2099.01"
+    config["outputs"]["pd_mapping"]["BBB"] = 1.1
+    path.write_text(json.dumps(config))
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    second = get_scorecard(path)
+    assert second is not first
+    assert second.version == "2099.01"
+    assert second.pd_mapping["BBB"] == 1.1
+    get_scorecard()  # restore the default scorecard for other tests
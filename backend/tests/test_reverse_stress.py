@@ -0,0 +1,63 @@
+"""Reverse stress breakevens: shocks land exactly on the covenant thresholds; portfolio batch matches."""
+import random
+from datetime import date
+
+import pytest
+
+from app.services.memo_composer import _build_monitoring_triggers
+from app.services.portfolio_batch import facts_table_from_dicts
+from app.services.reverse_stress import portfolio_reverse_stress, reverse_stress
+from app.services.section_orchestrator import run_section_based_analysis
+
+PE = date(2025, 6, 30)
+FACTS = {
+    ("revenue", PE): 1000.0, ("cost_of_sales", PE): -600.0, ("operating_profit", PE): 120.0,
+    ("depreciation_amortisation", PE): 30.0, ("finance_costs", PE): -25.0,
+    ("cash_and_cash_equivalents", PE): 50.0, ("long_term_borrowings", PE): 350.0,
+}
+
+
+def test_breakevens_invert_the_covenant_ratios():
+    be = reverse_stress(FACTS, [PE])
+    ebitda, net_debt, interest, gross_profit = 150.0, 300.0, 25.0, 400.0
+    x = be["leverage"]["ebitda_decline"]
+    assert net_debt / (ebitda * (1 - x)) == pytest.approx(be["leverage_max"], rel=1e-3)
+    r = be["leverage"]["revenue_decline"]
+    assert net_debt / (ebitda - r * gross_profit) == pytest.approx(be["leverage_max"], rel=1e-3)
+    x = be["interest_cover"]["ebitda_decline"]
+    assert ebitda * (1 - x) / interest == pytest.approx(be["interest_cover_min"], rel=1e-3)
+    bps = be["interest_cover"]["rate_rise_bps"]
+    assert ebitda / (interest + 350.0 * bps / 10_000) == pytest.approx(be["interest_cover_min"], rel=1e-3)
+    assert be["leverage"]["rate_rise_bps"] is None
+    assert be["tightest_ebitda_decline"] == min(be["leverage"]["ebitda_decline"], be["interest_cover"]["ebitda_decline"])
+
+
+def test_breached_and_non_binding_covenants():
+    breached = dict(FACTS)
+    breached[("long_term_borrowings", PE)] = 900.0
+    assert reverse_stress(breached, [PE])["leverage"]["ebitda_decline"] == 0.0
+    net_cash = dict(FACTS)
+    net_cash[("cash_and_cash_equivalents", PE)] = 500.0
+    assert reverse_stress(net_cash, [PE])["leverage"] == {"ebitda_decline": None, "revenue_decline": None, "rate_rise_bps": None}
+
+
+def test_portfolio_solve_matches_single_company():
+    rng = random.Random(2)
+    by_company = {}
+    for c in range(50):
+        facts = {k: v * rng.uniform(0.3, 3.0) for k, v in FACTS.items() if rng.random() < 0.9}
+        facts[("operating_profit", PE)] = 120.0 * rng.uniform(-0.5, 2.0)
+        by_company[c] = facts
+    batch = portfolio_reverse_stress(facts_table_from_dicts(by_company))
+    for c, facts in by_company.items():
+        assert batch[c] == reverse_stress(facts, [PE]), c
+
+
+def test_breakevens_reach_covenant_block_and_monitoring_triggers():
+    thin = dict(FACTS)
+    thin[("long_term_borrowings", PE)] = 420.0
+    out = run_section_based_analysis(thin, [PE])
+    be = out["section_blocks"]["covenants"]["key_metrics"]["breakevens"]
+    assert be == reverse_stress(thin, [PE])
+    assert 0 < be["tightest_ebitda_decline"] < 0.2
+    assert "Covenant headroom" in _build_monitoring_triggers(out["section_blocks"], out["aggregation"])
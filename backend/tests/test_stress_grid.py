@@ -0,0 +1,59 @@
+"""Scenario-grid stress: legacy scenarios are grid points; surfaces broadcast over all periods."""
+from datetime import date
+
+import numpy as np
+
+from app.services.stress_engine import run_stress_engine
+from app.services.stress_grid import DEFAULT_GRID, LEGACY_GRID_POINTS, ShockGrid, run_stress_grid, summarise_surfaces
+from app.services.stress_section_engine import run_stress_section_engine
+
+PE, PP = date(2025, 6, 30), date(2024, 6, 30)
+FACTS = {
+    ("revenue", PE): 1000.0, ("operating_profit", PE): 120.0, ("depreciation_amortisation", PE): 30.0,
+    ("finance_costs", PE): -25.0, ("cash_and_cash_equivalents", PE): 90.0, ("short_term_borrowings", PE): 40.0,
+    ("current_portion_long_term_debt", PE): 20.0, ("long_term_borrowings", PE): 300.0,
+    ("lease_liabilities_non_current", PE): 60.0,
+    ("revenue", PP): 900.0, ("operating_profit", PP): 80.0, ("finance_costs", PP): -30.0,
+    ("long_term_borrowings", PP): 350.0,
+}
+_FIELDS = {
+    "ebitda_stressed": "ebitda_stressed",
+    "interest_cover_stressed": "interest_cover",
+    "net_debt_to_ebitda_stressed": "net_debt_to_ebitda",
+    "cash_after_shock": "cash_after_shock",
+    "st_debt_to_cash_stressed": "st_debt_to_cash",
+}
+
+
+def test_legacy_scenarios_are_grid_points():
+    legacy = run_stress_engine(FACTS, [PE, PP])["scenarios"]
+    axes = [sorted({p[i] for p in LEGACY_GRID_POINTS.values()}) for i in range(4)]
+    surfaces = run_stress_grid(FACTS, [PE, PP], ShockGrid.build(*axes))
+    for name, point in LEGACY_GRID_POINTS.items():
+        got = surfaces.at(0, *point)
+        for field, surface in _FIELDS.items():
+            if field in legacy[name]:
+                expected = legacy[name][field]
+                assert (None if got[surface] is None else round(got[surface], 2)) == expected, (name, field)
+
+
+def test_default_grid_surfaces_are_compact_and_cover_all_periods():
+    surfaces = run_stress_grid(FACTS, [PP, PE])
+    assert DEFAULT_GRID.size > 10_000
+    assert surfaces.periods == [PE, PP]
+    assert surfaces.net_debt_to_ebitda.shape == (2, 13, 11, 1, 1)
+    assert surfaces.full("interest_cover").shape == (2,) + DEFAULT_GRID.shape
+    ic = surfaces.full("interest_cover")[0]
+    # Interest cover only falls as revenue and margin fall or rates rise
+    assert np.all(np.diff(ic, axis=0) >= -1e-9)
+    assert np.all(np.diff(ic, axis=2) <= 1e-9)
+
+
+def test_section_engine_keeps_legacy_scoring_and_adds_grid_summary():
+    plain = run_stress_section_engine(FACTS, [PE, PP])
+    with_grid = run_stress_section_engine(FACTS, [PE, PP], grid=DEFAULT_GRID)
+    summary = with_grid["key_metrics"].pop("scenario_grid")
+    assert with_grid == plain
+    assert summary == summarise_surfaces(run_stress_grid(FACTS, [PE, PP]))
+    assert summary["combinations"] == DEFAULT_GRID.size
+    assert 0 < summary["share_interest_cover_below_floor"] < 1
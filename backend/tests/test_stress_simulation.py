@@ -0,0 +1,51 @@
+"""Monte Carlo breach simulation: seeded, chunk-invariant, fast, thresholds from the covenant notes."""
+import time
+from datetime import date
+
+from app.services.stress_section_engine import run_stress_section_engine
+from app.services.stress_simulation import SimulationParams, simulate_breach_probability
+
+PE = date(2025, 6, 30)
+FACTS = {
+    ("revenue", PE): 1000.0, ("operating_profit", PE): 120.0, ("depreciation_amortisation", PE): 30.0,
+    ("finance_costs", PE): -35.0, ("cash_and_cash_equivalents", PE): 50.0, ("long_term_borrowings", PE): 400.0,
+}
+NOTES = {"notes": {"43": {"text": "Covenant: net debt to EBITDA shall not exceed 2.5 times; "
+                                  "interest cover to be a minimum of 3.0 times."}}}
+
+
+def test_seeded_and_independent_of_chunk_size():
+    a = simulate_breach_probability(FACTS, [PE], NOTES, SimulationParams(draws=30_000, seed=3, chunk_size=30_000))
+    b = simulate_breach_probability(FACTS, [PE], NOTES, SimulationParams(draws=30_000, seed=3, chunk_size=7_000))
+    c = simulate_breach_probability(FACTS, [PE], NOTES, SimulationParams(draws=30_000, seed=4))
+    assert a == b
+    assert a != c
+    assert (a["leverage_max"], a["interest_cover_min"]) == (2.5, 3.0)
+    assert 0 < a["any_breach"]["probability"] < 1
+    assert a["any_breach"]["probability"] >= max(a["leverage_breach"]["probability"], a["interest_cover_breach"]["probability"])
+
+
+def test_degenerate_shocks_match_deterministic_covenant_test():
+    still = SimulationParams(draws=1_000, stdev=(1e-12, 1e-9, 1e-9))
+    # ND/EBITDA = 350 / 150 = 2.33x (< 2.5); interest cover = 120 / 35 = 3.43x (>= 3.0)
+    out = simulate_breach_probability(FACTS, [PE], NOTES, still)
+    assert out["any_breach"]["probability"] == 0.0
+    tight = {"notes": {"43": {"text": "covenant: not exceed 2.0 times, a minimum of 3.5 times"}}}
+    out = simulate_breach_probability(FACTS, [PE], tight, still)
+    assert out["leverage_breach"]["probability"] == out["interest_cover_breach"]["probability"] == 1.0
+
+
+def test_longer_horizon_raises_breach_probability_and_100k_draws_run_fast():
+    one = simulate_breach_probability(FACTS, [PE], NOTES, SimulationParams(draws=20_000, horizon_years=1))
+    three = simulate_breach_probability(FACTS, [PE], NOTES, SimulationParams(draws=20_000, horizon_years=3))
+    assert three["any_breach"]["probability"] > one["any_breach"]["probability"]
+    t0 = time.perf_counter()
+    out = simulate_breach_probability(FACTS, [PE], NOTES, SimulationParams(draws=100_000))
+    assert time.perf_counter() - t0 < 1.0
+    assert out["draws"] == 100_000
+
+
+def test_stress_section_reports_breach_probability_when_enabled():
+    block = run_stress_section_engine(FACTS, [PE], simulation=SimulationParams(draws=5_000), notes_json=NOTES)
+    assert block["key_metrics"]["breach_probability"]["draws"] == 5_000
+    assert "breach_probability" not in run_stress_section_engine(FACTS, [PE])["key_metrics"]
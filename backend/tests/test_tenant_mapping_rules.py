@@ -0,0 +1,42 @@
+"""Tests for compiled tenant MappingRule sets and their use in run_mapping."""
+from datetime import datetime
+from types import SimpleNamespace
+from uuid import uuid4
+
+from app.services.mapping_pipeline import run_mapping
+from app.services.tenant_mapping_rules import TENANT_RULE_METHOD, compile_tenant_rules
+
+
+def _rule(pattern, key, scope="global", priority=50, entity=None, created=1, is_expense=False):
+    return SimpleNamespace(
+        id=uuid4(), pattern=pattern, canonical_key=key, scope=scope, scope_entity_id=entity,
+        priority=priority, is_expense=is_expense, created_at=datetime(2026, 1, created),
+    )
+
+
+def test_priority_and_document_scope():
+    dv = uuid4()
+    rules = compile_tenant_rules("t1", "v1", [
+        _rule("store  sales", "revenue", priority=50, created=2),
+        _rule("store sales", "other_receivables", priority=90, created=3),
+        _rule("store sales", "cost_of_sales", scope="per_document_version", priority=80, entity=dv, is_expense=True),
+    ])
+    assert rules.match("Store Sales") == ("other_receivables", TENANT_RULE_METHOD, False)
+    assert rules.match("Store Sales", str(dv)) == ("cost_of_sales", TENANT_RULE_METHOD, True)
+    assert rules.match("Store Sales", str(uuid4())) == ("other_receivables", TENANT_RULE_METHOD, False)
+    assert rules.match("Revenue") is None
+
+
+def test_run_mapping_applies_tenant_rules_before_builtins():
+    extraction = {
+        "SCI_GROUP": [
+            {"raw_label": "Merchandise income", "line_no": 1, "2025": 100.0, "2024": 90.0},
+            {"raw_label": "Revenue", "line_no": 2, "2025": 500.0, "2024": 450.0},
+        ]
+    }
+    rules = compile_tenant_rules("t1", "v1", [_rule("merchandise income", "finance_income")])
+    facts = run_mapping("", "c1", extraction_override=extraction, tenant_rules=rules)
+    by_key = {(f["canonical_key"], f["period_end"].year): f for f in facts}
+    assert by_key[("finance_income", 2025)]["value_base"] == 100.0
+    assert by_key[("finance_income", 2025)]["source_refs_json"][0]["mapping_confidence"] == 1.0
+    assert by_key[("revenue", 2024)]["value_base"] == 450.0
@@ -0,0 +1,31 @@
+"""Tests for the Celery worker sync engine: per-process init, cached factory, pool stats."""
+from app.worker import db as worker_db
+
+
+def test_pool_size_for_concurrency():
+    assert worker_db.pool_size_for_concurrency(8, "prefork") == 2
+    assert worker_db.pool_size_for_concurrency(8, "threads") == 8
+    assert worker_db.pool_size_for_concurrency(1, "gevent") == 2
+
+
+def test_session_factory_cached_and_checkouts_counted(tmp_path, monkeypatch):
+    monkeypatch.setattr(worker_db, "_sync_url", lambda: f"sqlite:///{tmp_path / 'w.db'}")
+    engine = worker_db.init_sync_engine(pool_size=3)
+    factory = worker_db._session_factory
+    s1 = worker_db.get_sync_session()
+    s2 = worker_db.get_sync_session()
+    try:
+        assert worker_db._session_factory is factory
+        assert worker_db._sync_engine is engine
+        stats = worker_db.pool_stats()
+        assert stats["checkouts"] == 2
+        assert stats["checked_out"] == 2
+        assert stats["pool_size"] == 3
+        assert stats["wait_ms_max"] >= stats["wait_ms_avg"] >= 0
+    finally:
+        s1.close()
+        s2.close()
+    assert worker_db.pool_stats()["checked_out"] == 0
+    engine.dispose()
+    monkeypatch.setattr(worker_db, "_sync_engine", None)
+    monkeypatch.setattr(worker_db, "_session_factory", None)